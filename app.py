@@ -2,16 +2,24 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file, stream_with_context
 from src.exception import CustomException
 from src.logger import logging as lg
 import os, sys
 
 from src.pipeline.train_pipeline import TraininingPipeline
 from src.pipeline.predict_pipeline import PredictionPipeline
+from src.pipeline.model_holder import get_model_holder
+from src.pipeline.row_scoring import RowScorer
+from src.pipeline.prediction_jobs import PredictionJobManager, JobQueueFull
 
 app = Flask(__name__)
 
+# load the model/preprocessor pair once at startup; a watcher thread swaps in newer pairs
+model_holder = get_model_holder()
+row_scorer = RowScorer(model_holder)
+prediction_jobs = PredictionJobManager()
+
 @app.route("/")
 def home():
     return render_template('index.html')
@@ -21,6 +29,7 @@ def train_route():
     try:
         train_pipeline = TraininingPipeline()
         train_pipeline.run_pipeline()
+        model_holder.reload_if_changed()
         return "Training Completed."
     except Exception as e:
         error_message = str(e)
@@ -31,7 +40,7 @@ def train_route():
 def upload():
     try:
         if request.method == 'POST':
-            prediction_pipeline = PredictionPipeline(request)
+            prediction_pipeline = PredictionPipeline(request, model_holder)
             prediction_file_detail = prediction_pipeline.run_pipeline()
             lg.info("prediction completed. Downloading prediction file.")
             return send_file(prediction_file_detail.prediction_file_path,
@@ -44,6 +53,103 @@ def upload():
         lg.error(f"Prediction error: {error_message}")
         return f"Prediction Error: {error_message}", 500
 
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """
+    Score a CSV sent as the raw body (text/csv) or as the multipart "file"
+    field, streaming the predictions back chunk by chunk
+    """
+    try:
+        prediction_pipeline = PredictionPipeline(request, model_holder)
+        if request.mimetype in ("text/csv", "application/octet-stream"):
+            input_stream = request.stream
+        elif "file" in request.files:
+            # multipart uploads are spooled by werkzeug and closed with the request,
+            # so they are streamed from the saved copy instead
+            input_stream = open(prediction_pipeline.save_input_files(), "rb")
+        else:
+            return "Prediction Error: send a CSV body or a multipart file field", 400
+
+        chunks = prediction_pipeline.open_prediction_stream(input_stream)
+        return Response(
+            stream_with_context(chunks),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=predicted_file.csv"},
+        )
+    except Exception as e:
+        error_message = str(e)
+        lg.error(f"Streaming prediction error: {error_message}")
+        return f"Prediction Error: {error_message}", 500
+
+@app.route("/jobs", methods=["POST"])
+def submit_prediction_job():
+    """
+    Queue the uploaded "file" for background scoring and return its job id right away
+    """
+    try:
+        if "file" not in request.files:
+            return jsonify({"error": "expected a multipart file field"}), 400
+        job_id = prediction_jobs.submit(request.files["file"])
+        return jsonify({
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
+        }), 202
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "30"}
+    except Exception as e:
+        error_message = str(e)
+        lg.error(f"Prediction job error: {error_message}")
+        return jsonify({"error": error_message}), 500
+
+@app.route("/jobs/<job_id>")
+def prediction_job_status(job_id):
+    try:
+        return jsonify(prediction_jobs.get_status(job_id))
+    except KeyError:
+        return jsonify({"error": f"unknown job {job_id}"}), 404
+
+@app.route("/jobs/<job_id>/result")
+def prediction_job_result(job_id):
+    try:
+        result_path = prediction_jobs.get_result_path(job_id)
+    except KeyError:
+        return jsonify({"error": f"unknown job {job_id}"}), 404
+    if result_path is None:
+        return jsonify(prediction_jobs.get_status(job_id)), 409
+    return send_file(os.path.abspath(result_path), download_name="predicted_file.csv", as_attachment=True)
+
+@app.route("/predict/row", methods=["POST"])
+def predict_row():
+    """
+    Score one wafer. The body is either JSON {"features": {sensor: value}} /
+    {"features": [values in /predict/row/schema order]}, or the raw
+    little-endian float values as application/octet-stream.
+    """
+    try:
+        if request.mimetype == "application/octet-stream":
+            payload = request.get_data()
+        else:
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict) or "features" not in body:
+                return jsonify({"error": "expected a JSON object with a features field"}), 400
+            payload = body["features"]
+
+        return jsonify({"prediction": row_scorer.score(payload)})
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        error_message = str(e)
+        lg.error(f"Row prediction error: {error_message}")
+        return jsonify({"error": error_message}), 500
+
+@app.route("/predict/row/schema")
+def predict_row_schema():
+    try:
+        return jsonify({"columns": row_scorer.get_columns(), "dtype": row_scorer.dtype.name})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
 @app.route("/healthz")
 def health_check():
     return jsonify({"status": "healthy"})
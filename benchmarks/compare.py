@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files written by run_benchmarks.py:
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Prints the wall time and peak RSS ratio of every step present in both
+files and exits with status 1 when any step got slower (or, with
+--memory, larger) by more than the threshold.
+"""
+import sys
+import json
+import argparse
+
+
+def load_results(file_path: str) -> dict:
+    with open(file_path, "r") as result_file:
+        report = json.load(result_file)
+    return {(result["rows"], result["stage"], result["name"]): result for result in report["results"]}
+
+
+def compare(baseline: dict, candidate: dict, threshold: float, check_memory: bool = False) -> list:
+    regressions = []
+    print(f"{'rows':>10}  {'stage':<15} {'name':<28} {'wall (s)':>21} {'ratio':>7}  {'peak RSS (MB)':>21} {'ratio':>7}")
+
+    for key in sorted(set(baseline) & set(candidate)):
+        rows, stage, name = key
+        old, new = baseline[key], candidate[key]
+        wall_ratio = new["wall_seconds"] / max(old["wall_seconds"], 1e-9)
+        rss_ratio = new["peak_rss_mb"] / max(old["peak_rss_mb"], 1e-9)
+
+        flags = []
+        if wall_ratio > 1 + threshold:
+            flags.append("SLOWER")
+        if check_memory and rss_ratio > 1 + threshold:
+            flags.append("LARGER")
+        if flags:
+            regressions.append((key, flags))
+
+        print(
+            f"{rows:>10}  {stage:<15} {name:<28} "
+            f"{old['wall_seconds']:>10.3f}{new['wall_seconds']:>11.3f} {wall_ratio:>7.2f}  "
+            f"{old['peak_rss_mb']:>10.1f}{new['peak_rss_mb']:>11.1f} {rss_ratio:>7.2f}  {' '.join(flags)}"
+        )
+
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print(f"only in {'baseline' if key in baseline else 'candidate'}: {key}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    parser.add_argument("--memory", action="store_true", help="also fail on peak RSS growth")
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.baseline), load_results(args.candidate), args.threshold, args.memory)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
@@ -0,0 +1,286 @@
+"""
+Training benchmark suite.
+
+For every row count it generates synthetic wafer data and times:
+
+    ingestion       bulk load into a local MongoDB stand-in (mongomock, or a
+                    real server with --mongo-url) and the DataIngestion export
+    transformation  DataTransformation.initiate_data_transformation per fit mode
+    training        fit and predict of every ModelTrainer candidate
+    inference       native predict vs the flattened FlatTreeEnsemble of every
+                    fitted tree candidate, per batch size (runs training)
+
+recording wall time and peak RSS of each step, and writes the results as
+JSON for benchmarks/compare.py:
+
+    python -m benchmarks.run_benchmarks --rows 1000 10000 100000 --output results.json
+
+Each run works in its own temporary directory, so artifacts and caches of
+earlier runs are never reused.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sklearn.base import clone
+
+from benchmarks.synthetic_data import write_wafer_csv, write_feature_store
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer, evaluate_candidate
+from src.components.tree_ensemble import FlatTreeEnsemble
+from src.entity.config_entity import DataIngestionConfig
+from src.utils.pipeline_manifest import reset_peak_rss, get_peak_rss_mb
+from upload_data import BulkLoader
+
+
+class Timer:
+    """
+    Measure wall time and peak RSS of a block
+    """
+
+    def __enter__(self):
+        reset_peak_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_seconds = time.perf_counter() - self.start
+        self.peak_rss_mb = get_peak_rss_mb()
+        return False
+
+
+def get_metadata() -> dict:
+    import pandas
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "peak_rss_per_step": reset_peak_rss(),
+        "versions": {
+            "numpy": np.__version__,
+            "pandas": pandas.__version__,
+            "scikit-learn": sklearn.__version__,
+            "xgboost": xgboost.__version__,
+        },
+    }
+
+
+def get_collection(mongo_url):
+    if mongo_url:
+        import pymongo
+        client = pymongo.MongoClient(mongo_url)
+        collection = client["wafer_benchmark"][f"run_{os.getpid()}"]
+        collection.drop()
+        return collection
+
+    try:
+        import mongomock
+    except ImportError as e:
+        raise ImportError("The ingestion benchmark needs mongomock (pip install mongomock) or --mongo-url") from e
+    return mongomock.MongoClient()["wafer_benchmark"]["waferfault"]
+
+
+def benchmark_ingestion(n_rows, args, record) -> str:
+    wafer_csv_path = os.path.join("input", "wafer_benchmark.csv")
+    with Timer() as timer:
+        write_wafer_csv(wafer_csv_path, n_rows, chunksize=args.chunksize, seed=args.seed)
+    record("generate", "wafer_csv", timer, bytes=os.path.getsize(wafer_csv_path))
+
+    collection = get_collection(args.mongo_url)
+    loader = BulkLoader(collection, chunksize=args.chunksize, state_file_path=os.path.join("input", "upload_state.json"))
+    with Timer() as timer:
+        n_inserted = loader.load([wafer_csv_path])
+    record("ingestion", "bulk_load", timer, documents=n_inserted)
+
+    feature_store_file_path = None
+    for export_mode in args.export_modes:
+        config = DataIngestionConfig(export_mode=export_mode, feature_store_format=args.feature_store_format)
+        config.feature_store_file_path = os.path.join("feature_store", export_mode, os.path.basename(config.feature_store_file_path))
+        os.makedirs(os.path.dirname(config.feature_store_file_path), exist_ok=True)
+
+        data_ingestion = DataIngestion(config)
+        data_ingestion.get_mongo_collection = lambda **kwargs: collection
+        with Timer() as timer:
+            feature_store_file_path = str(data_ingestion.initiate_data_ingestion())
+        record("ingestion", f"export_{export_mode}", timer)
+
+    if args.mongo_url:
+        collection.drop()
+    return feature_store_file_path
+
+
+def benchmark_transformation(feature_store_file_path, args, record):
+    data_transformation_artifact = None
+    for fit_mode in args.fit_modes:
+        shutil.rmtree("artifacts", ignore_errors=True)
+        data_transformation = DataTransformation(feature_store_file_path)
+        data_transformation.data_transformation_config.fit_mode = fit_mode
+        with Timer() as timer:
+            data_transformation_artifact = data_transformation.initiate_data_transformation()
+        record("transformation", fit_mode, timer)
+    return data_transformation_artifact
+
+
+def benchmark_training(data_transformation_artifact, args, record) -> dict:
+    """
+    Time every candidate; returns the fitted models by name
+    """
+    X_train, y_train, X_test, y_test = ModelTrainer.load_transformed_data(data_transformation_artifact)
+    models = ModelTrainer().models
+    fitted_models = {}
+
+    for model_name in args.candidates or list(models):
+        model = clone(models[model_name])
+        with Timer() as timer:
+            result = evaluate_candidate(model_name, model, (X_train, y_train, X_test, y_test))
+        if result["status"] == "ok":
+            fitted_models[model_name] = model
+        record(
+            "training", model_name, timer,
+            status=result["status"],
+            fit_seconds=result.get("fit_seconds"),
+            predict_seconds=result.get("predict_seconds"),
+            accuracy=result.get("score"),
+            boosting_rounds=result.get("boosting_rounds"),
+            error=result.get("error"),
+        )
+    return fitted_models
+
+
+def benchmark_inference(fitted_models, X_test, args, record):
+    for model_name, model in fitted_models.items():
+        try:
+            ensemble = FlatTreeEnsemble.from_model(model)
+        except ValueError as e:
+            print(f"Skipping inference for {model_name}: {e}")
+            continue
+
+        for batch_size in args.batch_sizes:
+            X = X_test[np.arange(batch_size) % len(X_test)]
+            predictions = {}
+            for engine, predict in (("native", model.predict), ("flat", ensemble.predict)):
+                predict(X)  # warm-up
+                with Timer() as timer:
+                    for _ in range(args.repeats):
+                        predictions[engine] = predict(X)
+                timer.wall_seconds /= args.repeats
+                if engine == "native":
+                    native_seconds = timer.wall_seconds
+                record(
+                    "inference", f"{model_name}_{engine}_{batch_size}", timer,
+                    batch_size=batch_size, n_trees=ensemble.n_trees, n_nodes=len(ensemble.feature),
+                    speedup=round(native_seconds / timer.wall_seconds, 2) if engine == "flat" else None,
+                    identical=bool(np.array_equal(predictions["native"], predictions["flat"])) if engine == "flat" else None,
+                )
+
+
+def run(args) -> dict:
+    results = []
+    work_root = tempfile.mkdtemp(prefix="wafer_benchmark_", dir=args.work_dir)
+    cwd = os.getcwd()
+
+    try:
+        for n_rows in args.rows:
+            run_dir = os.path.join(work_root, f"rows_{n_rows}")
+            os.makedirs(run_dir)
+            os.chdir(run_dir)
+
+            def record(stage, name, timer, **extra):
+                result = {
+                    "rows": n_rows,
+                    "stage": stage,
+                    "name": name,
+                    "wall_seconds": round(timer.wall_seconds, 4),
+                    "peak_rss_mb": round(timer.peak_rss_mb, 1),
+                    **{key: value for key, value in extra.items() if value is not None},
+                }
+                results.append(result)
+                print(json.dumps(result), flush=True)
+
+            if "ingestion" in args.stages:
+                feature_store_file_path = benchmark_ingestion(n_rows, args, record)
+            else:
+                feature_store_file_path = os.path.join("feature_store", "sensor_data." + args.feature_store_format)
+                with Timer() as timer:
+                    write_feature_store(feature_store_file_path, n_rows, file_format=args.feature_store_format,
+                                        chunksize=args.chunksize, seed=args.seed)
+                record("generate", "feature_store", timer)
+
+            data_transformation_artifact = None
+            run_training = "training" in args.stages or "inference" in args.stages
+            if "transformation" in args.stages or run_training:
+                data_transformation_artifact = benchmark_transformation(feature_store_file_path, args, record)
+
+            if run_training:
+                if n_rows > args.max_training_rows:
+                    print(f"Skipping training for {n_rows} rows (--max-training-rows {args.max_training_rows})")
+                else:
+                    fitted_models = benchmark_training(data_transformation_artifact, args, record)
+                    if "inference" in args.stages:
+                        X_test = ModelTrainer.load_transformed_data(data_transformation_artifact)[2]
+                        benchmark_inference(fitted_models, X_test, args, record)
+
+            os.chdir(cwd)
+            if not args.keep:
+                shutil.rmtree(run_dir, ignore_errors=True)
+
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    return {"metadata": get_metadata(), "config": vars(args), "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, transformation and training on synthetic wafer data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--stages", nargs="+", choices=["ingestion", "transformation", "training", "inference"],
+                        default=["ingestion", "transformation", "training"])
+    parser.add_argument("--export-modes", nargs="+", choices=["stream", "parallel"], default=["stream"])
+    parser.add_argument("--fit-modes", nargs="+", choices=["in_memory", "chunked"], default=["in_memory"])
+    parser.add_argument("--feature-store-format", choices=["csv", "parquet", "npy"], default="csv")
+    parser.add_argument("--candidates", nargs="+", default=None, help="ModelTrainer candidates to time (default: all)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10000],
+                        help="rows per predict call in the inference stage")
+    parser.add_argument("--repeats", type=int, default=20, help="predict calls timed per inference batch size")
+    parser.add_argument("--max-training-rows", type=int, default=1000000,
+                        help="skip the training stage above this many rows")
+    parser.add_argument("--mongo-url", default=None, help="benchmark against a real MongoDB instead of mongomock")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="where the temporary run directories are created")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data and artifacts")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
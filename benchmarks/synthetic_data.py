@@ -0,0 +1,148 @@
+"""
+Synthetic wafer data for benchmarks.
+
+Produces batches shaped like the wafer_*.csv files: a wafer name column,
+Sensor-1 .. Sensor-590 and an imbalanced Good/Bad label (-1 good, 1 bad).
+Sensors follow a fixed profile drawn from the seed: most are noisy
+readings on very different scales with a little missing data, some are
+constant, some are dead (always missing) or mostly missing, some
+duplicate an earlier sensor, and a subset shifts for bad wafers. Missing
+values come both as isolated readings and as outage runs of consecutive
+wafers.
+
+Rows are generated chunk by chunk, so 10^7 rows never have to fit in memory:
+
+    python -m benchmarks.synthetic_data --rows 1000000 --output wafer_1e6.csv
+    python -m benchmarks.synthetic_data --rows 1000000 --output sensor_data.npy --feature-store npy
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.utils.feature_store import FeatureStore
+
+
+class SensorProfile:
+    """
+    Fixed per-sensor behaviour: scale, missing rate, kind and fault shift
+    """
+
+    def __init__(self, n_sensors=590, seed=0):
+        rng = np.random.default_rng(seed)
+        self.n_sensors = n_sensors
+        self.columns = [f"Sensor-{index + 1}" for index in range(n_sensors)]
+
+        kind = rng.choice(
+            ["normal", "constant", "dead", "sparse", "duplicate"],
+            size=n_sensors,
+            p=[0.77, 0.15, 0.01, 0.03, 0.04],
+        )
+        kind[0] = "normal"
+        self.kind = kind
+
+        self.location = rng.lognormal(mean=3.0, sigma=2.0, size=n_sensors) * rng.choice([-1, 1], size=n_sensors, p=[0.1, 0.9])
+        self.spread = np.abs(self.location) * rng.uniform(0.01, 0.3, size=n_sensors) + 1e-3
+
+        # most sensors are almost always present, a quarter drop a few percent of readings
+        self.missing_rate = np.where(rng.random(n_sensors) < 0.75, 0.0, rng.uniform(0.0, 0.05, size=n_sensors))
+        self.missing_rate[kind == "sparse"] = rng.uniform(0.5, 0.95, size=(kind == "sparse").sum())
+        self.missing_rate[kind == "dead"] = 1.0
+        self.missing_rate[kind == "constant"] = rng.uniform(0.0, 0.02, size=(kind == "constant").sum())
+
+        # duplicates copy an earlier sensor, faults shift ~10% of the normal sensors
+        self.source = np.arange(n_sensors)
+        duplicates = np.flatnonzero(kind == "duplicate")
+        self.source[duplicates] = [rng.integers(0, index) for index in duplicates]
+        self.fault_shift = np.where(
+            (kind == "normal") & (rng.random(n_sensors) < 0.1),
+            rng.uniform(1.0, 3.0, size=n_sensors) * rng.choice([-1, 1], size=n_sensors),
+            0.0,
+        )
+
+
+def generate_chunk(profile: SensorProfile, first_row: int, n_rows: int, bad_ratio=0.06, seed=0) -> pd.DataFrame:
+    """
+    Generate rows first_row .. first_row + n_rows as a wafer batch DataFrame
+    """
+    rng = np.random.default_rng([seed, first_row])
+    n_sensors = profile.n_sensors
+
+    labels = np.where(rng.random(n_rows) < bad_ratio, 1, -1)
+    noise = rng.standard_normal((n_rows, n_sensors), dtype=np.float32)
+    noise += (labels == 1)[:, None] * profile.fault_shift.astype(np.float32)
+    values = profile.location + profile.spread * noise.astype(np.float64)
+
+    constant = profile.kind == "constant"
+    values[:, constant] = np.round(profile.location[constant], 3)
+    values = np.round(values, 4)
+
+    # isolated missing readings plus outages of 25 consecutive wafers
+    run_length = 25
+    n_runs = -(-n_rows // run_length)
+    outages = rng.random((n_runs, n_sensors)) < profile.missing_rate / 2
+    missing = np.repeat(outages, run_length, axis=0)[:n_rows]
+    missing |= rng.random((n_rows, n_sensors)) < profile.missing_rate / 2
+    missing[:, profile.kind == "dead"] = True
+    values[missing] = np.nan
+    values = values[:, profile.source]
+
+    frame = pd.DataFrame(values, columns=profile.columns)
+    frame.insert(0, "Unnamed: 0", [f"Wafer-{row + 1}" for row in range(first_row, first_row + n_rows)])
+    frame["Good/Bad"] = labels
+    return frame
+
+
+def iter_wafer_chunks(n_rows, chunksize=50000, n_sensors=590, bad_ratio=0.06, seed=0):
+    profile = SensorProfile(n_sensors=n_sensors, seed=seed)
+    for first_row in range(0, n_rows, chunksize):
+        yield generate_chunk(profile, first_row, min(chunksize, n_rows - first_row), bad_ratio=bad_ratio, seed=seed)
+
+
+def write_wafer_csv(file_path, n_rows, chunksize=50000, **kwargs) -> str:
+    """
+    Write a raw wafer batch csv, as uploaded by upload_data.py
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w", newline="") as file_obj:
+        for index, chunk in enumerate(iter_wafer_chunks(n_rows, chunksize=chunksize, **kwargs)):
+            chunk = chunk.rename(columns={"Unnamed: 0": ""})
+            chunk.to_csv(file_obj, header=(index == 0), index=False)
+    return file_path
+
+
+def write_feature_store(file_path, n_rows, file_format="csv", chunksize=50000, **kwargs) -> str:
+    """
+    Write rows straight into a feature store file (no wafer names), as exported by ingestion
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with FeatureStore(file_format).open_writer(file_path) as writer:
+        for chunk in iter_wafer_chunks(n_rows, chunksize=chunksize, **kwargs):
+            writer.write(chunk.drop(columns="Unnamed: 0").astype(np.float32))
+    return file_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic wafer sensor data")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--feature-store", choices=["csv", "parquet", "npy"], default=None,
+                        help="write a feature store file instead of a raw wafer batch csv")
+    parser.add_argument("--sensors", type=int, default=590)
+    parser.add_argument("--bad-ratio", type=float, default=0.06)
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    options = dict(chunksize=args.chunksize, n_sensors=args.sensors, bad_ratio=args.bad_ratio, seed=args.seed)
+    if args.feature_store:
+        write_feature_store(args.output, args.rows, file_format=args.feature_store, **options)
+    else:
+        write_wafer_csv(args.output, args.rows, **options)
+    print(f"Wrote {args.rows} rows to {args.output}")
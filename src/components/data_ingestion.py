@@ -1,22 +1,70 @@
 import os
 import sys
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from pymongo import MongoClient
-from src.constant import MONGO_DB_URL, MONGO_DATABASE_NAME, MONGO_COLLECTION_NAME
+from bson import json_util
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.constant import MONGO_DATABASE_NAME, MONGO_COLLECTION_NAME, USE_MONGODB
 from src.exception import CustomException
 from src.logger import logging
+from src.utils.feature_store import FeatureStore
+from src.utils.content_store import ContentStore
 from dataclasses import dataclass
 from pathlib import Path
 
 class DataIngestion:
     def __init__(self, data_ingestion_config):
         self.data_ingestion_config = data_ingestion_config
+        self.feature_store = FeatureStore(data_ingestion_config.feature_store_format)
+        self.content_store = ContentStore()
+        self._collection = None
+        self._collection_resolved = False
         logging.info("Data Ingestion configuration initialized")
 
-    def export_collection_as_dataframe(self, collection_name=MONGO_COLLECTION_NAME, database_name=MONGO_DATABASE_NAME):
+    def get_mongo_client(self):
         """
-        Export MongoDB collection as a pandas DataFrame
+        Return the process-wide pooled MongoDB client
+        """
+        return MongoDBClient().get_client()
+
+    def get_mongo_collection(self, collection_name=MONGO_COLLECTION_NAME, database_name=MONGO_DATABASE_NAME):
+        """
+        Return the MongoDB collection, or None when MongoDB is disabled or unreachable
+        """
+        if not USE_MONGODB:
+            logging.warning("MongoDB is disabled.")
+            return None
+
+        try:
+            mongo_db_client = MongoDBClient(database_name=database_name)
+            mongo_db_client.ping()
+            logging.info("Successfully connected to MongoDB")
+            return mongo_db_client.get_collection(collection_name)
+        except Exception as e:
+            logging.error(f"MongoDB connection failed: {str(e)}")
+            return None
+
+    def get_collection(self):
+        """
+        Resolve the source collection once per DataIngestion: every export step
+        and the source fingerprint share it, so an unreachable server costs a
+        single ping before the fallbacks take over
+        """
+        if not self._collection_resolved:
+            self._collection = self.get_mongo_collection(
+                collection_name=MONGO_COLLECTION_NAME,
+                database_name=MONGO_DATABASE_NAME
+            )
+            self._collection_resolved = True
+        return self._collection
+
+    def export_collection_as_dataframe(self, collection, collection_name=MONGO_COLLECTION_NAME, database_name=MONGO_DATABASE_NAME):
+        """
+        Export MongoDB collection as a pandas DataFrame. collection is the
+        resolved source collection, or None when MongoDB is unreachable, in which
+        case the local fallbacks are used.
         """
         try:
             logging.info(f"Exporting MongoDB collection: {collection_name} from database: {database_name}")
@@ -36,37 +84,8 @@ class DataIngestion:
                 df['quality'] = np.random.choice([0, 1], size=sample_size)
                 return df
             
-            # Connect to MongoDB with more flexible SSL settings
-            try:
-                # Try with certifi first
-                import certifi
-                ca = certifi.where()
-                mongo_client = MongoClient(
-                    MONGO_DB_URL,
-                    tlsCAFile=ca,
-                    ssl=True,
-                    ssl_cert_reqs='CERT_NONE'  # Less strict SSL verification
-                )
-            except Exception as e:
-                logging.error(f"MongoDB connection failed: {str(e)}")
-                # Return sample data as fallback
-                import pandas as pd
-                import numpy as np
-                
-                # Create a simple sample dataset
-                sample_size = 100
-                columns = [f"sensor_{i}" for i in range(10)]
-                data = np.random.randn(sample_size, len(columns))
-                df = pd.DataFrame(data, columns=columns)
-                df['quality'] = np.random.choice([0, 1], size=sample_size)
-                return df
-            
-            # Test connection
-            mongo_client.admin.command('ping')
-            logging.info("Successfully connected to MongoDB")
-            
-            # Get collection
-            collection = mongo_client[database_name][collection_name]
+            if collection is None:
+                raise ConnectionError(f"MongoDB collection {database_name}.{collection_name} is unreachable")
             
             # Convert to DataFrame
             df = pd.DataFrame(list(collection.find()))
@@ -103,25 +122,301 @@ class DataIngestion:
                 logging.error(f"All fallback options failed: {str(fallback_error)}")
                 raise CustomException(f"MongoDB connection failed and all fallbacks failed: {str(e)}", sys)
     
-    def export_data_into_feature_store_file_path(self):
+    @staticmethod
+    def _as_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            # None, "na" and any other non-numeric marker become missing values
+            return np.nan
+
+    def iter_collection_batches(self, collection, batch_size=None, query=None, columns=None, watermark_field=None):
+        """
+        Stream a MongoDB collection as (columns, float32 block, watermark) batches.
+
+        The cursor is read with a projection that drops `_id`, and each batch is
+        converted straight into one preallocated float32 block of batch_size rows.
+        The block is reused for every batch, so each yielded block must be
+        consumed (written out) before the next one is requested.
+
+        When watermark_field is given the cursor is sorted on it, the field is
+        kept out of the block and its value for the last document of each batch
+        is yielded as the watermark.
+
+        The columns are those of the first document unless given. Fields missing
+        from a later document become missing values; a field no column holds
+        raises ValueError instead of being dropped, since the columns of the
+        rows already written can no longer grow.
+        """
+        batch_size = batch_size or self.data_ingestion_config.batch_size
+        projection = None if watermark_field == "_id" else {"_id": 0}
+        cursor = collection.find(query or {}, projection=projection, batch_size=batch_size)
+        if watermark_field is not None:
+            cursor = cursor.sort(watermark_field, 1)
+
+        as_float = self._as_float
+        block = None
+        watermark = None
+        n_rows = 0
+
+        for document in cursor:
+            if watermark_field is not None:
+                watermark = document.pop(watermark_field, watermark)
+
+            if block is None:
+                columns = columns or list(document.keys())
+                column_set = set(columns)
+                block = np.empty((batch_size, len(columns)), dtype=np.float32)
+
+            if not column_set.issuperset(document):
+                raise ValueError(
+                    f"Document has fields outside the exported columns: {sorted(set(document) - column_set)}"
+                )
+
+            block[n_rows] = [as_float(document.get(column)) for column in columns]
+            n_rows += 1
+
+            if n_rows == batch_size:
+                yield columns, block, watermark
+                n_rows = 0
+
+        if n_rows:
+            yield columns, block[:n_rows], watermark
+
+    def export_collection_to_feature_store(self, collection, feature_store_file_path, query=None, columns=None, watermark_field=None):
+        """
+        Write a MongoDB collection to the feature store batch by batch, so peak
+        memory scales with the batch size and not with the collection.
+
+        Returns the number of rows written, the column order and the last watermark.
+        """
+        logging.info(f"Streaming collection to feature store in batches of {self.data_ingestion_config.batch_size}")
+
+        watermark = None
+        with self.feature_store.open_writer(feature_store_file_path) as writer:
+            for columns, block, watermark in self.iter_collection_batches(
+                collection, query=query, columns=columns, watermark_field=watermark_field
+            ):
+                writer.write(pd.DataFrame(block, columns=columns, copy=False))
+
+        logging.info(f"Streamed {writer.n_rows} rows to feature store")
+        return writer.n_rows, columns, watermark
+
+    def get_split_points(self, collection, n_ranges: int) -> list:
+        """
+        Return up to n_ranges - 1 `_id` values that cut the collection into
+        ranges of roughly equal document count. The boundaries are the
+        quantiles of a server-side $sample of split_samples `_id`s per range,
+        so only the sample crosses the network; a collection smaller than the
+        sample is returned whole and split exactly.
+        """
+        sample_size = n_ranges * self.data_ingestion_config.split_samples
+        sample = sorted(
+            document["_id"]
+            for document in collection.aggregate([{"$sample": {"size": sample_size}}, {"$project": {"_id": 1}}])
+        )
+        positions = sorted({i * len(sample) // n_ranges for i in range(1, n_ranges)} - {0})
+        return [sample[position] for position in positions]
+
+    @staticmethod
+    def _merge_partitions(partition_paths: list, feature_store_file_path: str, feature_store: FeatureStore) -> None:
+        """
+        Concatenate range partitions into one feature store file in range order
+        """
+        if feature_store.file_format == "csv":
+            # csv partitions are concatenated byte for byte, keeping only the first header
+            header_written = False
+            tmp_file_path = feature_store_file_path + ".tmp"
+            with open(tmp_file_path, "wb") as merged_file:
+                for partition_path in partition_paths:
+                    with open(partition_path, "rb") as partition_file:
+                        header = partition_file.readline()
+                        if header and not header_written:
+                            merged_file.write(header)
+                            header_written = True
+                        shutil.copyfileobj(partition_file, merged_file, 1024 * 1024)
+            os.replace(tmp_file_path, feature_store_file_path)
+            return
+
+        with feature_store.open_writer(feature_store_file_path) as writer:
+            for partition_path in partition_paths:
+                if os.path.getsize(partition_path) == 0:
+                    continue
+                for chunk in FeatureStore.iter_file_chunks(partition_path, chunksize=100000):
+                    writer.write(chunk)
+
+    def export_collection_in_parallel(self, collection, feature_store_file_path, n_workers=None) -> int:
+        """
+        Split the collection into `_id` ranges, export each range on its own
+        worker thread (all workers share the client's connection pool) and merge
+        the range partitions into the feature store in `_id` order.
+        """
+        n_workers = n_workers or self.data_ingestion_config.export_workers
+
+        first_document = collection.find_one({}, projection={"_id": 0})
+        if first_document is None:
+            logging.info("Collection is empty, nothing to export")
+            return self.export_collection_to_feature_store(collection, feature_store_file_path)[0]
+        columns = list(first_document.keys())
+
+        split_points = self.get_split_points(collection, n_workers)
+        bounds = [None] + split_points + [None]
+        range_queries = []
+        for lower, upper in zip(bounds[:-1], bounds[1:]):
+            id_range = {}
+            if lower is not None:
+                id_range["$gte"] = lower
+            if upper is not None:
+                id_range["$lt"] = upper
+            range_queries.append({"_id": id_range} if id_range else {})
+
+        logging.info(f"Exporting collection as {len(range_queries)} _id ranges with {n_workers} workers")
+
+        partition_dir = os.path.join(os.path.dirname(feature_store_file_path), "_ranges")
+        os.makedirs(partition_dir, exist_ok=True)
+        partition_paths = [
+            os.path.join(partition_dir, f"range-{i:05d}{self.feature_store.extension}")
+            for i in range(len(range_queries))
+        ]
+
+        try:
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.export_collection_to_feature_store,
+                        collection, partition_path, query=range_query, columns=columns,
+                    )
+                    for partition_path, range_query in zip(partition_paths, range_queries)
+                ]
+                n_rows = sum(future.result()[0] for future in futures)
+
+            self._merge_partitions(partition_paths, feature_store_file_path, self.feature_store)
+        finally:
+            shutil.rmtree(partition_dir, ignore_errors=True)
+
+        logging.info(f"Exported {n_rows} rows from {len(range_queries)} ranges")
+        return n_rows
+
+    def read_watermark(self) -> dict:
+        """
+        Read the high-water mark left by the last successful incremental run
+        """
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        if not os.path.exists(watermark_file_path):
+            return {"watermark": None, "columns": None, "partitions": []}
+
+        with open(watermark_file_path, "r") as watermark_file:
+            return json_util.loads(watermark_file.read())
+
+    def write_watermark(self, state: dict) -> None:
+        """
+        Atomically replace the stored high-water mark
+        """
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        tmp_file_path = watermark_file_path + ".tmp"
+        with open(tmp_file_path, "w") as watermark_file:
+            watermark_file.write(json_util.dumps(state))
+        os.replace(tmp_file_path, watermark_file_path)
+
+    def export_incremental_partition(self, collection) -> int:
+        """
+        Append the documents newer than the stored high-water mark to the
+        feature store as a new partition, then advance the high-water mark.
+
+        The watermark only moves after the partition is fully written, so a
+        failed run is simply repeated from the same point next time.
+        """
+        config = self.data_ingestion_config
+        os.makedirs(config.incremental_feature_store_dir, exist_ok=True)
+
+        state = self.read_watermark()
+        query = None
+        if state["watermark"] is not None:
+            query = {config.watermark_field: {"$gt": state["watermark"]}}
+
+        partition_name = f"part-{len(state['partitions']):05d}{self.feature_store.extension}"
+        partition_path = os.path.join(config.incremental_feature_store_dir, partition_name)
+        tmp_partition_path = os.path.join(config.incremental_feature_store_dir, f"_tmp-{partition_name}")
+
+        n_rows, columns, watermark = self.export_collection_to_feature_store(
+            collection,
+            tmp_partition_path,
+            query=query,
+            columns=state["columns"],
+            watermark_field=config.watermark_field,
+        )
+
+        tmp_sidecar_path = os.path.splitext(tmp_partition_path)[0] + ".columns.json"
+
+        if n_rows == 0:
+            for path in (tmp_partition_path, tmp_sidecar_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            logging.info("No new documents since the last watermark")
+            return 0
+
+        if os.path.exists(tmp_sidecar_path):
+            os.replace(tmp_sidecar_path, os.path.splitext(partition_path)[0] + ".columns.json")
+        os.replace(tmp_partition_path, partition_path)
+        state.update(
+            watermark=watermark,
+            columns=columns,
+            partitions=state["partitions"] + [partition_name],
+        )
+        self.write_watermark(state)
+
+        logging.info(f"Appended partition {partition_name} with {n_rows} rows, watermark: {watermark}")
+        return n_rows
+
+    def export_data_into_incremental_feature_store(self, collection):
+        """
+        Fetch only the documents added since the last run into the shared feature store
+        """
+        try:
+            logging.info("Exporting new data from MongoDB to incremental feature store")
+
+            if collection is None:
+                logging.warning("MongoDB unavailable, falling back to a full export")
+                return self.export_data_into_feature_store_file_path(collection)
+
+            self.export_incremental_partition(collection)
+            return self.data_ingestion_config.incremental_feature_store_dir
+
+        except Exception as e:
+            logging.error(f"Error in exporting data to incremental feature store: {str(e)}")
+            raise CustomException(e, sys)
+
+    def export_data_into_feature_store_file_path(self, collection):
         """
         Export data from MongoDB to feature store file path
         """
         try:
             logging.info("Exporting data from MongoDB to feature store")
             
-            # Get data from MongoDB
-            sensor_data = self.export_collection_as_dataframe(
-                collection_name=MONGO_COLLECTION_NAME,
-                database_name=MONGO_DATABASE_NAME
-            )
-            
             # Create feature store directory if it doesn't exist
             feature_store_dir = os.path.dirname(self.data_ingestion_config.feature_store_file_path)
             os.makedirs(feature_store_dir, exist_ok=True)
-            
-            # Save data to feature store
-            sensor_data.to_csv(self.data_ingestion_config.feature_store_file_path, index=False)
+
+            export_mode = self.data_ingestion_config.export_mode
+            if collection is not None and export_mode == "parallel":
+                self.export_collection_in_parallel(
+                    collection, self.data_ingestion_config.feature_store_file_path
+                )
+            elif collection is not None and export_mode == "stream":
+                self.export_collection_to_feature_store(
+                    collection, self.data_ingestion_config.feature_store_file_path
+                )
+            else:
+                # Get data from MongoDB (or its local fallbacks)
+                sensor_data = self.export_collection_as_dataframe(
+                    collection,
+                    collection_name=MONGO_COLLECTION_NAME,
+                    database_name=MONGO_DATABASE_NAME
+                )
+                
+                # Save data to feature store
+                with self.feature_store.open_writer(self.data_ingestion_config.feature_store_file_path) as writer:
+                    writer.write(sensor_data)
             
             logging.info(f"Data exported to feature store: {self.data_ingestion_config.feature_store_file_path}")
             return self.data_ingestion_config.feature_store_file_path
@@ -130,6 +425,38 @@ class DataIngestion:
             logging.error(f"Error in exporting data to feature store: {str(e)}")
             raise CustomException(e, sys)
     
+    def get_source_fingerprint(self):
+        """
+        Cheap fingerprint of the source collection: document count and highest
+        watermark value, plus the export settings. Returns None when MongoDB is
+        unavailable, so the export always runs. Documents updated in place
+        (same count, same highest watermark) are not detected.
+        """
+        try:
+            collection = self.get_collection()
+            if collection is None:
+                return None
+
+            config = self.data_ingestion_config
+            watermark_field = config.watermark_field
+            n_documents = MongoDBClient.with_retry(lambda: collection.count_documents({}))
+            last_document = MongoDBClient.with_retry(
+                lambda: collection.find_one({}, {watermark_field: 1}, sort=[(watermark_field, -1)])
+            )
+
+            return self.content_store.hash_values(
+                MONGO_DATABASE_NAME,
+                MONGO_COLLECTION_NAME,
+                n_documents,
+                json_util.dumps(last_document.get(watermark_field) if last_document else None),
+                config.ingestion_mode,
+                config.feature_store_format,
+            )
+
+        except Exception as e:
+            logging.warning(f"Could not fingerprint the source collection: {str(e)}")
+            return None
+
     def initiate_data_ingestion(self) -> Path:
         """
         Initiate the data ingestion process
@@ -137,8 +464,21 @@ class DataIngestion:
         logging.info("Initiating data ingestion")
         
         try:
+            collection = self.get_collection()
+
             # Export data to feature store
-            feature_store_file_path = self.export_data_into_feature_store_file_path()
+            if self.data_ingestion_config.ingestion_mode == "incremental":
+                feature_store_file_path = self.export_data_into_incremental_feature_store(collection)
+            else:
+                feature_store_file_path = self.export_data_into_feature_store_file_path(collection)
+
+            if os.path.isfile(feature_store_file_path):
+                # Identical exports are kept once and linked into the run directory
+                sidecar_path = os.path.splitext(feature_store_file_path)[0] + ".columns.json"
+                if os.path.exists(sidecar_path):
+                    self.content_store.put(sidecar_path)
+                feature_store_hash = self.content_store.put(feature_store_file_path)
+                logging.info(f"Feature store content hash: {feature_store_hash}")
             
             logging.info("Data ingestion completed successfully")
             return feature_store_file_path
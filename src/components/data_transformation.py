@@ -13,14 +13,34 @@ from src.constant import *
 from src.exception import CustomException
 from src.logger import logging
 from src.utils.main_utils import MainUtils
+from src.utils.feature_store import FeatureStore
+from src.utils.content_store import ContentStore
+from src.utils.preprocessor_cache import PreprocessorCache
+from src.components.preprocessing import SensorPruner, QuantileSketch, FusedPreprocessor
+from src.entity.artifact_entity import DataTransformationArtifact
 from dataclasses import dataclass
 
 @dataclass
 class DataTransformationConfig:
     artifact_dir=os.path.join(artifact_folder)
-    transformed_train_file_path=os.path.join(artifact_dir, 'train.npy')
-    transformed_test_file_path=os.path.join(artifact_dir, 'test.npy') 
+    transformed_train_features_file_path=os.path.join(artifact_dir, 'train_features.npy')
+    transformed_train_target_file_path=os.path.join(artifact_dir, 'train_target.npy')
+    transformed_test_features_file_path=os.path.join(artifact_dir, 'test_features.npy')
+    transformed_test_target_file_path=os.path.join(artifact_dir, 'test_target.npy')
     transformed_object_file_path=os.path.join( artifact_dir, 'preprocessor.pkl' )
+    fused_object_file_path=os.path.join(artifact_dir, 'fused_preprocessor.pkl')
+    test_size=0.2
+    random_state=42
+    numeric_dtype=NUMERIC_DTYPE
+    preprocessor_cache_dir=os.path.join(artifact_dir, 'preprocessor_cache')
+    preprocessor_cache_max_entries=8
+    prune_sensors=True
+    prune_max_missing_ratio=0.7
+    prune_variance_threshold=0.0
+    prune_duplicates=True
+    fit_mode=TRANSFORMATION_FIT_MODE
+    chunksize=TRANSFORMATION_CHUNKSIZE
+    sketch_size=2048
 
 
 
@@ -37,14 +57,22 @@ class DataTransformation:
 
 
         self.utils =  MainUtils()
+
+        self.content_store = ContentStore()
+
+        self.preprocessor_cache = PreprocessorCache(
+            cache_dir=self.data_transformation_config.preprocessor_cache_dir,
+            max_entries=self.data_transformation_config.preprocessor_cache_max_entries,
+        )
         
     
     
     @staticmethod
-    def get_data(feature_store_file_path:str) -> pd.DataFrame:
+    def get_data(feature_store_file_path:str, dtype=None) -> pd.DataFrame:
         """
         Method Name :   get_data
         Description :   This method reads all the validated raw data from the feature_store_file_path and returns a pandas DataFrame containing the merged data. 
+                        When dtype is given (e.g. float32) the columns are parsed directly into it.
         
         Output      :   a pandas DataFrame containing the merged data 
         On Failure  :   Write an exception log and then raise an exception
@@ -53,7 +81,7 @@ class DataTransformation:
         Revisions   :   moved setup to cloud
         """
         try:
-            data = pd.read_csv(feature_store_file_path)
+            data = FeatureStore.read(feature_store_file_path, dtype=dtype)
             data.rename(columns={"Good/Bad": TARGET_COLUMN}, inplace=True)
 
 
@@ -66,16 +94,23 @@ class DataTransformation:
         try:
             
 
+            config = self.data_transformation_config
+
             # define the steps for the preprocessor pipeline
+            pruner_step = ('pruner', SensorPruner(
+                max_missing_ratio=config.prune_max_missing_ratio,
+                variance_threshold=config.prune_variance_threshold,
+                drop_duplicates=config.prune_duplicates,
+            ))
             imputer_step = ('imputer', SimpleImputer(strategy='constant', fill_value=0))
             scaler_step = ('scaler', RobustScaler())
 
-            preprocessor = Pipeline(
-                steps=[
-                imputer_step,
-                scaler_step
-                ]
-            )
+            steps = [imputer_step, scaler_step]
+            if config.prune_sensors:
+                # drop dead and duplicate sensors before anything else touches them
+                steps.insert(0, pruner_step)
+
+            preprocessor = Pipeline(steps=steps)
             
             return preprocessor
 
@@ -83,6 +118,152 @@ class DataTransformation:
             raise CustomException(e, sys)
         
 
+
+    def iter_split_chunks(self):
+        """
+        Stream the feature store as (X, y, test_mask) chunks. Rows are assigned
+        to the test split with probability test_size from a seeded generator,
+        so every pass over the store yields the same split.
+        """
+        config = self.data_transformation_config
+        rng = np.random.default_rng(config.random_state)
+
+        for chunk in FeatureStore.iter_chunks(self.feature_store_file_path, chunksize=config.chunksize):
+            chunk = chunk.rename(columns={"Good/Bad": TARGET_COLUMN})
+            X = chunk.drop(columns=TARGET_COLUMN).astype(config.numeric_dtype)
+            y = np.where(chunk[TARGET_COLUMN] == -1, 0, 1)
+            test_mask = rng.random(len(chunk)) < config.test_size
+            yield X, y, test_mask
+
+    def fit_transform_in_chunks(self, preprocessor: Pipeline) -> Pipeline:
+        """
+            Method Name :   fit_transform_in_chunks
+            Description :   This method fits the preprocessor on a feature store larger than memory.
+                            A first pass streams the training rows through the pruner statistics and a
+                            mergeable quantile sketch, from which the RobustScaler medians and IQRs are
+                            taken; a second pass transforms the train/test splits chunk by chunk into
+                            memory-mapped .npy files.
+
+            Output      :   the fitted preprocessor, saved to the configured path
+            On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.data_transformation_config
+            steps = preprocessor.named_steps
+            pruner = steps.get('pruner')
+
+            sketch = None
+            columns = None
+            n_train, n_test = 0, 0
+            for X, y, test_mask in self.iter_split_chunks():
+                X_train = X[~test_mask]
+                if pruner is not None:
+                    pruner.partial_fit(X_train)
+                if sketch is None:
+                    columns = X.columns
+                    sketch = QuantileSketch(X.shape[1], k=config.sketch_size, seed=config.random_state)
+                # the scaler is fitted on imputed values, the imputer fills missing values with 0
+                sketch.update(np.nan_to_num(X_train.to_numpy(dtype=np.float64), nan=0.0))
+                n_train += len(X_train)
+                n_test += int(test_mask.sum())
+
+            kept_columns = list(columns)
+            if pruner is not None:
+                kept_columns = [columns[index] for index in pruner.kept_indices_]
+                logging.info(f"SensorPruner kept {len(kept_columns)} of {len(columns)} columns")
+
+            # fit the imputer and scaler on a placeholder of the right shape, then
+            # replace the scaler statistics with the streamed ones
+            placeholder = pd.DataFrame(np.zeros((2, len(kept_columns))), columns=kept_columns).astype(config.numeric_dtype)
+            steps['imputer'].fit(placeholder)
+            scaler = steps['scaler']
+            scaler.fit(placeholder.to_numpy())
+
+            kept_indices = [columns.get_loc(column) for column in kept_columns]
+            q_min, q_max = scaler.quantile_range
+            lower, median, upper = sketch.quantiles([q_min, 50, q_max])[:, kept_indices]
+            scale = upper - lower
+            scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+            scaler.center_ = median
+            scaler.scale_ = scale
+
+            logging.info(f"Fitted preprocessor on {n_train} rows in chunks, transforming {n_train} train / {n_test} test rows")
+
+            # the splits are filled as temp files and swapped into place at the end
+            os.makedirs(config.artifact_dir, exist_ok=True)
+            split_paths = {
+                False: (config.transformed_train_features_file_path, config.transformed_train_target_file_path),
+                True: (config.transformed_test_features_file_path, config.transformed_test_target_file_path),
+            }
+            split_sizes = {False: n_train, True: n_test}
+            outputs = {
+                is_test: (
+                    np.lib.format.open_memmap(features_path + ".tmp", mode='w+',
+                                              dtype=config.numeric_dtype, shape=(split_sizes[is_test], len(kept_columns))),
+                    np.lib.format.open_memmap(target_path + ".tmp", mode='w+',
+                                              dtype=np.int64, shape=(split_sizes[is_test],)),
+                )
+                for is_test, (features_path, target_path) in split_paths.items()
+            }
+            offsets = {False: 0, True: 0}
+            for X, y, test_mask in self.iter_split_chunks():
+                transformed = preprocessor.transform(X).astype(config.numeric_dtype, copy=False)
+                for is_test in (False, True):
+                    rows = test_mask == is_test
+                    start, end = offsets[is_test], offsets[is_test] + int(rows.sum())
+                    features, target = outputs[is_test]
+                    features[start:end] = transformed[rows]
+                    target[start:end] = y[rows]
+                    offsets[is_test] = end
+
+            for features, target in outputs.values():
+                features.flush()
+                target.flush()
+            del outputs, features, target
+            for paths in split_paths.values():
+                for path in paths:
+                    os.replace(path + ".tmp", path)
+
+            preprocessor_path = config.transformed_object_file_path
+            os.makedirs(os.path.dirname(preprocessor_path), exist_ok=True)
+            self.utils.save_object(file_path=preprocessor_path, obj=preprocessor)
+
+            return preprocessor
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def export_fused_preprocessor(self) -> str:
+        """
+            Method Name :   export_fused_preprocessor
+            Description :   This method compiles the saved preprocessor into a FusedPreprocessor for
+                            inference and saves it next to preprocessor.pkl. Preprocessors with steps
+                            that cannot be fused are skipped, prediction then uses the sklearn pipeline.
+
+            Output      :   path of the fused preprocessor, or None if it could not be compiled
+            On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.data_transformation_config
+            preprocessor_path = config.transformed_object_file_path
+
+            try:
+                fused_preprocessor = FusedPreprocessor.from_pipeline(
+                    self.utils.load_object(preprocessor_path),
+                    dtype=config.numeric_dtype,
+                    source_hash=self.content_store.hash_file(preprocessor_path),
+                )
+            except ValueError as e:
+                logging.warning(f"Preprocessor cannot be fused, inference will use the sklearn pipeline: {str(e)}")
+                if os.path.exists(config.fused_object_file_path):
+                    os.remove(config.fused_object_file_path)
+                return None
+
+            self.utils.save_object(file_path=config.fused_object_file_path, obj=fused_preprocessor)
+            return config.fused_object_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
              
     def initiate_data_transformation(self) :
         """
@@ -101,7 +282,45 @@ class DataTransformation:
         )
 
         try:
-            dataframe = self.get_data(feature_store_file_path=self.feature_store_file_path)
+            config = self.data_transformation_config
+            preprocessor = self.get_data_transformer_object()
+
+            # Outputs are keyed by the feature store content and the split/preprocessor
+            # settings, so an unchanged feature store skips the whole stage
+            input_hash = self.content_store.hash_values(
+                self.content_store.hash_path(self.feature_store_file_path),
+                config.test_size,
+                config.random_state,
+                config.numeric_dtype,
+                config.fit_mode,
+                repr(preprocessor),
+            )
+            data_transformation_artifact = DataTransformationArtifact(
+                train_features_file_path=config.transformed_train_features_file_path,
+                train_target_file_path=config.transformed_train_target_file_path,
+                test_features_file_path=config.transformed_test_features_file_path,
+                test_target_file_path=config.transformed_test_target_file_path,
+                preprocessor_file_path=config.transformed_object_file_path,
+            )
+            outputs = {
+                "train_features": config.transformed_train_features_file_path,
+                "train_target": config.transformed_train_target_file_path,
+                "test_features": config.transformed_test_features_file_path,
+                "test_target": config.transformed_test_target_file_path,
+                "preprocessor": config.transformed_object_file_path,
+            }
+            if self.content_store.restore("data_transformation", input_hash, outputs):
+                logging.info("Feature store unchanged, reusing transformed data")
+                self.export_fused_preprocessor()
+                return data_transformation_artifact
+
+            if config.fit_mode == "chunked":
+                self.fit_transform_in_chunks(preprocessor)
+                self.content_store.record("data_transformation", input_hash, outputs)
+                self.export_fused_preprocessor()
+                return data_transformation_artifact
+
+            dataframe = self.get_data(feature_store_file_path=self.feature_store_file_path, dtype=config.numeric_dtype)
            
             
             
@@ -109,14 +328,23 @@ class DataTransformation:
             y = np.where(dataframe[TARGET_COLUMN]==-1,0, 1)  #replacing the -1 with 0 for model training
             
             
-            X_train, X_test, y_train, y_test = train_test_split(X,y, test_size = 0.2 )
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=config.test_size, random_state=config.random_state
+            )
 
 
 
-            preprocessor = self.get_data_transformer_object()
+            # reuse a previously fitted preprocessor when the training split is unchanged
+            cache_key = self.preprocessor_cache.fingerprint(X_train, preprocessor)
+            cached_preprocessor = self.preprocessor_cache.get(cache_key)
+            if cached_preprocessor is not None:
+                preprocessor = cached_preprocessor
+                X_train_scaled = preprocessor.transform(X_train).astype(config.numeric_dtype, copy=False)
+            else:
+                X_train_scaled = preprocessor.fit_transform(X_train).astype(config.numeric_dtype, copy=False)
+                self.preprocessor_cache.put(cache_key, preprocessor)
 
-            X_train_scaled =  preprocessor.fit_transform(X_train)
-            X_test_scaled  =  preprocessor.transform(X_test)
+            X_test_scaled  =  preprocessor.transform(X_test).astype(config.numeric_dtype, copy=False)
 
             
 
@@ -126,10 +354,16 @@ class DataTransformation:
             self.utils.save_object( file_path= preprocessor_path,
                         obj= preprocessor)
 
-            train_arr = np.c_[X_train_scaled, np.array(y_train) ]
-            test_arr = np.c_[ X_test_scaled, np.array(y_test) ]
+            # features and target are saved separately, so the trainer can
+            # memory-map them without concatenating and slicing them apart again
+            self.utils.save_numpy_array(config.transformed_train_features_file_path, X_train_scaled)
+            self.utils.save_numpy_array(config.transformed_train_target_file_path, y_train)
+            self.utils.save_numpy_array(config.transformed_test_features_file_path, X_test_scaled)
+            self.utils.save_numpy_array(config.transformed_test_target_file_path, y_test)
+            self.content_store.record("data_transformation", input_hash, outputs)
+            self.export_fused_preprocessor()
 
-            return (train_arr, test_arr, preprocessor_path)
+            return data_transformation_artifact
         
 
         except Exception as e:
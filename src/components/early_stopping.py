@@ -0,0 +1,67 @@
+import numpy as np
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+
+class EarlyStoppingXGBClassifier(XGBClassifier):
+    """
+    XGBClassifier that holds out validation_fraction of whatever it is fitted
+    on (the training split, or the training part of a CV fold) as its
+    early-stopping eval_set, so it also stops early inside GridSearchCV.
+
+    After fitting, the booster is cut back to the best round, and the number
+    of rounds kept is recorded as n_rounds_, so the saved model is only as
+    large as the rounds it actually uses.
+    """
+
+    def __init__(self, *, validation_fraction=0.1, objective="binary:logistic", **kwargs):
+        self.validation_fraction = validation_fraction
+        super().__init__(objective=objective, **kwargs)
+
+    def get_xgb_params(self):
+        # keep validation_fraction out of the native booster parameters
+        params = super().get_xgb_params()
+        params.pop("validation_fraction", None)
+        return params
+
+    def fit(self, X, y, **kwargs):
+        if "eval_set" in kwargs or not self.early_stopping_rounds:
+            super().fit(X, y, **kwargs)
+            self.n_rounds_ = self.get_booster().num_boosted_rounds()
+            return self
+
+        if not self.validation_fraction:
+            # nothing to hold out: train every round instead of failing for lack of an eval_set
+            early_stopping_rounds, self.early_stopping_rounds = self.early_stopping_rounds, None
+            try:
+                super().fit(X, y, **kwargs)
+            finally:
+                self.early_stopping_rounds = early_stopping_rounds
+            self.n_rounds_ = self.get_booster().num_boosted_rounds()
+            return self
+
+        _, class_counts = np.unique(y, return_counts=True)
+        X_fit, X_valid, y_fit, y_valid = train_test_split(
+            X, y,
+            test_size=self.validation_fraction,
+            stratify=y if class_counts.min() >= 2 else None,
+            random_state=self.random_state if isinstance(self.random_state, int) else 0,
+        )
+        kwargs.setdefault("verbose", False)
+        super().fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], **kwargs)
+
+        self.n_rounds_ = self.best_iteration + 1
+        self._Booster = self.get_booster()[:self.n_rounds_]
+        return self
+
+
+def get_boosting_rounds(model):
+    """
+    Return the number of boosting rounds a fitted model kept, or None for other models
+    """
+    if hasattr(model, "n_rounds_"):
+        return int(model.n_rounds_)
+    if hasattr(model, "n_estimators_"):
+        # GradientBoostingClassifier stops at n_estimators_ when n_iter_no_change is set
+        return int(model.n_estimators_)
+    return None
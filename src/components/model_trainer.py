@@ -1,18 +1,31 @@
 import sys
 from typing import Generator, List, Tuple
 import os
+import json
+import math
+import time
+import copy
+import multiprocessing
 import pandas as pd
 import numpy as np
+from threadpoolctl import threadpool_limits
 from sklearn.metrics import accuracy_score
 
-from xgboost import XGBClassifier
 from sklearn.svm import SVC
+from xgboost import XGBClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import GridSearchCV, ParameterGrid, ParameterSampler, train_test_split
+from sklearn.base import clone
 from src.constant import *
 from src.exception import CustomException
 from src.logger import logging
 from src.utils.main_utils import MainUtils
+from src.utils.trial_store import TrialStore
+from src.entity.artifact_entity import DataTransformationArtifact
+from src.components.data_transformation import DataTransformation, DataTransformationConfig
+from src.components.early_stopping import EarlyStoppingXGBClassifier, get_boosting_rounds
+from src.components.tree_ensemble import FlatTreeEnsemble
+from src.utils.content_store import ContentStore
 
 from dataclasses import dataclass
 
@@ -21,7 +34,67 @@ class ModelTrainerConfig:
     artifact_folder= os.path.join(artifact_folder)
     trained_model_path= os.path.join(artifact_folder,"model.pkl" )
     expected_accuracy=0.45
+    dtype_parity_tolerance=0.01
+    dtype_parity_check=NUMERIC_DTYPE_PARITY_CHECK
+    dtype_parity_model='RandomForestClassifier'
+    dtype_parity_report_file_path=os.path.join(artifact_folder, 'dtype_parity.json')
     model_config_file_path= os.path.join('config','model.yaml')
+    evaluation_mode=MODEL_EVALUATION_MODE
+    evaluation_workers=MODEL_EVALUATION_WORKERS
+    evaluation_threads=MODEL_EVALUATION_THREADS
+    evaluation_deadline_seconds=MODEL_EVALUATION_DEADLINE_SECONDS
+    evaluation_dir=os.path.join(artifact_folder, 'model_evaluation')
+    evaluation_report_file_path=os.path.join(evaluation_dir, 'report.json')
+    trial_cache_dir=os.path.join(artifact_folder, 'trial_cache')
+    trial_cache_max_bytes=64 * 1024 * 1024
+    trial_cache_max_age_days=30
+    early_stopping_rounds=10
+    early_stopping_validation_fraction=0.1
+    training_mode=TRAINING_MODE
+    full_retrain_every=TRAINING_FULL_RETRAIN_EVERY
+    update_boosting_rounds=50
+    update_trees=20
+    update_holdout_fraction=0.2
+    update_tolerance=0.0
+    update_state_file_path=os.path.join(artifact_folder, 'model_update_state.json')
+    tree_ensemble_file_path=os.path.join(artifact_folder, 'tree_ensemble.pkl')
+
+
+def evaluate_candidate(model_name, model, data, n_threads=None) -> dict:
+    """
+    Fit one candidate and score it on the evaluation split.
+
+    data is (X_train, y_train, X_test, y_test), either arrays or .npy paths
+    that are opened as read-only memory maps, so parallel workers share the
+    same pages. n_threads caps the candidate's own and its BLAS threads.
+    """
+    result = {"model": model_name, "status": "ok", "threads": n_threads}
+    try:
+        X_train, y_train, X_test, y_test = [
+            np.load(item, mmap_mode='r') if isinstance(item, str) else item for item in data
+        ]
+
+        if n_threads is not None:
+            params = model.get_params()
+            model.set_params(**{key: n_threads for key in ("n_jobs", "nthread") if key in params})
+
+        with threadpool_limits(limits=n_threads):
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            result["fit_seconds"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            y_test_pred = model.predict(X_test)
+            result["predict_seconds"] = time.perf_counter() - start
+
+        result["score"] = accuracy_score(y_test, y_test_pred)
+        result["boosting_rounds"] = get_boosting_rounds(model)
+
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+
+    return result
 
 
 
@@ -34,9 +107,24 @@ class ModelTrainer:
 
         self.utils = MainUtils()
 
+        self.trial_store = TrialStore(
+            root=self.model_trainer_config.trial_cache_dir,
+            max_bytes=self.model_trainer_config.trial_cache_max_bytes,
+            max_age_days=self.model_trainer_config.trial_cache_max_age_days,
+        )
+
+        # boosted models stop once early_stopping_rounds rounds bring no improvement
+        # on a held-out early_stopping_validation_fraction of their training data
+        early_stopping_rounds = self.model_trainer_config.early_stopping_rounds or None
+        validation_fraction = self.model_trainer_config.early_stopping_validation_fraction
+
         self.models = {
-                        'XGBClassifier': XGBClassifier(),
-                        'GradientBoostingClassifier' : GradientBoostingClassifier(),
+                        'XGBClassifier': EarlyStoppingXGBClassifier(
+                            early_stopping_rounds=early_stopping_rounds, validation_fraction=validation_fraction
+                        ),
+                        'GradientBoostingClassifier' : GradientBoostingClassifier(
+                            n_iter_no_change=early_stopping_rounds, validation_fraction=validation_fraction
+                        ),
                         'SVC' : SVC(),
                         'RandomForestClassifier': RandomForestClassifier()
                         }
@@ -44,32 +132,85 @@ class ModelTrainer:
     
     def evaluate_models(self, X, y, models):
         try:
+            config = self.model_trainer_config
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=0.2, random_state=42
             )
 
-            report = {}
-
-            for i in range(len(list(models))):
-                model = list(models.values())[i]
-
-                model.fit(X_train, y_train)  # Train model
+            if config.evaluation_mode == "parallel" and len(models) > 1:
+                results = self.evaluate_models_in_parallel(X_train, y_train, X_test, y_test, models)
+            else:
+                results = [
+                    evaluate_candidate(model_name, model, (X_train, y_train, X_test, y_test))
+                    for model_name, model in models.items()
+                ]
 
-                y_train_pred = model.predict(X_train)
+            self.evaluation_report = results
+            os.makedirs(os.path.dirname(config.evaluation_report_file_path), exist_ok=True)
+            with open(config.evaluation_report_file_path, "w") as report_file:
+                json.dump(results, report_file, indent=2)
 
-                y_test_pred = model.predict(X_test)
+            for result in results:
+                logging.info(f"Candidate evaluation: {result}")
 
-                train_model_score = accuracy_score(y_train, y_train_pred)
-
-                test_model_score = accuracy_score(y_test, y_test_pred)
-
-                report[list(models.keys())[i]] = test_model_score
+            report = {result["model"]: result["score"] for result in results if result["status"] == "ok"}
+            if not report:
+                raise Exception(f"No candidate model finished evaluation: {results}")
 
             return report
 
         except Exception as e:
             raise CustomException(e, sys)
 
+    def evaluate_models_in_parallel(self, X_train, y_train, X_test, y_test, models) -> list:
+        """
+        Fit the candidates concurrently in a process pool. The evaluation split is
+        written once as .npy files that every worker memory-maps, each candidate
+        gets an equal share of the CPUs, and candidates still running at the
+        deadline are terminated and reported as timed out.
+        """
+        config = self.model_trainer_config
+        n_workers = min(config.evaluation_workers, len(models))
+        n_threads = config.evaluation_threads or max(1, (os.cpu_count() or 1) // n_workers)
+
+        os.makedirs(config.evaluation_dir, exist_ok=True)
+        data_paths = []
+        for name, array in zip(("X_train", "y_train", "X_test", "y_test"), (X_train, y_train, X_test, y_test)):
+            data_path = os.path.join(config.evaluation_dir, f"{name}.npy")
+            np.save(data_path, array)
+            data_paths.append(data_path)
+
+        deadline = None
+        if config.evaluation_deadline_seconds > 0:
+            deadline = time.monotonic() + config.evaluation_deadline_seconds
+
+        logging.info(f"Evaluating {len(models)} candidates on {n_workers} processes with {n_threads} threads each")
+
+        pool = multiprocessing.Pool(processes=n_workers)
+        try:
+            pending = {
+                model_name: pool.apply_async(evaluate_candidate, (model_name, model, data_paths, n_threads))
+                for model_name, model in models.items()
+            }
+
+            results = []
+            for model_name, async_result in pending.items():
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    results.append(async_result.get(timeout))
+                except multiprocessing.TimeoutError:
+                    logging.warning(f"{model_name} did not finish before the evaluation deadline")
+                    results.append({"model": model_name, "status": "timed_out", "threads": n_threads})
+
+            return results
+
+        finally:
+            # stops stragglers still running past the deadline
+            pool.terminate()
+            pool.join()
+            for data_path in data_paths:
+                os.remove(data_path)
+
 
     def get_best_model(self,
                     x_train:np.array, 
@@ -107,31 +248,295 @@ class ModelTrainer:
         except Exception as e:
             raise CustomException(e,sys)
         
+    default_search_config = {
+        "strategy": "grid",
+        "cv": 5,
+        "n_iter": 20,
+        "resource": "n_samples",
+        "factor": 3,
+        "max_fits": 0,
+        "time_budget_seconds": 0,
+        "random_state": 42,
+        "trial_cache": True,
+        "fit_overhead": {"n_samples": 1000, "n_estimators": 10},
+    }
+
+    def get_search_config(self, model_config: dict) -> dict:
+        search_config = dict(self.default_search_config)
+        search_config.update(model_config["model_selection"].get("search") or {})
+        search_config["fit_overhead"] = {**self.default_search_config["fit_overhead"], **search_config["fit_overhead"]}
+        if search_config["time_budget_seconds"] and search_config["strategy"] != "budget":
+            raise ValueError(
+                f"time_budget_seconds only applies to the budget strategy, not {search_config['strategy']}"
+            )
+        return search_config
+
+    @staticmethod
+    def get_halving_rounds(n_candidates: int, factor: int) -> int:
+        return math.ceil(math.log(n_candidates, factor)) + 1 if n_candidates > 1 else 1
+
+    @staticmethod
+    def count_halving_evaluations(n_candidates: int, factor: int) -> int:
+        """
+        Candidate evaluations successive halving makes over all its rounds
+        """
+        n_evaluations = 0
+        for _ in range(ModelTrainer.get_halving_rounds(n_candidates, factor)):
+            n_evaluations += n_candidates
+            n_candidates = max(1, math.ceil(n_candidates / factor))
+        return n_evaluations
+
+    @staticmethod
+    def parse_param_grid(param_grid: dict) -> dict:
+        """
+        YAML reads a bare None as the string "None", turn those back into None
+        """
+        return {
+            name: [None if value == "None" else value for value in values]
+            for name, values in param_grid.items()
+        }
+
+    @staticmethod
+    def get_candidates(param_grid, search_config) -> list:
+        """
+        List the parameter combinations the configured strategy starts from
+        """
+        strategy = search_config["strategy"]
+        n_iter = search_config["n_iter"]
+        random_state = search_config["random_state"]
+        n_combinations = len(ParameterGrid(param_grid))
+
+        if search_config["max_fits"]:
+            max_candidates = max(1, search_config["max_fits"] // search_config["cv"])
+            if strategy in ("halving", "halving_random"):
+                # every round refits its survivors, the cap counts the fits of all rounds
+                factor = search_config["factor"]
+                while (max_candidates > 1
+                       and ModelTrainer.count_halving_evaluations(max_candidates, factor) * search_config["cv"]
+                       > search_config["max_fits"]):
+                    max_candidates -= 1
+            if strategy in ("grid", "halving") and n_combinations > max_candidates:
+                strategy = "random" if strategy == "grid" else "halving_random"
+            n_iter = min(n_iter, max_candidates)
+
+        if strategy in ("grid", "halving"):
+            return list(ParameterGrid(param_grid))
+        if strategy in ("random", "halving_random"):
+            return list(ParameterSampler(param_grid, n_iter=min(n_iter, n_combinations), random_state=random_state))
+        if strategy == "budget":
+            # the whole grid in random order, evaluated until the budget runs out
+            return list(ParameterSampler(param_grid, n_iter=n_combinations, random_state=random_state))
+
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    def evaluate_candidates(self, estimator, model_name, candidates, X, y, search_config, dataset, resources="") -> list:
+        """
+        Cross-validate parameter combinations, reusing the trials stored by earlier
+        runs for the same data, estimator, parameters and CV scheme. The new ones
+        are fitted together in one parallel GridSearchCV and stored.
+        """
+        cv = search_config["cv"]
+        cv_scheme = f"StratifiedKFold(n_splits={cv}){resources}"
+        fixed_params = {
+            name: value for name, value in estimator.get_params().items()
+            if name not in candidates[0] and not hasattr(value, "get_params")
+        }
+        keys = [self.trial_store.trial_key(dataset, [model_name, fixed_params], params, cv_scheme) for params in candidates]
+
+        trials = [self.trial_store.get(key) if search_config["trial_cache"] else None for key in keys]
+        for trial in trials:
+            if trial is not None:
+                trial["cached"] = True
+
+        missing = [index for index, trial in enumerate(trials) if trial is None]
+        if missing:
+            search = GridSearchCV(
+                estimator,
+                param_grid=[{name: [value] for name, value in candidates[index].items()} for index in missing],
+                cv=cv, n_jobs=-1, refit=False, error_score=np.nan,
+            )
+            search.fit(X, y)
+            results = search.cv_results_
+
+            for position, index in enumerate(missing):
+                trial = {
+                    "model": model_name,
+                    "params": candidates[index],
+                    "cv": cv_scheme,
+                    "fold_scores": [float(results[f"split{fold}_test_score"][position]) for fold in range(cv)],
+                    "fit_seconds": float(results["mean_fit_time"][position] * cv),
+                }
+                if search_config["trial_cache"]:
+                    self.trial_store.put(keys[index], trial)
+                trials[index] = dict(trial, cached=False)
+
+        logging.info(
+            f"Evaluated {len(candidates)} {model_name} candidates{resources}: "
+            f"{len(candidates) - len(missing)} from the trial cache, {len(missing)} fitted"
+        )
+        return trials
+
+    @staticmethod
+    def mean_score(trial: dict) -> float:
+        scores = np.asarray(trial["fold_scores"], dtype=np.float64)
+        return -np.inf if np.isnan(scores).any() else float(scores.mean())
+
+    def successive_halving(self, estimator, model_name, candidates, X, y, search_config, dataset):
+        """
+        Evaluate all candidates on a small resource budget, keep the best 1/factor
+        and grow the budget by factor each round, ending with max resources. The
+        resource is either the training rows (stratified subsample) or n_estimators.
+        """
+        cv = search_config["cv"]
+        factor = search_config["factor"]
+        resource = search_config["resource"]
+        if resource == "n_estimators" and "n_estimators" not in estimator.get_params():
+            resource = "n_samples"
+        grid_candidates = candidates
+
+        if resource == "n_estimators":
+            max_resources = max(
+                [params["n_estimators"] for params in candidates if params.get("n_estimators")]
+                or [estimator.get_params()["n_estimators"] or 100]
+            )
+            unique_candidates = []
+            for params in candidates:
+                params = {name: value for name, value in params.items() if name != "n_estimators"}
+                if params not in unique_candidates:
+                    unique_candidates.append(params)
+            candidates = unique_candidates
+            min_resources = 1
+        else:
+            max_resources = len(X)
+            min_resources = 2 * cv * len(np.unique(y))
+
+        n_rounds = self.get_halving_rounds(len(candidates), factor)
+        while n_rounds > 1 and max_resources // factor ** (n_rounds - 1) < min_resources:
+            n_rounds -= 1
+
+        # Halving always runs more fits than evaluating its candidates once; it only
+        # pays off when the early rounds are much cheaper. Estimate both schedules as
+        # fits x (resources per fit + a fixed per-fit overhead) and run the plain grid
+        # when halving would not do less work, e.g. on small datasets.
+        overhead = search_config["fit_overhead"][resource]
+        halving_work = sum(
+            math.ceil(len(candidates) / factor ** round_index)
+            * (max_resources // factor ** (n_rounds - 1 - round_index) + overhead)
+            for round_index in range(n_rounds)
+        )
+        grid_work = sum(params.get(resource, max_resources) + overhead for params in grid_candidates)
+        if n_rounds == 1 or halving_work >= grid_work:
+            logging.info(
+                f"Successive halving over {len(grid_candidates)} {model_name} candidates would not save work "
+                f"({resource}={max_resources}), evaluating them once instead"
+            )
+            trials = self.evaluate_candidates(estimator, model_name, grid_candidates, X, y, search_config, dataset)
+            scores = [self.mean_score(trial) for trial in trials]
+            best_index = int(np.argmax(scores))
+            return grid_candidates[best_index], scores[best_index]
+
+        for round_index in range(n_rounds):
+            n_resources = max_resources // factor ** (n_rounds - 1 - round_index)
+
+            if resource == "n_estimators":
+                round_candidates = [dict(params, n_estimators=n_resources) for params in candidates]
+                X_round, y_round = X, y
+            else:
+                round_candidates = candidates
+                if n_resources < max_resources:
+                    rows, _ = train_test_split(
+                        np.arange(len(X)), train_size=n_resources, stratify=y,
+                        random_state=search_config["random_state"],
+                    )
+                    rows.sort()
+                    X_round, y_round = X[rows], y[rows]
+                else:
+                    X_round, y_round = X, y
+
+            trials = self.evaluate_candidates(
+                estimator, model_name, round_candidates, X_round, y_round, search_config, dataset,
+                resources=f"/{resource}={n_resources}",
+            )
+            scores = [self.mean_score(trial) for trial in trials]
+
+            if round_index < n_rounds - 1:
+                n_keep = max(1, math.ceil(len(candidates) / factor))
+                best_first = np.argsort(scores, kind="stable")[::-1][:n_keep]
+                candidates = [candidates[index] for index in sorted(best_first)]
+
+        best_index = int(np.argmax(scores))
+        return round_candidates[best_index], scores[best_index]
+
+    def budgeted_search(self, estimator, model_name, candidates, X, y, search_config, dataset):
+        """
+        Evaluate candidates one at a time until max_fits or time_budget_seconds
+        is used up; trials reused from the cache do not count against the budget
+        """
+        cv = search_config["cv"]
+        max_fits = search_config["max_fits"]
+        time_budget_seconds = search_config["time_budget_seconds"]
+
+        start = time.monotonic()
+        n_fits = 0
+        best_params, best_score = None, -np.inf
+        for params in candidates:
+            if max_fits and n_fits + cv > max_fits:
+                break
+            if time_budget_seconds and time.monotonic() - start >= time_budget_seconds:
+                break
+
+            trial = self.evaluate_candidates(estimator, model_name, [params], X, y, search_config, dataset)[0]
+            if not trial["cached"]:
+                n_fits += cv
+            if self.mean_score(trial) > best_score:
+                best_params, best_score = params, self.mean_score(trial)
+
+        if best_params is None:
+            raise Exception("Search budget too small to evaluate a single parameter combination")
+
+        logging.info(f"Budgeted search ran {n_fits} fits in {time.monotonic() - start:.1f}s")
+        return best_params, best_score
+
     def finetune_best_model(self,
                             best_model_object:object,
                             best_model_name,
                             X_train,
                             y_train,
                             ) -> object:
-        
+        """
+        Search the model's search_param_grid with the strategy configured in
+        model.yaml and return the winning estimator, fitted once on X_train
+        """
         try:
 
-            model_param_grid = self.utils.read_yaml_file(self.model_trainer_config.model_config_file_path)["model_selection"]["model"][best_model_name]["search_param_grid"]
+            model_config = self.utils.read_yaml_file(self.model_trainer_config.model_config_file_path)
+            search_config = self.get_search_config(model_config)
+            model_param_grid = self.parse_param_grid(
+                model_config["model_selection"]["model"][best_model_name]["search_param_grid"]
+            )
 
+            strategy = search_config["strategy"]
+            logging.info(f"Tuning {best_model_name} with the {strategy} search strategy")
 
-            grid_search = GridSearchCV(
-                best_model_object, param_grid=model_param_grid, cv=5, n_jobs=-1, verbose=1 )
-            
-            grid_search.fit(X_train, y_train)
+            dataset = self.trial_store.fingerprint(X_train, y_train)
+            candidates = self.get_candidates(model_param_grid, search_config)
+            search_args = (best_model_object, best_model_name, candidates, X_train, y_train, search_config, dataset)
 
-            best_params = grid_search.best_params_
+            if strategy in ("halving", "halving_random"):
+                best_params, best_score = self.successive_halving(*search_args)
+            elif strategy == "budget":
+                best_params, best_score = self.budgeted_search(*search_args)
+            else:
+                trials = self.evaluate_candidates(*search_args)
+                scores = [self.mean_score(trial) for trial in trials]
+                best_params, best_score = candidates[int(np.argmax(scores))], max(scores)
 
-            print("best params are:", best_params)
+            if search_config["trial_cache"]:
+                self.trial_store.evict()
 
-            finetuned_model = best_model_object.set_params(**best_params)
-            
+            logging.info(f"Best {best_model_name} params {best_params} with cv score {best_score:.4f}")
 
-            return finetuned_model
+            return clone(best_model_object).set_params(**best_params).fit(X_train, y_train)
         
         except Exception as e:
             raise CustomException(e,sys)
@@ -140,17 +545,252 @@ class ModelTrainer:
 
 
 
-    def initiate_model_trainer(self, train_array, test_array):
+    def check_numeric_dtype_parity(self, feature_store_file_path, model_name, tolerance=None) -> dict:
+        """
+        Compare the float32 pipeline against float64 end to end: read the feature
+        store in each dtype, apply the same split, fit a fresh preprocessor and a
+        fresh copy of the candidate model, and compare test accuracy.
+
+        Run this before switching NUMERIC_DTYPE to float32.
+        """
         try:
-            logging.info(f"Splitting training and testing input and target feature")
+            tolerance = self.model_trainer_config.dtype_parity_tolerance if tolerance is None else tolerance
+            data_transformation = DataTransformation(feature_store_file_path)
+            config = data_transformation.data_transformation_config
 
-            x_train, y_train, x_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1],
+            report = {}
+            predictions = {}
+            for dtype in ("float64", "float32"):
+                dataframe = data_transformation.get_data(feature_store_file_path, dtype=dtype)
+                X = dataframe.drop(columns=TARGET_COLUMN)
+                y = np.where(dataframe[TARGET_COLUMN] == -1, 0, 1)
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=config.test_size, random_state=config.random_state
+                )
+
+                preprocessor = data_transformation.get_data_transformer_object()
+                X_train = preprocessor.fit_transform(X_train).astype(dtype, copy=False)
+                X_test = preprocessor.transform(X_test).astype(dtype, copy=False)
+
+                model = clone(self.models[model_name])
+                if "random_state" in model.get_params():
+                    # the same seed for both fits, so only the dtype differs
+                    model.set_params(random_state=config.random_state)
+                model.fit(X_train, y_train)
+                predictions[dtype] = model.predict(X_test)
+                report[f"{dtype}_accuracy"] = float(accuracy_score(y_test, predictions[dtype]))
+
+            report["prediction_agreement"] = float(np.mean(predictions["float64"] == predictions["float32"]))
+            report["passed"] = bool(abs(report["float64_accuracy"] - report["float32_accuracy"]) <= tolerance)
+
+            logging.info(f"float32/float64 parity for {model_name}: {report}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_numeric_dtype_parity_report(self, feature_store_file_path, model_name=None, tolerance=None) -> str:
+        """
+        Run check_numeric_dtype_parity and write its report to dtype_parity_report_file_path
+        """
+        try:
+            config = self.model_trainer_config
+            model_name = model_name or config.dtype_parity_model
+            report = self.check_numeric_dtype_parity(feature_store_file_path, model_name, tolerance=tolerance)
+            report.update(model_name=model_name, tolerance=config.dtype_parity_tolerance if tolerance is None else tolerance)
+
+            os.makedirs(os.path.dirname(config.dtype_parity_report_file_path), exist_ok=True)
+            tmp_file_path = config.dtype_parity_report_file_path + ".tmp"
+            with open(tmp_file_path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            os.replace(tmp_file_path, config.dtype_parity_report_file_path)
+            return config.dtype_parity_report_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def load_transformed_data(data_transformation_artifact: DataTransformationArtifact):
+        """
+        Open the transformed splits as read-only memory maps, so they are never
+        copied into this process and joblib workers share the same pages
+        """
+        return (
+            np.load(data_transformation_artifact.train_features_file_path, mmap_mode='r'),
+            np.load(data_transformation_artifact.train_target_file_path, mmap_mode='r'),
+            np.load(data_transformation_artifact.test_features_file_path, mmap_mode='r'),
+            np.load(data_transformation_artifact.test_target_file_path, mmap_mode='r'),
+        )
+
+    def export_tree_ensemble(self, model, X_check) -> str:
+        """
+            Method Name :   export_tree_ensemble
+            Description :   This method flattens the saved tree ensemble into a FlatTreeEnsemble for
+                            inference and saves it next to model.pkl, after checking that it predicts
+                            exactly like the model on X_check. Models that cannot be flattened (or
+                            do not match) are skipped, prediction then uses the model itself.
+
+            Output      :   path of the flat ensemble, or None if it was not exported
+            On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.model_trainer_config
+
+            try:
+                tree_ensemble = FlatTreeEnsemble.from_model(
+                    model, source_hash=ContentStore.hash_file(config.trained_model_path)
+                )
+                if not np.array_equal(tree_ensemble.predict(X_check), model.predict(X_check)):
+                    raise ValueError("flat ensemble predictions differ from the model")
+            except ValueError as e:
+                logging.warning(f"Model cannot be flattened, inference will use its own predict: {str(e)}")
+                if os.path.exists(config.tree_ensemble_file_path):
+                    os.remove(config.tree_ensemble_file_path)
+                return None
+
+            self.utils.save_object(file_path=config.tree_ensemble_file_path, obj=tree_ensemble)
+            logging.info(f"Exported {tree_ensemble.n_trees} trees to {config.tree_ensemble_file_path}")
+            return config.tree_ensemble_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def read_update_state(self) -> dict:
+        """
+        Read how many incremental updates ran since the last full retrain and
+        which feature store partitions the production model has already seen
+        """
+        update_state_file_path = self.model_trainer_config.update_state_file_path
+        if not os.path.exists(update_state_file_path):
+            return {"updates_since_full_retrain": 0, "consumed_partitions": [], "history": []}
+
+        with open(update_state_file_path, "r") as state_file:
+            return json.load(state_file)
+
+    def write_update_state(self, state: dict) -> None:
+        """
+        Atomically replace the stored update state
+        """
+        update_state_file_path = self.model_trainer_config.update_state_file_path
+        os.makedirs(os.path.dirname(update_state_file_path), exist_ok=True)
+        tmp_file_path = update_state_file_path + ".tmp"
+        with open(tmp_file_path, "w") as state_file:
+            json.dump(state, state_file, indent=2)
+        os.replace(tmp_file_path, update_state_file_path)
+
+    def continue_training(self, model, X, y):
+        """
+        Return a copy of model trained further on X, y only, or None when the
+        model type cannot be updated in place (e.g. SVC).
+
+        XGBoost adds up to update_boosting_rounds rounds on top of the current
+        booster; random forests and gradient boosting grow update_trees more
+        trees with warm_start. The production model itself is never modified.
+        """
+        config = self.model_trainer_config
+
+        if isinstance(model, XGBClassifier):
+            updated = clone(model).set_params(n_estimators=config.update_boosting_rounds)
+            updated.fit(X, y, xgb_model=model.get_booster())
+            return updated
+
+        if isinstance(model, (RandomForestClassifier, GradientBoostingClassifier)):
+            updated = copy.deepcopy(model)
+            n_trees = len(updated.estimators_)
+            updated.set_params(warm_start=True, n_estimators=n_trees + config.update_trees)
+            updated.fit(X, y)
+            updated.set_params(warm_start=False)
+            return updated
+
+        return None
+
+    def load_update_batch(self, batch_file_paths: list, preprocessor):
+        """
+        Read the new feature store partitions and transform them with the
+        production preprocessor, so they match the features of model.pkl
+        """
+        numeric_dtype = DataTransformationConfig.numeric_dtype
+        dataframe = pd.concat(
+            [DataTransformation.get_data(file_path, dtype=numeric_dtype) for file_path in batch_file_paths],
+            ignore_index=True,
+        )
+        X = preprocessor.transform(dataframe.drop(columns=TARGET_COLUMN)).astype(numeric_dtype, copy=False)
+        y = np.where(dataframe[TARGET_COLUMN] == -1, 0, 1)
+        return X, y
+
+    def initiate_incremental_update(self, batch_file_paths: list) -> dict:
+        """
+        Continue the production model on the new batch only and replace
+        model.pkl if it does at least as well on a holdout.
+
+        The holdout is a stratified update_holdout_fraction of the new batch
+        plus the test split of the last full training, both scored by the
+        current and the updated model. The update is accepted when the updated
+        model's accuracy is no more than update_tolerance below the current
+        one. Returns a summary whose status is "replaced", "rejected" or
+        "full_retrain_required" (model type or batch cannot be updated).
+        """
+        try:
+            config = self.model_trainer_config
+            transformation_config = DataTransformationConfig()
+
+            model = self.utils.load_object(config.trained_model_path)
+            preprocessor = self.utils.load_object(transformation_config.transformed_object_file_path)
+            X, y = self.load_update_batch(batch_file_paths, preprocessor)
+            summary = {"model": type(model).__name__, "batch_rows": int(len(y)), "partitions": batch_file_paths}
+
+            model_classes = getattr(model, "classes_", None)
+            if model_classes is None or set(np.unique(y)) != set(model_classes):
+                logging.info(f"New batch does not contain every class of the model, a full retrain is required")
+                return {**summary, "status": "full_retrain_required"}
+
+            stratify = y if np.bincount(y).min() >= 2 else None
+            X_update, X_holdout, y_update, y_holdout = train_test_split(
+                X, y, test_size=config.update_holdout_fraction, random_state=42, stratify=stratify
+            )
+
+            # the last full training's test split guards against forgetting the older data
+            if os.path.exists(transformation_config.transformed_test_features_file_path):
+                X_test = np.load(transformation_config.transformed_test_features_file_path, mmap_mode='r')
+                y_test = np.load(transformation_config.transformed_test_target_file_path, mmap_mode='r')
+                if X_test.shape[1] == X_holdout.shape[1]:
+                    X_holdout = np.concatenate([X_holdout, X_test]).astype(X_holdout.dtype, copy=False)
+                    y_holdout = np.concatenate([y_holdout, y_test])
+
+            start = time.perf_counter()
+            updated_model = self.continue_training(model, X_update, y_update)
+            if updated_model is None:
+                logging.info(f"{summary['model']} cannot be updated incrementally, a full retrain is required")
+                return {**summary, "status": "full_retrain_required"}
+            summary["fit_seconds"] = round(time.perf_counter() - start, 3)
+
+            current_score = accuracy_score(y_holdout, model.predict(X_holdout))
+            updated_score = accuracy_score(y_holdout, updated_model.predict(X_holdout))
+            summary.update(
+                holdout_rows=int(len(y_holdout)),
+                current_score=current_score,
+                updated_score=updated_score,
+                boosting_rounds=get_boosting_rounds(updated_model),
             )
 
+            if updated_score + config.update_tolerance < current_score:
+                logging.info(f"Incremental update rejected: {summary}")
+                return {**summary, "status": "rejected"}
+
+            self.utils.save_object(file_path=config.trained_model_path, obj=updated_model)
+            self.export_tree_ensemble(updated_model, X_holdout)
+            logging.info(f"Incremental update accepted, model saved at {config.trained_model_path}: {summary}")
+            return {**summary, "status": "replaced"}
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_model_trainer(self, data_transformation_artifact: DataTransformationArtifact):
+        try:
+            logging.info(f"Loading training and testing input and target feature")
+
+            x_train, y_train, x_test, y_test = self.load_transformed_data(data_transformation_artifact)
+
             
 
             logging.info(f"Extracting model config file path")
@@ -184,12 +824,15 @@ class ModelTrainer:
                 y_train= y_train
             )
 
-            best_model.fit(x_train, y_train)
             y_pred = best_model.predict(x_test)
             best_model_score = accuracy_score(y_test, y_pred)
             
             print(f"best model name {best_model_name} and score: {best_model_score}")
 
+            boosting_rounds = get_boosting_rounds(best_model)
+            if boosting_rounds is not None:
+                logging.info(f"{best_model_name} kept {boosting_rounds} boosting rounds")
+
 
             if best_model_score < 0.5:
                 raise Exception("No best model found with an accuracy greater than the threshold 0.6")
@@ -209,6 +852,7 @@ class ModelTrainer:
                 file_path=self.model_trainer_config.trained_model_path,
                 obj=best_model
             )
+            self.export_tree_ensemble(best_model, x_test)
             
             return self.model_trainer_config.trained_model_path
 
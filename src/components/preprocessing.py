@@ -0,0 +1,345 @@
+import hashlib
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from src.logger import logging
+
+
+class SensorPruner(BaseEstimator, TransformerMixin):
+    """
+    Drops dead sensor columns ahead of the imputer: columns missing in more
+    than max_missing_ratio of the rows, columns whose variance is not above
+    variance_threshold (constant sensors), and exact duplicates of an earlier
+    column.
+
+    The kept columns are stored on the fitted object (kept_columns_), so the
+    prediction pipeline can hand only those columns of uploaded files to the
+    model.
+    transform accepts full-width input as well as input already reduced to
+    the kept columns.
+    """
+
+    def __init__(self, max_missing_ratio=0.7, variance_threshold=0.0, drop_duplicates=True):
+        self.max_missing_ratio = max_missing_ratio
+        self.variance_threshold = variance_threshold
+        self.drop_duplicates = drop_duplicates
+
+    def fit(self, X, y=None):
+        for attribute in ("n_rows_seen_", "feature_names_in_"):
+            if hasattr(self, attribute):
+                delattr(self, attribute)
+        self.partial_fit(X)
+
+        logging.info(
+            f"SensorPruner kept {len(self.kept_indices_)} of {self.n_features_in_} columns "
+            f"({self.n_low_information_} missing/constant, {self.n_duplicates_} duplicates)"
+        )
+        return self
+
+    def partial_fit(self, X, y=None):
+        """
+        Update the column statistics with another block of rows, so the pruner
+        can be fitted on a feature store streamed in chunks
+        """
+        values = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        if values.dtype.kind != "f":
+            values = values.astype(np.float64)
+
+        if not hasattr(self, "n_rows_seen_"):
+            if isinstance(X, pd.DataFrame):
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            n_features = values.shape[1]
+            self.n_features_in_ = n_features
+            self.n_rows_seen_ = 0
+            self.missing_counts_ = np.zeros(n_features, dtype=np.int64)
+            self.means_ = np.zeros(n_features)
+            self.m2_ = np.zeros(n_features)
+            self.minimums_ = np.full(n_features, np.inf)
+            self.maximums_ = np.full(n_features, -np.inf)
+            self.column_digests_ = [b""] * n_features
+
+        missing = np.isnan(values)
+        block_counts = len(values) - missing.sum(axis=0)
+
+        with warnings.catch_warnings():
+            # all-missing columns give nan statistics, they are ignored below
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            block_means = np.nanmean(values, axis=0, dtype=np.float64)
+            block_m2 = np.nansum((values - block_means) ** 2, axis=0, dtype=np.float64)
+            block_minimums = np.nanmin(values, axis=0)
+            block_maximums = np.nanmax(values, axis=0)
+
+        # merge the block into the running mean / sum of squares (Chan et al.)
+        observed = block_counts > 0
+        seen_counts = self.n_rows_seen_ - self.missing_counts_
+        total_counts = np.maximum(seen_counts + block_counts, 1)
+        delta = np.where(observed, block_means - self.means_, 0)
+        self.means_ = self.means_ + delta * block_counts / total_counts
+        self.m2_ = self.m2_ + np.where(observed, block_m2, 0) + delta ** 2 * seen_counts * block_counts / total_counts
+        self.minimums_ = np.where(observed, np.fmin(self.minimums_, block_minimums), self.minimums_)
+        self.maximums_ = np.where(observed, np.fmax(self.maximums_, block_maximums), self.maximums_)
+
+        self.missing_counts_ += missing.sum(axis=0)
+        self.n_rows_seen_ += len(values)
+
+        if self.drop_duplicates:
+            # chained digest of every column, equal only for identical columns
+            for index in range(self.n_features_in_):
+                self.column_digests_[index] = hashlib.sha1(
+                    self.column_digests_[index] + np.ascontiguousarray(values[:, index]).tobytes()
+                ).digest()
+
+        self._update_kept_columns()
+        return self
+
+    def _update_kept_columns(self):
+        missing_ratio = self.missing_counts_ / max(self.n_rows_seen_, 1)
+        observed_counts = self.n_rows_seen_ - self.missing_counts_
+        variances = self.m2_ / np.maximum(observed_counts, 1)
+
+        keep = (
+            (observed_counts > 0)
+            & (missing_ratio <= self.max_missing_ratio)
+            & (self.maximums_ > self.minimums_)
+            & (variances > self.variance_threshold)
+        )
+        self.n_low_information_ = int(self.n_features_in_ - keep.sum())
+
+        self.n_duplicates_ = 0
+        if self.drop_duplicates:
+            seen = set()
+            for index in np.flatnonzero(keep):
+                if self.column_digests_[index] in seen:
+                    keep[index] = False
+                    self.n_duplicates_ += 1
+                else:
+                    seen.add(self.column_digests_[index])
+
+        self.kept_indices_ = np.flatnonzero(keep)
+        self.kept_columns_ = (
+            self.feature_names_in_[self.kept_indices_].tolist() if hasattr(self, "feature_names_in_") else None
+        )
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame) and self.kept_columns_ is not None:
+            return X[self.kept_columns_]
+
+        values = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        if values.shape[1] == len(self.kept_indices_) and values.shape[1] != self.n_features_in_:
+            return values
+        return values[:, self.kept_indices_]
+
+    def get_feature_names_out(self, input_features=None):
+        if self.kept_columns_ is not None:
+            return np.asarray(self.kept_columns_, dtype=object)
+        return np.asarray([f"x{index}" for index in self.kept_indices_], dtype=object)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch for many columns at once (a KLL-style compactor
+    stack). Level i holds rows that each stand for 2**i input rows; when a
+    level grows past k rows it is sorted per column and every other row is
+    promoted to the next level. Memory stays at roughly k rows per level and
+    the rank error at about log2(n / k) / k.
+
+    While fewer than k rows have been seen, quantiles are exact and match
+    np.percentile.
+    """
+
+    def __init__(self, n_columns: int, k: int = 2048, seed: int = 0):
+        self.n_columns = n_columns
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = []
+        self.n_rows = 0
+
+    def _push(self, level: int, block: np.ndarray) -> None:
+        while block is not None and len(block):
+            if level == len(self.levels):
+                self.levels.append(np.empty((0, self.n_columns)))
+
+            buffer = np.concatenate([self.levels[level], block])
+            if len(buffer) < self.k:
+                self.levels[level] = buffer
+                return
+
+            buffer.sort(axis=0)
+            # an odd leftover row stays on this level, the rest is halved
+            n_paired = len(buffer) - len(buffer) % 2
+            self.levels[level] = buffer[n_paired:]
+            block = buffer[self.rng.integers(2):n_paired:2]
+            level += 1
+
+    def update(self, block: np.ndarray) -> None:
+        block = np.asarray(block, dtype=np.float64)
+        self.n_rows += len(block)
+        for start in range(0, len(block), self.k):
+            self._push(0, block[start:start + self.k])
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for level, block in enumerate(other.levels):
+            self._push(level, block.copy())
+        self.n_rows += other.n_rows
+        return self
+
+    def quantiles(self, percentiles) -> np.ndarray:
+        """
+        Return an array of shape (len(percentiles), n_columns)
+        """
+        percentiles = np.asarray(percentiles, dtype=np.float64)
+        if len(self.levels) <= 1:
+            values = self.levels[0] if self.levels else np.zeros((1, self.n_columns))
+            return np.percentile(values, percentiles, axis=0)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(block), 2.0 ** level) for level, block in enumerate(self.levels)])
+
+        order = np.argsort(values, axis=0)
+        sorted_values = np.take_along_axis(values, order, axis=0)
+        cumulative_weights = np.cumsum(weights[order], axis=0)
+        total_weight = cumulative_weights[-1]
+
+        result = np.empty((len(percentiles), self.n_columns))
+        for i, percentile in enumerate(percentiles):
+            rank = (cumulative_weights < percentile / 100.0 * total_weight).sum(axis=0)
+            rank = np.minimum(rank, len(values) - 1)
+            result[i] = sorted_values[rank, np.arange(self.n_columns)]
+        return result
+
+
+class FusedPreprocessor:
+    """
+    A fitted select -> impute -> scale pipeline compiled down to a column
+    index array and fill, center and scale vectors.
+
+    transform copies the selected columns into one buffer and then, tile by
+    tile, fills missing values and applies the subtract/divide in place, so
+    there is a single allocation and no per-step validation. The arithmetic
+    is the same as SimpleImputer + RobustScaler/StandardScaler in the same
+    dtype, so the output is bit-identical to the sklearn pipeline.
+    """
+
+    tile_size = 1 << 16  # values per tile, keeps each tile in cache
+
+    def __init__(self, n_features_in, indices=None, columns=None, fill=None, center=None, scale=None,
+                 dtype=np.float64, source_hash=None):
+        self.n_features_in = n_features_in
+        self.indices = indices
+        self.columns = columns
+        self.fill = fill
+        self.center = center
+        self.scale = scale
+        self.dtype = np.dtype(dtype)
+        self.source_hash = source_hash
+
+    @classmethod
+    def from_pipeline(cls, preprocessor, dtype=np.float64, source_hash=None) -> "FusedPreprocessor":
+        """
+        Compile a fitted preprocessor; raises ValueError for steps that cannot be fused
+        """
+        steps = [step for _, step in getattr(preprocessor, "steps", [("", preprocessor)])]
+        n_features_in = None
+        indices, columns = None, None
+        fill, center, scale = None, None, None
+
+        for step in steps:
+            if n_features_in is None:
+                n_features_in = step.n_features_in_
+                if hasattr(step, "feature_names_in_"):
+                    columns = list(step.feature_names_in_)
+            width = n_features_in if indices is None else len(indices)
+
+            if isinstance(step, SensorPruner) and fill is None and center is None and scale is None:
+                selected = np.asarray(step.kept_indices_) if indices is None else indices[step.kept_indices_]
+                indices = selected
+                columns = step.kept_columns_ if step.kept_columns_ is not None else None
+
+            elif isinstance(step, SimpleImputer) and fill is None and center is None and scale is None:
+                if step.add_indicator or not (isinstance(step.missing_values, float) and np.isnan(step.missing_values)):
+                    raise ValueError(f"cannot fuse {step!r}")
+                statistics = np.asarray(step.statistics_, dtype=np.float64)
+                if not getattr(step, "keep_empty_features", False):
+                    # sklearn drops the columns it has no statistic for (never observed)
+                    valid = ~np.isnan(statistics)
+                    statistics = statistics[valid]
+                    if not valid.all():
+                        indices = (np.arange(width) if indices is None else indices)[valid]
+                        columns = [column for column, is_valid in zip(columns, valid) if is_valid] if columns else None
+                fill = statistics
+
+            elif isinstance(step, RobustScaler) and center is None and scale is None:
+                center = step.center_ if step.with_centering else None
+                scale = step.scale_ if step.with_scaling else None
+
+            elif isinstance(step, StandardScaler) and center is None and scale is None:
+                # StandardScaler casts its statistics to the input dtype before applying them
+                center = step.mean_.astype(dtype) if step.with_mean else None
+                scale = step.scale_.astype(dtype) if step.with_std else None
+
+            else:
+                raise ValueError(f"cannot fuse {step!r}")
+
+        if fill is not None and np.all(fill == fill[0]):
+            fill = float(fill[0]) if len(fill) else 0.0
+
+        return cls(
+            n_features_in=n_features_in,
+            indices=indices,
+            columns=columns if indices is not None else None,
+            fill=fill,
+            center=center,
+            scale=scale,
+            dtype=dtype,
+            source_hash=source_hash,
+        )
+
+    def _select(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.columns is not None:
+                X = X[self.columns]
+            buffer = X.to_numpy(dtype=self.dtype)
+        else:
+            values = np.asarray(X)
+            if self.indices is not None and values.shape[1] == self.n_features_in:
+                buffer = values[:, self.indices].astype(self.dtype, copy=False)
+            else:
+                buffer = values.astype(self.dtype, copy=True)
+
+        if not buffer.flags.writeable or not buffer.flags.c_contiguous:
+            buffer = np.array(buffer, dtype=self.dtype, order="C")
+        return buffer
+
+    def transform(self, X) -> np.ndarray:
+        buffer = self._select(X)
+        n_rows = max(1, self.tile_size // max(buffer.shape[1], 1))
+
+        for start in range(0, len(buffer), n_rows):
+            tile = buffer[start:start + n_rows]
+            if isinstance(self.fill, float):
+                np.nan_to_num(tile, copy=False, nan=self.fill, posinf=np.inf, neginf=-np.inf)
+            elif self.fill is not None:
+                np.copyto(tile, self.fill, where=np.isnan(tile))
+            if self.center is not None:
+                np.subtract(tile, self.center, out=tile)
+            if self.scale is not None:
+                np.divide(tile, self.scale, out=tile)
+
+        return buffer
+
+
+def get_input_columns(preprocessor):
+    """
+    Return the columns a fitted preprocessor actually uses, or None if it uses all of them
+    """
+    if isinstance(preprocessor, FusedPreprocessor):
+        return preprocessor.columns
+    for _, step in getattr(preprocessor, "steps", []):
+        if isinstance(step, SensorPruner):
+            return step.kept_columns_
+    return None
@@ -0,0 +1,305 @@
+import json
+
+import numpy as np
+from xgboost import XGBClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+
+class FlatTreeEnsemble:
+    """
+    A fitted tree ensemble (random forest, gradient boosting or XGBoost)
+    flattened into contiguous node arrays shared by all trees:
+
+        feature, threshold, left, right, default_left   one entry per node
+        value                                           leaf output per node
+        roots                                           first node of each tree
+        tree_output                                     class column each tree adds to
+
+    Leaves point to themselves, so predict walks every tree of a tile of rows
+    one level per step with a few gathers and no per-tree dispatch, then adds
+    the leaf values tree by tree in the estimator's own order and precision.
+    Splits, missing-value routing, accumulation and the final decision follow
+    the native predict of each kind, so predictions are identical.
+    """
+
+    tile_size = 1 << 16  # rows x trees walked at once, keeps the node ids in cache
+
+    def __init__(self, kind, classes, feature, threshold, left, right, default_left, value, roots,
+                 tree_output, max_depth, n_features_in, learning_rate=1.0, init_raw=None,
+                 source_hash=None):
+        self.kind = kind
+        self.classes_ = classes
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.tree_output = tree_output
+        self.max_depth = max_depth
+        self.n_features_in = n_features_in
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self.source_hash = source_hash
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_model(cls, model, source_hash=None) -> "FlatTreeEnsemble":
+        """
+        Flatten a fitted ensemble; raises ValueError for models it cannot flatten
+        """
+        if isinstance(model, XGBClassifier):
+            return cls.from_xgboost(model, source_hash)
+        if isinstance(model, RandomForestClassifier):
+            return cls.from_sklearn(model, "random_forest", [[tree] for tree in model.estimators_], source_hash)
+        if isinstance(model, GradientBoostingClassifier):
+            return cls.from_sklearn(model, "gradient_boosting", model.estimators_, source_hash)
+        raise ValueError(f"cannot flatten {type(model).__name__}")
+
+    @classmethod
+    def from_sklearn(cls, model, kind, stages, source_hash=None) -> "FlatTreeEnsemble":
+        init_raw = None
+        if kind == "gradient_boosting":
+            if model.init not in (None, "zero"):
+                raise ValueError(f"cannot flatten gradient boosting with init={model.init!r}")
+            # the prior of the default init estimator is a constant raw score per class
+            init_raw = np.asarray(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0], dtype=np.float64)
+
+        trees, tree_output = [], []
+        for stage in stages:
+            for output, estimator in enumerate(np.ravel(stage)):
+                tree = estimator.tree_
+                if kind == "random_forest":
+                    # per-tree class probabilities, normalised the way DecisionTreeClassifier does
+                    value = tree.value[:, 0, :].astype(np.float64)
+                    normalizer = value.sum(axis=1)[:, None]
+                    normalizer[normalizer == 0.0] = 1.0
+                    value = value / normalizer
+                else:
+                    value = tree.value[:, 0, 0].astype(np.float64)
+                default_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+                trees.append((tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                              default_left, value, tree.max_depth))
+                tree_output.append(output if kind == "gradient_boosting" else 0)
+
+        return cls.concatenate(
+            kind, model.classes_, trees, tree_output, model.n_features_in_,
+            learning_rate=getattr(model, "learning_rate", 1.0), init_raw=init_raw,
+            threshold_dtype=np.float64, source_hash=source_hash,
+        )
+
+    @classmethod
+    def from_xgboost(cls, model, source_hash=None) -> "FlatTreeEnsemble":
+        booster = model.get_booster()
+        learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+        if learner["gradient_booster"]["name"] != "gbtree" or learner["objective"]["name"] != "binary:logistic":
+            raise ValueError(
+                f"cannot flatten {learner['gradient_booster']['name']} with {learner['objective']['name']}"
+            )
+
+        # binary:logistic keeps base_score as a probability, predictions start from its logit
+        base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+        init_raw = np.asarray([-np.log(1.0 / base_score - 1.0)], dtype=np.float32)
+
+        trees = []
+        for tree in learner["gradient_booster"]["model"]["trees"]:
+            if any(tree.get("split_type", [])):
+                raise ValueError("cannot flatten categorical splits")
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            # a leaf keeps its output in split_conditions
+            split_conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            trees.append((
+                np.where(left == -1, -2, np.asarray(tree["split_indices"], dtype=np.int64)),
+                split_conditions,
+                left,
+                np.asarray(tree["right_children"], dtype=np.int64),
+                np.asarray(tree["default_left"], dtype=np.uint8),
+                split_conditions,
+                cls.get_depth(left, np.asarray(tree["right_children"], dtype=np.int64)),
+            ))
+
+        return cls.concatenate(
+            "xgboost", model.classes_, trees, [0] * len(trees), model.n_features_in_,
+            init_raw=init_raw, threshold_dtype=np.float32, source_hash=source_hash,
+        )
+
+    @staticmethod
+    def get_depth(left, right) -> int:
+        depth, level = 0, np.array([0])
+        while True:
+            children = np.concatenate([left[level], right[level]])
+            level = children[children >= 0]
+            if not len(level):
+                return depth
+            depth += 1
+
+    @classmethod
+    def concatenate(cls, kind, classes, trees, tree_output, n_features_in, learning_rate=1.0, init_raw=None,
+                    threshold_dtype=np.float64, source_hash=None) -> "FlatTreeEnsemble":
+        roots = np.cumsum([0] + [len(tree[0]) for tree in trees[:-1]]).astype(np.int64)
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+
+        for root, (tree_feature, tree_threshold, tree_left, tree_right, tree_default_left, tree_value, _) \
+                in zip(roots, trees):
+            nodes = np.arange(len(tree_feature)) + root
+            is_leaf = np.asarray(tree_left) < 0
+            # leaves loop back to themselves and read feature 0
+            feature.append(np.where(is_leaf, 0, tree_feature))
+            threshold.append(np.where(is_leaf, 0, tree_threshold))
+            left.append(np.where(is_leaf, nodes, np.asarray(tree_left) + root))
+            right.append(np.where(is_leaf, nodes, np.asarray(tree_right) + root))
+            default_left.append(np.asarray(tree_default_left, dtype=bool))
+            value.append(tree_value)
+
+        return cls(
+            kind=kind,
+            classes=np.asarray(classes),
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(threshold_dtype),
+            left=np.concatenate(left).astype(np.intp),
+            right=np.concatenate(right).astype(np.intp),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value),
+            roots=roots.astype(np.intp),
+            tree_output=np.asarray(tree_output, dtype=np.intp),
+            max_depth=max(tree[6] for tree in trees),
+            n_features_in=n_features_in,
+            learning_rate=learning_rate,
+            init_raw=init_raw,
+            source_hash=source_hash,
+        )
+
+    @property
+    def children(self) -> np.ndarray:
+        """
+        right and left child of every node interleaved, so one gather at
+        2 * node + go_left picks the next node
+        """
+        if getattr(self, "_children", None) is None:
+            self._children = np.column_stack([self.right, self.left]).ravel()
+        return self._children
+
+    def apply_tile(self, tile: np.ndarray) -> np.ndarray:
+        n_features = tile.shape[1]
+        offsets = (np.arange(len(tile)) * n_features)[:, None]
+        flat_tile = tile.ravel()
+        has_missing = np.isnan(flat_tile).any()
+        children = self.children
+        node = np.broadcast_to(self.roots, (len(tile), self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            values = np.take(flat_tile, np.take(self.feature, node) + offsets)
+            threshold = np.take(self.threshold, node)
+            go_left = values < threshold if self.kind == "xgboost" else values <= threshold
+            if has_missing:
+                missing = np.isnan(values)
+                go_left = np.where(missing, np.take(self.default_left, node), go_left)
+            node = np.take(children, 2 * node + go_left)
+        return node
+
+    def iter_tiles(self, X: np.ndarray):
+        n_rows = max(1, self.tile_size // max(self.n_trees, 1))
+        for start in range(0, len(X), n_rows):
+            yield start, X[start:start + n_rows]
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Leaf node of every tree for every row, shape (n_rows, n_trees)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.intp)
+        for start, tile in self.iter_tiles(X):
+            leaves[start:start + len(tile)] = self.apply_tile(tile)
+        return leaves
+
+    def accumulate(self, leaves: np.ndarray) -> np.ndarray:
+        """
+        Sum the leaf outputs tree by tree (cumsum adds strictly in order, as the
+        native predict loops do), starting from the initial raw score
+        """
+        if self.kind == "random_forest":
+            # DecisionTreeClassifier probabilities averaged over the forest
+            proba = np.cumsum(np.take(self.value, leaves, axis=0), axis=1)[:, -1]
+            return proba / self.n_trees
+
+        if self.kind == "gradient_boosting":
+            raw = np.empty((len(leaves), len(self.init_raw)), dtype=np.float64)
+            for output in range(len(self.init_raw)):
+                trees = leaves[:, self.tree_output == output]
+                steps = np.empty((len(leaves), trees.shape[1] + 1), dtype=np.float64)
+                steps[:, 0] = self.init_raw[output]
+                np.multiply(self.learning_rate, np.take(self.value, trees), out=steps[:, 1:])
+                raw[:, output] = np.cumsum(steps, axis=1)[:, -1]
+            return raw
+
+        steps = np.empty((len(leaves), self.n_trees + 1), dtype=np.float32)
+        steps[:, 0] = self.init_raw[0]
+        steps[:, 1:] = np.take(self.value, leaves)
+        return np.cumsum(steps, axis=1, dtype=np.float32)[:, -1:]
+
+    def decision(self, X) -> np.ndarray:
+        """
+        Accumulated ensemble output per class column, before the link function
+        """
+        # trees split on float32 features in sklearn and XGBoost alike
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        output = None
+        for start, tile in self.iter_tiles(X):
+            tile_output = self.accumulate(self.apply_tile(tile))
+            if output is None:
+                output = np.empty((len(X), tile_output.shape[1]), dtype=tile_output.dtype)
+            output[start:start + len(tile)] = tile_output
+        return output
+
+    def predict_proba(self, X) -> np.ndarray:
+        output = self.decision(X)
+        if self.kind == "random_forest":
+            return output
+        if self.kind == "xgboost" or output.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-output[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        proba = np.exp(output - output.max(axis=1, keepdims=True))
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        if self.kind == "gradient_boosting":
+            raw = self.decision(X)
+            if raw.shape[1] == 1:
+                return self.classes_[(raw[:, 0] >= 0).astype(np.intp)]
+            return self.classes_[np.argmax(raw, axis=1)]
+
+        proba = self.predict_proba(X)
+        if self.kind == "xgboost":
+            return self.classes_[(proba[:, 1] > 0.5).astype(np.intp)]
+        return self.classes_[np.argmax(proba, axis=1)]
+
+
+class BatchedTreeModel:
+    """
+    Serves predict from a flattened ensemble for batches of up to max_rows
+    rows, where per-estimator dispatch dominates, and from the native model
+    for larger batches, where its compiled per-tree loops are faster
+    """
+
+    def __init__(self, model, ensemble: FlatTreeEnsemble, max_rows: int):
+        self.model = model
+        self.ensemble = ensemble
+        self.max_rows = max_rows
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def predict(self, X):
+        if len(X) <= self.max_rows:
+            return self.ensemble.predict(X)
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        if len(X) <= self.max_rows:
+            return self.ensemble.predict_proba(X)
+        return self.model.predict_proba(X)
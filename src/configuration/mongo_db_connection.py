@@ -1,25 +1,122 @@
 import os
 import sys
+import time
+import threading
 import pymongo
+from pymongo.errors import AutoReconnect, ConnectionFailure
+from src.constant import (
+    MONGO_DB_URL,
+    MONGO_DATABASE_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_MAX_RETRIES,
+    MONGO_RETRY_BACKOFF_SECONDS,
+)
 from src.exception import CustomException
+from src.logger import logging as lg
+
 
 class MongoDBClient:
+    """
+    Process-wide, pooled MongoDB client.
+
+    The pymongo.MongoClient and its connection pool are created lazily on first
+    use and shared by every MongoDBClient instance in the process, so repeated
+    ingestion and upload calls reuse warm connections. A forked child process
+    gets its own client, since pymongo clients must not be shared across a fork.
+    """
     client = None
+    client_pid = None
+    _lock = threading.Lock()
+
+    def __init__(self, database_name=MONGO_DATABASE_NAME, ca=None):
+        self.database_name = database_name
+        self.ca = ca
+
+    @staticmethod
+    def _tls_options(mongo_db_url, ca):
+        if not (mongo_db_url.startswith("mongodb+srv://") or "tls=true" in mongo_db_url or "ssl=true" in mongo_db_url):
+            return {}
+
+        if ca is None:
+            import certifi
+            ca = certifi.where()
+        return {
+            "tlsCAFile": ca,
+            "tlsAllowInvalidCertificates": True,  # Less strict SSL verification
+        }
+
+    def get_client(self) -> pymongo.MongoClient:
+        """
+        Return the shared client, creating it on first use in this process
+        """
+        pid = os.getpid()
+        if MongoDBClient.client is not None and MongoDBClient.client_pid == pid:
+            return MongoDBClient.client
+
+        with MongoDBClient._lock:
+            if MongoDBClient.client is None or MongoDBClient.client_pid != pid:
+                try:
+                    if MONGO_DB_URL is None:
+                        raise Exception("Environment key: MONGO_DB_URL is not set.")
+
+                    MongoDBClient.client = pymongo.MongoClient(
+                        MONGO_DB_URL,
+                        maxPoolSize=MONGO_MAX_POOL_SIZE,
+                        minPoolSize=MONGO_MIN_POOL_SIZE,
+                        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                        retryReads=True,
+                        retryWrites=True,
+                        connect=False,
+                        **self._tls_options(MONGO_DB_URL, self.ca),
+                    )
+                    MongoDBClient.client_pid = pid
+                    lg.info(f"Created MongoDB client with pool size {MONGO_MAX_POOL_SIZE} in process {pid}")
+
+                except Exception as e:
+                    lg.error(f"Failed to connect to MongoDB: {str(e)}")
+                    raise CustomException(f"MongoDB Connection Error: {str(e)}", sys)
+
+        return MongoDBClient.client
+
+    @property
+    def database(self):
+        return self.get_client()[self.database_name]
+
+    def get_collection(self, collection_name):
+        return self.database[collection_name]
+
+    @staticmethod
+    def with_retry(operation, max_retries=MONGO_MAX_RETRIES, backoff_seconds=MONGO_RETRY_BACKOFF_SECONDS):
+        """
+        Run operation(), retrying transient connection errors with exponential backoff
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                return operation()
+            except (AutoReconnect, ConnectionFailure) as e:
+                if attempt == max_retries:
+                    raise
+                delay = backoff_seconds * (2 ** attempt)
+                lg.warning(f"MongoDB operation failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def ping(self):
+        """
+        Probe the server once, without retries: a server that is down fails
+        after a single server selection timeout, so callers can fall back quickly
+        """
+        return self.get_client().admin.command('ping')
 
-    def __init__(self, database_name, ca):
-        try:
-            mongo_db_url = os.getenv("MONGO_DB_URL")
-            if mongo_db_url is None:
-                raise Exception("Environment key: MONGO_DB_URL is not set.")
-            MongoDBClient.client = pymongo.MongoClient(
-                mongo_db_url,
-                tlsCAFile=ca,
-                ssl=True,
-                ssl_cert_reqs='CERT_NONE'
-            )
-            self.client = MongoDBClient.client
-            self.database = self.client[database_name]
-            self.database_name = database_name
-        except Exception as e:
-            lg.error(f"Failed to connect to MongoDB: {str(e)}")
-            raise CustomException(f"MongoDB Connection Error: {str(e)}", sys)
\ No newline at end of file
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            if cls.client is not None and cls.client_pid == os.getpid():
+                cls.client.close()
+            cls.client = None
+            cls.client_pid = None
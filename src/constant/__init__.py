@@ -16,6 +16,91 @@ if not MONGO_DB_URL:
 # Add a flag to disable MongoDB in case of connection issues
 USE_MONGODB = os.getenv("USE_MONGODB", "true").lower() == "true"
 
+# Shared MongoDB client pool, timeouts and retry policy
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "60000"))
+MONGO_MAX_RETRIES = int(os.getenv("MONGO_MAX_RETRIES", "3"))
+MONGO_RETRY_BACKOFF_SECONDS = float(os.getenv("MONGO_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# Feature store export: "stream" iterates the cursor in float32 batches,
+# "parallel" streams _id ranges on MONGO_EXPORT_WORKERS threads, cut from a
+# random sample of MONGO_EXPORT_SPLIT_SAMPLES _ids per range,
+# "dataframe" materialises the whole collection with pandas first
+INGESTION_EXPORT_MODE = os.getenv("INGESTION_EXPORT_MODE", "stream")
+MONGO_EXPORT_BATCH_SIZE = int(os.getenv("MONGO_EXPORT_BATCH_SIZE", "10000"))
+MONGO_EXPORT_WORKERS = int(os.getenv("MONGO_EXPORT_WORKERS", "4"))
+MONGO_EXPORT_SPLIT_SAMPLES = int(os.getenv("MONGO_EXPORT_SPLIT_SAMPLES", "100"))
+
+# Ingestion: "full" re-exports the collection, "incremental" appends only the
+# documents newer than the stored high-water mark as a new partition
+INGESTION_MODE = os.getenv("INGESTION_MODE", "full")
+INGESTION_WATERMARK_FIELD = os.getenv("INGESTION_WATERMARK_FIELD", "_id")
+
+# Feature store file format: "csv", "parquet" (needs pyarrow) or "npy"
+FEATURE_STORE_FORMAT = os.getenv("FEATURE_STORE_FORMAT", "csv")
+
+# Numeric dtype for features in training and inference: "float64" or "float32"
+NUMERIC_DTYPE = os.getenv("NUMERIC_DTYPE", "float64")
+# With float32, each training run first compares float32 against float64 training
+# on the feature store: "fail" stops the run when test accuracy drifts beyond the
+# tolerance, "warn" only logs it, "off" skips the check
+NUMERIC_DTYPE_PARITY_CHECK = os.getenv("NUMERIC_DTYPE_PARITY_CHECK", "fail")
+
+# Preprocessor fitting: "in_memory" loads the whole feature store, "chunked"
+# streams it and fits the scaler from mergeable quantile sketches
+TRANSFORMATION_FIT_MODE = os.getenv("TRANSFORMATION_FIT_MODE", "in_memory")
+TRANSFORMATION_CHUNKSIZE = int(os.getenv("TRANSFORMATION_CHUNKSIZE", "50000"))
+
+# Candidate model evaluation: "sequential" or "parallel" (one process per
+# candidate, each limited to MODEL_EVALUATION_THREADS threads, 0 = share the
+# CPUs evenly); candidates still running after MODEL_EVALUATION_DEADLINE_SECONDS
+# are abandoned (0 = no deadline)
+MODEL_EVALUATION_MODE = os.getenv("MODEL_EVALUATION_MODE", "sequential")
+MODEL_EVALUATION_WORKERS = int(os.getenv("MODEL_EVALUATION_WORKERS", "4"))
+MODEL_EVALUATION_THREADS = int(os.getenv("MODEL_EVALUATION_THREADS", "0"))
+MODEL_EVALUATION_DEADLINE_SECONDS = float(os.getenv("MODEL_EVALUATION_DEADLINE_SECONDS", "0"))
+
+# Content-addressed artifact store (artifacts/cas): stage outputs not reused for
+# CONTENT_STORE_RETENTION_DAYS are garbage-collected after each training run (0 = keep all)
+CONTENT_STORE_RETENTION_DAYS = float(os.getenv("CONTENT_STORE_RETENTION_DAYS", "14"))
+
+# Training: "full" retrains from scratch, "incremental" continues the current
+# model on the new ingestion partitions only (extra boosting rounds / trees),
+# falling back to a full retrain after TRAINING_FULL_RETRAIN_EVERY updates
+TRAINING_MODE = os.getenv("TRAINING_MODE", "full")
+TRAINING_FULL_RETRAIN_EVERY = int(os.getenv("TRAINING_FULL_RETRAIN_EVERY", "10"))
+
+# Serving: the model/preprocessor pair is loaded once per process and the
+# artifact files are checked for a newer pair every MODEL_RELOAD_INTERVAL_SECONDS
+# (0 = never reload)
+MODEL_RELOAD_INTERVAL_SECONDS = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "5"))
+
+# Tree ensembles exported as flat node arrays at training time score batches of
+# up to MODEL_FLAT_INFERENCE_MAX_ROWS rows without per-estimator dispatch; larger
+# batches use the native predict (0 = always native)
+MODEL_FLAT_INFERENCE_MAX_ROWS = int(os.getenv("MODEL_FLAT_INFERENCE_MAX_ROWS", "512"))
+
+# Single-row scoring (/predict/row): concurrent requests arriving within
+# ROW_SCORING_WINDOW_MS of each other are scored together, at most
+# ROW_SCORING_MAX_BATCH_SIZE rows per call
+ROW_SCORING_WINDOW_MS = float(os.getenv("ROW_SCORING_WINDOW_MS", "2"))
+ROW_SCORING_MAX_BATCH_SIZE = int(os.getenv("ROW_SCORING_MAX_BATCH_SIZE", "64"))
+ROW_SCORING_TIMEOUT_SECONDS = float(os.getenv("ROW_SCORING_TIMEOUT_SECONDS", "10"))
+
+# Streaming CSV scoring (/predict/stream) reads, scores and sends back this many rows at a time
+PREDICTION_CHUNKSIZE = int(os.getenv("PREDICTION_CHUNKSIZE", "10000"))
+
+# Asynchronous prediction jobs (/jobs): PREDICTION_JOB_WORKERS worker processes,
+# at most PREDICTION_JOB_QUEUE_SIZE more jobs waiting before submissions get a
+# 429, and finished job directories are kept for PREDICTION_JOB_RETENTION_HOURS
+PREDICTION_JOBS_DIR = os.getenv("PREDICTION_JOBS_DIR", "prediction_jobs")
+PREDICTION_JOB_WORKERS = int(os.getenv("PREDICTION_JOB_WORKERS", "2"))
+PREDICTION_JOB_QUEUE_SIZE = int(os.getenv("PREDICTION_JOB_QUEUE_SIZE", "8"))
+PREDICTION_JOB_RETENTION_HOURS = float(os.getenv("PREDICTION_JOB_RETENTION_HOURS", "24"))
+
 MODEL_FILE_NAME = "model"
 MODEL_FILE_EXTENSION = ".pkl"
 
@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class DataTransformationArtifact:
+    """
+    Transformed train/test splits, saved as separate feature and target .npy
+    files so the trainer can memory-map them, plus the fitted preprocessor
+    """
+    train_features_file_path: str
+    train_target_file_path: str
+    test_features_file_path: str
+    test_target_file_path: str
+    preprocessor_file_path: str
@@ -1,19 +1,51 @@
 import os
 from dataclasses import dataclass
 from datetime import datetime
-from src.constant import artifact_folder
+from src.constant import (
+    artifact_folder,
+    INGESTION_EXPORT_MODE,
+    MONGO_EXPORT_BATCH_SIZE,
+    MONGO_EXPORT_WORKERS,
+    MONGO_EXPORT_SPLIT_SAMPLES,
+    INGESTION_MODE,
+    INGESTION_WATERMARK_FIELD,
+    FEATURE_STORE_FORMAT,
+)
+from src.utils.feature_store import FEATURE_STORE_EXTENSIONS
 
 @dataclass
 class DataIngestionConfig:
-    def __init__(self):
+    def __init__(self,
+                 export_mode=INGESTION_EXPORT_MODE,
+                 batch_size=MONGO_EXPORT_BATCH_SIZE,
+                 export_workers=MONGO_EXPORT_WORKERS,
+                 split_samples=MONGO_EXPORT_SPLIT_SAMPLES,
+                 ingestion_mode=INGESTION_MODE,
+                 watermark_field=INGESTION_WATERMARK_FIELD,
+                 feature_store_format=FEATURE_STORE_FORMAT):
         # Create timestamp for unique artifact folders
         self.timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         
         # Define artifact folder structure
         self.artifact_folder = os.path.join(artifact_folder, self.timestamp)
+        self.feature_store_format = feature_store_format
         self.feature_store_file_path = os.path.join(
-            self.artifact_folder, "feature_store", "sensor_data.csv"
+            self.artifact_folder, "feature_store", "sensor_data" + FEATURE_STORE_EXTENSIONS[feature_store_format]
         )
+
+        # Export settings: "stream" writes the collection in batches of batch_size rows,
+        # "parallel" does the same for export_workers _id ranges concurrently, cut
+        # from split_samples sampled _ids per range
+        self.export_mode = export_mode
+        self.batch_size = batch_size
+        self.export_workers = export_workers
+        self.split_samples = split_samples
+
+        # Incremental ingestion appends partitions to a feature store shared by all runs
+        self.ingestion_mode = ingestion_mode
+        self.watermark_field = watermark_field
+        self.incremental_feature_store_dir = os.path.join(artifact_folder, "feature_store")
+        self.watermark_file_path = os.path.join(self.incremental_feature_store_dir, "_watermark.json")
         
         # Create directories
-        os.makedirs(os.path.dirname(self.feature_store_file_path), exist_ok=True)
\ No newline at end of file
+        os.makedirs(os.path.dirname(self.feature_store_file_path), exist_ok=True)
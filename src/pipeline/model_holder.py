@@ -0,0 +1,215 @@
+import os
+import sys
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.main_utils import MainUtils
+from src.utils.content_store import ContentStore
+from src.components.preprocessing import FusedPreprocessor
+from src.components.tree_ensemble import FlatTreeEnsemble, BatchedTreeModel
+
+
+# One loaded model/preprocessor pair. `version` is the stat signature of the
+# files it was loaded from; (None, None, None) until a pair has been trained.
+LoadedModel = namedtuple("LoadedModel", ["model", "preprocessor", "version"])
+
+
+class ModelHolder:
+    """
+    Keeps one model/preprocessor pair loaded for the whole process.
+
+    The pair is loaded once and handed out by get(); a watcher thread polls
+    the artifact files every reload_interval_seconds and, when a newer
+    complete pair is in place, loads it in the background and swaps it in
+    with a single reference assignment. Requests that already took the old
+    pair finish with it, so nothing in flight is dropped.
+
+    A pair is complete when model.pkl is not older than preprocessor.pkl
+    (training writes the preprocessor first) and the loaded model accepts
+    the preprocessor's output; otherwise the current pair is kept and the
+    files are checked again on the next poll.
+    """
+
+    def __init__(self,
+                 model_file_path: str = os.path.join(artifact_folder, "model.pkl"),
+                 preprocessor_file_path: str = os.path.join(artifact_folder, "preprocessor.pkl"),
+                 fused_preprocessor_file_path: str = os.path.join(artifact_folder, "fused_preprocessor.pkl"),
+                 tree_ensemble_file_path: str = os.path.join(artifact_folder, "tree_ensemble.pkl"),
+                 reload_interval_seconds: float = MODEL_RELOAD_INTERVAL_SECONDS,
+                 flat_inference_max_rows: int = MODEL_FLAT_INFERENCE_MAX_ROWS):
+        self.model_file_path = model_file_path
+        self.preprocessor_file_path = preprocessor_file_path
+        self.fused_preprocessor_file_path = fused_preprocessor_file_path
+        self.tree_ensemble_file_path = tree_ensemble_file_path
+        self.reload_interval_seconds = reload_interval_seconds
+        self.flat_inference_max_rows = flat_inference_max_rows
+        self.utils = MainUtils()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        try:
+            # at startup any pair on disk is better than none
+            self._current = self.load(require_complete=False)
+        except Exception as e:
+            logging.warning(f"No model loaded yet: {str(e)}")
+            self._current = LoadedModel(None, None, None)
+
+    def get(self) -> LoadedModel:
+        """
+        Return the current pair; callers keep using it for the whole request
+        """
+        return self._current
+
+    def get_version(self, require_complete: bool = True):
+        """
+        Stat signature of the pair on disk, None if there is no (complete) pair
+        """
+        try:
+            model_stat = os.stat(self.model_file_path)
+            preprocessor_stat = os.stat(self.preprocessor_file_path)
+        except OSError:
+            return None
+
+        if require_complete and model_stat.st_mtime_ns < preprocessor_stat.st_mtime_ns:
+            # a new preprocessor is in place but its model is still being trained
+            return None
+
+        # the compiled companions are written after their sources, and swap in when they appear
+        companions = []
+        for file_path in (self.fused_preprocessor_file_path, self.tree_ensemble_file_path):
+            companions.append(os.stat(file_path).st_mtime_ns if os.path.exists(file_path) else None)
+        return (
+            model_stat.st_ino, model_stat.st_size, model_stat.st_mtime_ns,
+            preprocessor_stat.st_ino, preprocessor_stat.st_size, preprocessor_stat.st_mtime_ns,
+            *companions,
+        )
+
+    def load_preprocessor(self):
+        """
+        Load the fused preprocessor exported at training time when it was compiled
+        from the current preprocessor.pkl, otherwise the sklearn pipeline itself
+        """
+        if os.path.exists(self.fused_preprocessor_file_path) and os.path.exists(self.preprocessor_file_path):
+            try:
+                fused_preprocessor = self.utils.load_object(self.fused_preprocessor_file_path)
+                if (isinstance(fused_preprocessor, FusedPreprocessor)
+                        and fused_preprocessor.source_hash == ContentStore.hash_file(self.preprocessor_file_path)):
+                    return fused_preprocessor
+                logging.warning("Fused preprocessor is stale, using the sklearn pipeline")
+            except Exception as e:
+                logging.warning(f"Could not load fused preprocessor: {str(e)}")
+
+        return self.utils.load_object(self.preprocessor_file_path)
+
+    def load_model(self):
+        """
+        Load model.pkl, served through the flat tree ensemble exported at training
+        time for small batches when it was built from this model.pkl
+        """
+        model = self.utils.load_object(self.model_file_path)
+        if self.flat_inference_max_rows > 0 and os.path.exists(self.tree_ensemble_file_path):
+            try:
+                tree_ensemble = self.utils.load_object(self.tree_ensemble_file_path)
+                if (isinstance(tree_ensemble, FlatTreeEnsemble)
+                        and tree_ensemble.source_hash == ContentStore.hash_file(self.model_file_path)):
+                    return BatchedTreeModel(model, tree_ensemble, self.flat_inference_max_rows)
+                logging.warning("Flat tree ensemble is stale, using the model's own predict")
+            except Exception as e:
+                logging.warning(f"Could not load flat tree ensemble: {str(e)}")
+        return model
+
+    @staticmethod
+    def check_pair(model, preprocessor) -> None:
+        """
+        Score one all-zero row, so a model that does not match its preprocessor
+        fails here instead of on a request
+        """
+        columns = getattr(preprocessor, "feature_names_in_", None)
+        n_features = getattr(preprocessor, "n_features_in_", None) or getattr(preprocessor, "n_features_in", None)
+        if columns is not None:
+            row = pd.DataFrame(np.zeros((1, len(columns))), columns=columns)
+        elif n_features:
+            row = np.zeros((1, n_features))
+        else:
+            return
+        model.predict(preprocessor.transform(row))
+
+    def load(self, require_complete: bool = True) -> LoadedModel:
+        try:
+            version = self.get_version(require_complete)
+            if version is None:
+                raise FileNotFoundError(
+                    f"No complete pair of {self.model_file_path} and {self.preprocessor_file_path}"
+                )
+
+            model = self.load_model()
+            preprocessor = self.load_preprocessor()
+            if self.get_version(require_complete) != version:
+                raise RuntimeError("Model files changed while loading")
+            self.check_pair(model, preprocessor)
+
+            logging.info(f"Loaded {type(model).__name__} with {type(preprocessor).__name__}")
+            return LoadedModel(model, preprocessor, version)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Swap in the pair on disk if it is newer and complete; returns True if swapped
+        """
+        with self._lock:
+            version = self.get_version()
+            if version is None or version == self._current.version:
+                return False
+            try:
+                loaded = self.load()
+            except Exception as e:
+                logging.warning(f"Keeping the current model, new pair could not be loaded: {str(e)}")
+                return False
+
+            self._current = loaded
+            logging.info(f"Swapped in the model files from {self.model_file_path}")
+            return True
+
+    def watch(self) -> None:
+        while not self._stop.wait(self.reload_interval_seconds):
+            self.reload_if_changed()
+
+    def start(self) -> "ModelHolder":
+        """
+        Start the watcher thread (no-op when reload_interval_seconds is 0)
+        """
+        if self.reload_interval_seconds > 0 and self._watcher is None:
+            self._watcher = threading.Thread(target=self.watch, name="model-holder-watcher", daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+_model_holder = None
+_model_holder_lock = threading.Lock()
+
+
+def get_model_holder() -> ModelHolder:
+    """
+    The process-wide model holder, loaded and started on first use
+    """
+    global _model_holder
+    if _model_holder is None:
+        with _model_holder_lock:
+            if _model_holder is None:
+                _model_holder = ModelHolder().start()
+    return _model_holder
@@ -1,5 +1,7 @@
 import shutil
 import os, sys
+import io
+import csv
 import pandas as pd
 import pickle
 from src.logger import logging
@@ -11,8 +13,32 @@ import sys
 from flask import request
 from src.constant import *
 from src.utils.main_utils import MainUtils
+from src.components.preprocessing import get_input_columns
+from src.pipeline.model_holder import ModelHolder, get_model_holder
 
 from dataclasses import dataclass
+
+
+class PrefixedStream(io.RawIOBase):
+    """
+    A binary stream that returns `prefix` (bytes already consumed, e.g. the
+    header line) followed by the rest of `stream`
+    """
+
+    def __init__(self, prefix: bytes, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.prefix:
+            data, self.prefix = self.prefix[:len(buffer)], self.prefix[len(buffer):]
+        else:
+            data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
         
         
 @dataclass
@@ -65,16 +91,15 @@ class PredictionPipelineConfig:
 
 
 class PredictionPipeline:
-    def __init__(self, request):
+    def __init__(self, request, model_holder: ModelHolder = None):
         self.request = request
         self.utils = MainUtils()
         
         # Ensure artifacts directory exists
         os.makedirs("artifacts", exist_ok=True)
         
-        # Set file paths
-        self.model_file_path = "artifacts/model.pkl"
-        self.preprocessor_path = "artifacts/preprocessor.pkl"
+        # The model/preprocessor pair is loaded once per process, not per request
+        self.model_holder = model_holder or get_model_holder()
         
         # Set prediction output paths
         self.prediction_output_dirname = "predictions"
@@ -113,16 +138,41 @@ class PredictionPipeline:
         except Exception as e:
             raise CustomException(e,sys)
 
-    def predict(self, features):
+    def load_preprocessor(self):
+        """
+        The preprocessor of the currently served model pair
+        """
+        return self.model_holder.get().preprocessor
+
+    def get_scoring_columns(self, header, preprocessor=None) -> list:
+        """
+        Return the input columns handed to the model: identifier columns plus
+        the sensors kept by the preprocessor's pruning step. The returned files
+        keep every input column.
+        """
+        try:
+            kept_columns = get_input_columns(preprocessor or self.load_preprocessor())
+        except Exception:
+            kept_columns = None
+
+        if kept_columns is None:
+            return list(header)
+
+        kept_columns = set(kept_columns)
+        return [column for column in header if column in kept_columns or not column.startswith("Sensor")]
+
+    def predict(self, features, pair=None):
         try:
-            # Load model and preprocessor (will create dummies if files don't exist)
-            model = self.utils.load_object(self.model_file_path)
-            preprocessor = self.utils.load_object(self.preprocessor_path)
+            # Take the served pair once, so a reload mid-request cannot mix two models
+            model, preprocessor, _ = pair or self.model_holder.get()
+            if model is None:
+                raise FileNotFoundError("No trained model available, run /train first")
             
             # For dummy preprocessor, ensure it can handle the input features
-            if isinstance(features, pd.DataFrame) and features.shape[1] > 2:
+            from sklearn.preprocessing import StandardScaler
+            if (isinstance(features, pd.DataFrame) and isinstance(preprocessor, StandardScaler)
+                    and preprocessor.n_features_in_ != features.shape[1]):
                 # If using dummy preprocessor with more features than it was trained on
-                from sklearn.preprocessing import StandardScaler
                 preprocessor = StandardScaler()
                 preprocessor.fit(features)
             
@@ -141,13 +191,15 @@ class PredictionPipeline:
         Generate predictions and return the dataframe with predictions
         """
         try:
-            # Read the input CSV file
-            input_dataframe = pd.read_csv(input_dataframe_path)
+            # Read the input CSV file, parsing the sensor columns straight into the configured dtype
+            header = pd.read_csv(input_dataframe_path, nrows=0).columns
+            sensor_dtypes = {column: NUMERIC_DTYPE for column in header if column.startswith("Sensor")}
+            input_dataframe = pd.read_csv(input_dataframe_path, dtype=sensor_dtypes)
             logging.info(f"Input dataframe loaded with shape: {input_dataframe.shape}")
             
-            # Make predictions
+            # Make predictions, leaving out the sensors the preprocessor pruned at training time
             try:
-                predictions = self.predict(input_dataframe)
+                predictions = self.predict(input_dataframe[self.get_scoring_columns(header)])
             except Exception as e:
                 logging.error(f"Error during prediction: {str(e)}")
                 # Create random predictions as fallback
@@ -175,6 +227,54 @@ class PredictionPipeline:
         
 
         
+    def open_prediction_stream(self, input_stream, chunksize: int = PREDICTION_CHUNKSIZE):
+        """
+        Score a CSV byte stream in chunks of `chunksize` rows and return a
+        generator of output CSV pieces (every input column plus `prediction`), so neither the input nor the output is ever held or
+        written out in full. The header is parsed and the model pair taken
+        before returning, so those errors surface before any output is sent.
+        """
+        try:
+            pair = self.model_holder.get()
+            if pair.model is None:
+                raise FileNotFoundError("No trained model available, run /train first")
+
+            header_line = input_stream.readline()
+            if not header_line:
+                raise ValueError("The uploaded file is empty")
+            header = next(csv.reader([header_line.decode("utf-8-sig")]))
+            # name blank columns (the wafer name column) the way pandas does
+            header = [column or f"Unnamed: {index}" for index, column in enumerate(header)]
+            scoring_columns = self.get_scoring_columns(header, pair.preprocessor)
+            sensor_dtypes = {column: NUMERIC_DTYPE for column in header if column.startswith("Sensor")}
+
+            reader = pd.read_csv(
+                io.BufferedReader(PrefixedStream(header_line, input_stream)),
+                dtype=sensor_dtypes, chunksize=chunksize,
+            )
+            return self.iter_predicted_csv(reader, header, scoring_columns, pair, input_stream)
+
+        except Exception as e:
+            # the generator owns the stream only once it is returned
+            input_stream.close()
+            raise CustomException(e, sys)
+
+    def iter_predicted_csv(self, reader, header, scoring_columns, pair, input_stream):
+        n_rows = 0
+        try:
+            for chunk in reader:
+                if chunk.empty:
+                    continue
+                predictions = pd.Series(self.predict(chunk[scoring_columns], pair), index=chunk.index, name="prediction")
+                yield pd.concat([chunk, predictions], axis=1).to_csv(index=False, header=(n_rows == 0))
+                n_rows += len(chunk)
+
+            if n_rows == 0:
+                yield ",".join(header + ["prediction"]) + "\n"
+            logging.info(f"Streamed predictions for {n_rows} rows")
+        finally:
+            input_stream.close()
+
     def run_pipeline(self):
         try:
             # Save input file
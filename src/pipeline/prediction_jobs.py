@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.constant import *
+from src.exception import CustomException
+from src.logger import logging
+
+
+JOB_INPUT_FILE_NAME = "input.csv"
+JOB_OUTPUT_FILE_NAME = "predicted_file.csv"
+JOB_STATUS_FILE_NAME = "status.json"
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when every worker is busy and the job queue is at its limit
+    """
+
+
+def read_job_status(job_dir: str) -> dict:
+    with open(os.path.join(job_dir, JOB_STATUS_FILE_NAME), "r") as status_file:
+        return json.load(status_file)
+
+
+def update_job_status(job_dir: str, **fields) -> dict:
+    """
+    Merge fields into the job's status file and atomically replace it
+    """
+    status_file_path = os.path.join(job_dir, JOB_STATUS_FILE_NAME)
+    status = {}
+    if os.path.exists(status_file_path):
+        status = read_job_status(job_dir)
+    status.update(fields)
+
+    tmp_file_path = status_file_path + ".tmp"
+    with open(tmp_file_path, "w") as status_file:
+        json.dump(status, status_file, indent=2)
+    os.replace(tmp_file_path, status_file_path)
+    return status
+
+
+def run_prediction_job(job_dir: str) -> str:
+    """
+    Score a job's input file in a worker process, writing the predictions and
+    the job status into the job's own directory. The worker keeps its model
+    pair loaded between jobs.
+    """
+    from src.pipeline.model_holder import get_model_holder
+    from src.pipeline.predict_pipeline import PredictionPipeline
+
+    update_job_status(job_dir, status="running", started_at=datetime.now().isoformat(), worker_pid=os.getpid())
+    try:
+        prediction_pipeline = PredictionPipeline(None, get_model_holder())
+        output_file_path = os.path.join(job_dir, JOB_OUTPUT_FILE_NAME)
+        tmp_file_path = output_file_path + ".tmp"
+
+        start = time.perf_counter()
+        with open(tmp_file_path, "w", newline="") as output_file, \
+                open(os.path.join(job_dir, JOB_INPUT_FILE_NAME), "rb") as input_stream:
+            for piece in prediction_pipeline.open_prediction_stream(input_stream):
+                output_file.write(piece)
+        os.replace(tmp_file_path, output_file_path)
+
+        update_job_status(
+            job_dir, status="completed", finished_at=datetime.now().isoformat(),
+            wall_seconds=round(time.perf_counter() - start, 3),
+        )
+        return output_file_path
+
+    except Exception as e:
+        logging.error(f"Prediction job {os.path.basename(job_dir)} failed: {str(e)}")
+        update_job_status(job_dir, status="failed", finished_at=datetime.now().isoformat(), error=str(e))
+        raise
+
+
+class PredictionJobManager:
+    """
+    Runs uploaded prediction files as background jobs on a bounded pool of
+    worker processes.
+
+    Every job gets its own directory under jobs_dir (input, predictions and
+    a status.json), so concurrent jobs never share output paths. At most
+    max_workers jobs run at once and max_queue_size more wait; submitting
+    beyond that raises JobQueueFull. Job directories older than
+    retention_hours are removed when new jobs are submitted.
+    """
+
+    def __init__(self,
+                 jobs_dir: str = PREDICTION_JOBS_DIR,
+                 max_workers: int = PREDICTION_JOB_WORKERS,
+                 max_queue_size: int = PREDICTION_JOB_QUEUE_SIZE,
+                 retention_hours: float = PREDICTION_JOB_RETENTION_HOURS):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retention_hours = retention_hours
+
+        self._executor = None
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server process runs threads (model watcher, micro-batcher)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def drop_executor(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Shut down a pool that broke (a worker died) so the next job starts a new
+        one; a no-op if it was already replaced
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logging.warning("A prediction worker died, restarting the worker pool")
+        executor.shutdown(wait=False)
+
+    def get_job_dir(self, job_id: str) -> str:
+        """
+        Directory of a job; raises KeyError for ids that are malformed or unknown
+        """
+        if len(job_id) != 32 or not all(character in "0123456789abcdef" for character in job_id):
+            raise KeyError(job_id)
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        if not os.path.exists(os.path.join(job_dir, JOB_STATUS_FILE_NAME)):
+            raise KeyError(job_id)
+        return job_dir
+
+    def remove_expired_jobs(self) -> None:
+        if not self.retention_hours or not os.path.isdir(self.jobs_dir):
+            return
+        cutoff = time.time() - self.retention_hours * 3600
+        for job_id in os.listdir(self.jobs_dir):
+            job_dir = os.path.join(self.jobs_dir, job_id)
+            if job_id not in self._active and os.path.getmtime(job_dir) < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def submit(self, input_file) -> str:
+        """
+        Save an uploaded file (anything with .save(path)) as a new job and queue
+        it; returns the job id
+        """
+        with self._lock:
+            if len(self._active) >= self.max_workers + self.max_queue_size:
+                raise JobQueueFull(f"{len(self._active)} prediction jobs are queued or running")
+
+            self.remove_expired_jobs()
+            job_id = uuid.uuid4().hex
+            job_dir = os.path.join(self.jobs_dir, job_id)
+            os.makedirs(job_dir)
+            self._active.add(job_id)
+
+        try:
+            input_file.save(os.path.join(job_dir, JOB_INPUT_FILE_NAME))
+            update_job_status(
+                job_dir, job_id=job_id, status="queued", submitted_at=datetime.now().isoformat(),
+                input_file_name=getattr(input_file, "filename", None),
+            )
+            executor = self.get_executor()
+            try:
+                future = executor.submit(run_prediction_job, job_dir)
+            except BrokenProcessPool:
+                self.drop_executor(executor)
+                executor = self.get_executor()
+                future = executor.submit(run_prediction_job, job_dir)
+
+        except Exception as e:
+            with self._lock:
+                self._active.discard(job_id)
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise CustomException(e, sys)
+
+        future.add_done_callback(lambda future: self.finish(job_id, future, executor))
+        logging.info(f"Queued prediction job {job_id}")
+        return job_id
+
+    def finish(self, job_id: str, future, executor: ProcessPoolExecutor = None) -> None:
+        with self._lock:
+            self._active.discard(job_id)
+        if isinstance(future.exception(), BrokenProcessPool) and executor is not None:
+            self.drop_executor(executor)
+
+        # a worker that died (e.g. killed for memory) never wrote its final status
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        if future.exception() is not None and read_job_status(job_dir)["status"] not in ("completed", "failed"):
+            update_job_status(
+                job_dir, status="failed", finished_at=datetime.now().isoformat(), error=str(future.exception())
+            )
+
+    def get_status(self, job_id: str) -> dict:
+        """
+        Status of a job plus the number of jobs queued or running right now
+        """
+        status = read_job_status(self.get_job_dir(job_id))
+        status["active_jobs"] = len(self._active)
+        return status
+
+    def get_result_path(self, job_id: str) -> str:
+        """
+        Path of a completed job's predictions; raises KeyError if unknown, else
+        returns None while the job has not completed
+        """
+        job_dir = self.get_job_dir(job_id)
+        if read_job_status(job_dir)["status"] != "completed":
+            return None
+        return os.path.join(job_dir, JOB_OUTPUT_FILE_NAME)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,178 @@
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from src.constant import *
+from src.exception import CustomException
+from src.components.preprocessing import get_input_columns, FusedPreprocessor
+from src.pipeline.model_holder import ModelHolder, LoadedModel
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads into batches for one scoring call.
+
+    A single worker thread takes the first waiting item, then keeps collecting
+    until max_batch_size items are in or window_seconds have passed since it
+    took the first one, and calls score_fn(key, rows) once per key in the
+    batch with the rows stacked into one array. Every submitter gets a Future
+    with its own result (or the batch's exception).
+    """
+
+    def __init__(self, score_fn, max_batch_size: int = 64, window_seconds: float = 0.002):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self.queue = queue.Queue()
+        self._worker = threading.Thread(target=self.run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, row: np.ndarray, key=None) -> Future:
+        """
+        Queue one row; rows are only batched with rows of the same key
+        """
+        future = Future()
+        self.queue.put((key, row, future))
+        return future
+
+    def collect(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def process(self, batch: list) -> None:
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+
+        for items in groups.values():
+            try:
+                results = self.score_fn(items[0][0], np.vstack([row for _, row, _ in items]))
+                for (_, _, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+
+    def run(self) -> None:
+        while True:
+            first = self.queue.get()
+            if first is None:
+                break
+            self.process(self.collect(first))
+
+    def stop(self) -> None:
+        self.queue.put(None)
+        self._worker.join()
+
+
+class RowScorer:
+    """
+    Scores single wafers (one row of sensor readings) through the served
+    model pair, micro-batching concurrent requests into one vectorised
+    preprocessor + model call.
+
+    Rows use the layout returned by get_columns(): the sensors the
+    preprocessor keeps after pruning, in order. A row is either a JSON object
+    {sensor name: value} (missing sensors and nulls become NaN and are
+    imputed) or a JSON list / raw little-endian float array in that order.
+    """
+
+    def __init__(self, model_holder: ModelHolder,
+                 max_batch_size: int = ROW_SCORING_MAX_BATCH_SIZE,
+                 window_seconds: float = ROW_SCORING_WINDOW_MS / 1000,
+                 timeout_seconds: float = ROW_SCORING_TIMEOUT_SECONDS):
+        self.model_holder = model_holder
+        self.timeout_seconds = timeout_seconds
+        self.dtype = np.dtype(NUMERIC_DTYPE)
+        self._layout = (None, None, None)
+        self.batcher = MicroBatcher(self.score_rows, max_batch_size=max_batch_size, window_seconds=window_seconds)
+
+    def get_layout(self, pair: LoadedModel):
+        """
+        (columns, {column: position}) of the row layout for a model pair, cached per pair
+        """
+        cached_pair, columns, positions = self._layout
+        if cached_pair is pair:
+            return columns, positions
+
+        if pair.model is None:
+            raise FileNotFoundError("No trained model available, run /train first")
+        preprocessor = pair.preprocessor
+        columns = get_input_columns(preprocessor)
+        if columns is None:
+            columns = getattr(preprocessor, "feature_names_in_", None)
+        if columns is None:
+            n_features = getattr(preprocessor, "n_features_in_", None) or getattr(preprocessor, "n_features_in")
+            columns = [f"Sensor-{index + 1}" for index in range(n_features)]
+        columns = list(columns)
+        positions = {column: index for index, column in enumerate(columns)}
+
+        self._layout = (pair, columns, positions)
+        return columns, positions
+
+    def get_columns(self) -> list:
+        columns, _ = self.get_layout(self.model_holder.get())
+        return columns
+
+    def parse_row(self, payload, columns, positions) -> np.ndarray:
+        """
+        Turn a JSON object or list, or raw float bytes, into one row in the layout
+        """
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            values = np.frombuffer(payload, dtype=self.dtype.newbyteorder("<"))
+            if values.size != len(columns):
+                raise ValueError(f"Expected {len(columns)} {self.dtype.name} values, got {values.size}")
+            return values.astype(self.dtype).reshape(1, -1)
+
+        row = np.full((1, len(columns)), np.nan, dtype=self.dtype)
+        if isinstance(payload, dict):
+            for column, value in payload.items():
+                position = positions.get(column)
+                if position is not None and value is not None:
+                    row[0, position] = value
+        elif isinstance(payload, list):
+            if len(payload) != len(columns):
+                raise ValueError(f"Expected {len(columns)} values, got {len(payload)}")
+            row[0] = [np.nan if value is None else value for value in payload]
+        else:
+            raise ValueError("features must be an object of sensor values or a list in column order")
+        return row
+
+    def score_rows(self, pair: LoadedModel, rows: np.ndarray) -> np.ndarray:
+        preprocessor = pair.preprocessor
+        if not isinstance(preprocessor, FusedPreprocessor) and hasattr(preprocessor, "feature_names_in_"):
+            # sklearn steps fitted on named columns expect them back
+            columns, _ = self.get_layout(pair)
+            rows = pd.DataFrame(rows, columns=columns, copy=False)
+        return pair.model.predict(preprocessor.transform(rows))
+
+    def score(self, payload) -> int:
+        """
+        Score one row, waiting for the batch it lands in. Malformed rows raise
+        ValueError, so callers can tell them apart from scoring failures.
+        """
+        pair = self.model_holder.get()
+        columns, positions = self.get_layout(pair)
+        row = self.parse_row(payload, columns, positions)
+        try:
+            prediction = self.batcher.submit(row, key=pair).result(timeout=self.timeout_seconds)
+            return int(prediction)
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,27 +1,68 @@
 import sys,os
+import json
+import time
+from dataclasses import asdict
 
+from src.constant import CONTENT_STORE_RETENTION_DAYS
 from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation, DataTransformationConfig
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
 from src.entity.config_entity import DataIngestionConfig
+from src.entity.artifact_entity import DataTransformationArtifact
 from src.exception import CustomException
 from src.logger import logging
+from src.utils.content_store import ContentStore
+from src.utils.feature_store import FeatureStore
+from src.utils.pipeline_manifest import (
+    PipelineManifest,
+    reset_peak_rss,
+    get_peak_rss_mb,
+    get_children_peak_rss_mb,
+)
 import sys
 
+
+def config_values(config) -> dict:
+    """
+    The settings of a config object, class defaults overridden by instance values
+    """
+    values = {**vars(type(config)), **vars(config)}
+    return {name: value for name, value in values.items() if not name.startswith("_") and not callable(value)}
+
+
 class TraininingPipeline:
+    """
+    Ingestion -> transformation -> training, run as explicit stages.
+
+    Each stage declares an input hash (the content hashes of its upstream
+    outputs plus its own settings) and its output files, recorded in
+    artifacts/pipeline_manifest.json. A rerun skips every stage that is up to
+    date and resumes from the first stale or failed one. Wall time and peak
+    memory of every stage are recorded in the manifest.
+
+    With TRAINING_MODE=incremental and a production model in place, the
+    model is instead continued on the new ingestion partitions (model_update
+    stage), with a full retrain every TRAINING_FULL_RETRAIN_EVERY updates.
+    """
+
     def __init__(self):
         """
         Initialize the TraininingPipeline with necessary configurations
         """
         # Initialize configuration objects
         self.data_ingestion_config = DataIngestionConfig()
+        self.data_transformation_config = DataTransformationConfig()
+        self.model_trainer_config = ModelTrainerConfig()
+        self.manifest = PipelineManifest()
         logging.info("Training pipeline initialized with configurations")
 
-    def start_data_ingestion(self):
+    def start_data_ingestion(self, data_ingestion=None):
         """
         Start the data ingestion process
         """
         try:
             logging.info("Starting data ingestion")
-            data_ingestion = DataIngestion(
+            data_ingestion = data_ingestion or DataIngestion(
                 data_ingestion_config=self.data_ingestion_config
             )
             feature_store_file_path = data_ingestion.initiate_data_ingestion()
@@ -31,22 +72,253 @@ class TraininingPipeline:
             logging.error(f"Error in data ingestion: {str(e)}")
             raise CustomException(e, sys)
 
+    def start_data_transformation(self, feature_store_file_path) -> DataTransformationArtifact:
+        """
+        Start the data transformation process
+        """
+        try:
+            logging.info("Starting data transformation")
+            data_transformation = DataTransformation(feature_store_file_path=feature_store_file_path)
+            data_transformation_artifact = data_transformation.initiate_data_transformation()
+            logging.info(f"Data transformation completed. Artifact: {data_transformation_artifact}")
+            return data_transformation_artifact
+        except Exception as e:
+            logging.error(f"Error in data transformation: {str(e)}")
+            raise CustomException(e, sys)
+
+    def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact):
+        """
+        Start the model training process
+        """
+        try:
+            logging.info("Starting model training")
+            model_trainer = ModelTrainer()
+            trained_model_path = model_trainer.initiate_model_trainer(data_transformation_artifact)
+            logging.info(f"Model training completed. Model file: {trained_model_path}")
+            return trained_model_path
+        except Exception as e:
+            logging.error(f"Error in model training: {str(e)}")
+            raise CustomException(e, sys)
+
+    def run_stage(self, stage: str, input_hash, run) -> dict:
+        """
+        Run one stage unless the manifest shows it is up to date for input_hash.
+        run() returns the stage outputs as {name: path}; the recorded (or reused)
+        outputs are returned as {name: {"path", "hash", ...}}.
+        """
+        outputs = self.manifest.get_outputs(stage, input_hash)
+        if outputs is not None:
+            logging.info(f"Stage {stage} is up to date, skipping")
+            self.manifest.record(stage, "skipped")
+            return outputs
+
+        reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            output_paths = run()
+        except Exception as e:
+            self.manifest.record(
+                stage, "failed", input_hash=input_hash,
+                wall_seconds=time.perf_counter() - start,
+                peak_rss_mb=get_peak_rss_mb(),
+                children_peak_rss_mb=get_children_peak_rss_mb(),
+                error=str(e),
+            )
+            raise
+
+        self.manifest.record(
+            stage, "completed", input_hash=input_hash, outputs=output_paths,
+            wall_seconds=time.perf_counter() - start,
+            peak_rss_mb=get_peak_rss_mb(),
+            children_peak_rss_mb=get_children_peak_rss_mb(),
+        )
+        logging.info(f"Stage {stage} completed: {self.manifest.run['stages'][stage]}")
+        return self.manifest.manifest["stages"][stage]["outputs"]
+
+    def run_ingestion_stage(self) -> dict:
+        """
+        Run data ingestion as a stage, keyed by a fingerprint of the source collection
+        """
+        # one DataIngestion, so the fingerprint and the export share one connection check
+        data_ingestion = DataIngestion(self.data_ingestion_config)
+        source_fingerprint = data_ingestion.get_source_fingerprint()
+        ingestion_outputs = self.run_stage(
+            "data_ingestion",
+            source_fingerprint,
+            lambda: {"feature_store_file_path": str(self.start_data_ingestion(data_ingestion))},
+        )
+        return ingestion_outputs["feature_store_file_path"]
+
+    def run_dtype_parity_check(self, feature_store: dict):
+        """
+        With NUMERIC_DTYPE=float32, compare float32 against float64 training on
+        the feature store before any model is trained on it. A drift in test
+        accuracy beyond dtype_parity_tolerance fails the run, or only logs a
+        warning with NUMERIC_DTYPE_PARITY_CHECK=warn. Returns the report, or
+        None when the check does not apply.
+        """
+        config = self.model_trainer_config
+        if self.data_transformation_config.numeric_dtype != "float32" or config.dtype_parity_check == "off":
+            return None
+
+        parity_outputs = self.run_stage(
+            "dtype_parity",
+            ContentStore.hash_values(
+                feature_store["hash"],
+                config.dtype_parity_model,
+                config.dtype_parity_tolerance,
+                config_values(self.data_transformation_config),
+            ),
+            lambda: {"report": ModelTrainer().save_numeric_dtype_parity_report(
+                feature_store["path"], model_name=config.dtype_parity_model, tolerance=config.dtype_parity_tolerance,
+            )},
+        )
+        with open(parity_outputs["report"]["path"], "r") as report_file:
+            report = json.load(report_file)
+
+        if not report["passed"]:
+            message = (
+                f"float32 test accuracy {report['float32_accuracy']:.4f} differs from float64 "
+                f"{report['float64_accuracy']:.4f} by more than {report['tolerance']} ({report['model_name']})"
+            )
+            if config.dtype_parity_check == "fail":
+                raise ValueError(f"{message}; set NUMERIC_DTYPE=float64 or NUMERIC_DTYPE_PARITY_CHECK=warn")
+            logging.warning(message)
+        return report
+
+    def run_full_training(self, feature_store: dict) -> str:
+        """
+        Transformation and training from scratch on the whole feature store
+        """
+        transformation_outputs = self.run_stage(
+            "data_transformation",
+            ContentStore.hash_values(feature_store["hash"], config_values(self.data_transformation_config)),
+            lambda: asdict(self.start_data_transformation(feature_store["path"])),
+        )
+
+        data_transformation_artifact = DataTransformationArtifact(
+            **{name: output["path"] for name, output in transformation_outputs.items()}
+        )
+        trainer_outputs = self.run_stage(
+            "model_trainer",
+            ContentStore.hash_values(
+                {name: output["hash"] for name, output in transformation_outputs.items()},
+                ContentStore.hash_file(self.model_trainer_config.model_config_file_path),
+                config_values(self.model_trainer_config),
+            ),
+            lambda: self.get_model_trainer_outputs(
+                self.start_model_trainer(data_transformation_artifact), feature_store["path"]
+            ),
+        )
+        return trainer_outputs["trained_model_path"]["path"]
+
+    def get_model_trainer_outputs(self, trained_model_path: str, feature_store_file_path: str) -> dict:
+        """
+        Outputs of the model_trainer stage: the model plus the files served or
+        read next to it. The flat ensemble and the fused preprocessor are
+        optional, so they are declared only when they were exported; a fused
+        preprocessor removed since the transformation stage ran is exported again.
+        """
+        data_transformation_config = self.data_transformation_config
+        if not os.path.exists(data_transformation_config.fused_object_file_path):
+            DataTransformation(feature_store_file_path=feature_store_file_path).export_fused_preprocessor()
+
+        outputs = {"trained_model_path": trained_model_path}
+        companions = {
+            "tree_ensemble": self.model_trainer_config.tree_ensemble_file_path,
+            "fused_preprocessor": data_transformation_config.fused_object_file_path,
+            "evaluation_report": self.model_trainer_config.evaluation_report_file_path,
+        }
+        for name, path in companions.items():
+            if os.path.exists(path):
+                outputs[name] = path
+        return outputs
+
+    def run_incremental_update(self, feature_store: dict):
+        """
+        Continue the production model on the feature store partitions it has
+        not seen yet. Returns the model path, or None when a full retrain is
+        due: every full_retrain_every updates, when the model or the new
+        batch cannot be updated in place, or when the update was rejected.
+        """
+        config = self.model_trainer_config
+        if not os.path.isdir(feature_store["path"]):
+            logging.info("Incremental training needs INGESTION_MODE=incremental, running a full retrain")
+            return None
+
+        model_trainer = ModelTrainer()
+        state = model_trainer.read_update_state()
+        if state["updates_since_full_retrain"] >= config.full_retrain_every:
+            logging.info(f"{state['updates_since_full_retrain']} updates since the last full retrain, retraining")
+            return None
+
+        new_partitions = [
+            path for path in FeatureStore.list_files(feature_store["path"])
+            if os.path.basename(path) not in state["consumed_partitions"]
+        ]
+        if not new_partitions:
+            logging.info("No new partitions since the last update, keeping the current model")
+            return config.trained_model_path
+
+        summary = {}
+
+        def update():
+            summary.update(model_trainer.initiate_incremental_update(new_partitions))
+            return {"trained_model_path": config.trained_model_path}
+
+        self.run_stage("model_update", None, update)
+        if summary["status"] != "replaced":
+            # a rejected update leaves model.pkl behind the new partitions, so they go into a full retrain
+            logging.info(f"Incremental update {summary['status']}, running a full retrain")
+            return None
+
+        state["updates_since_full_retrain"] += 1
+        state["consumed_partitions"] += [os.path.basename(path) for path in new_partitions]
+        state["history"] = (state["history"] + [summary])[-20:]
+        model_trainer.write_update_state(state)
+        return config.trained_model_path
+
     def run_pipeline(self):
         """
         Run the complete training pipeline
         """
         try:
             logging.info("Starting training pipeline")
-            # Start data ingestion
-            feature_store_file_path = self.start_data_ingestion()
-            
-            # Add other pipeline steps here as needed
-            # For example:
-            # self.start_data_transformation(feature_store_file_path)
-            # self.start_model_trainer()
-            
+            self.manifest.start_run()
+
+            try:
+                feature_store = self.run_ingestion_stage()
+                self.run_dtype_parity_check(feature_store)
+
+                trained_model_path = None
+                incremental = self.model_trainer_config.training_mode == "incremental"
+                if incremental and os.path.exists(self.model_trainer_config.trained_model_path):
+                    trained_model_path = self.run_incremental_update(feature_store)
+
+                if trained_model_path is None:
+                    trained_model_path = self.run_full_training(feature_store)
+                    if incremental:
+                        # the fresh model has seen every partition, updates start over
+                        ModelTrainer().write_update_state({
+                            "updates_since_full_retrain": 0,
+                            "consumed_partitions": [
+                                os.path.basename(path) for path in FeatureStore.list_files(feature_store["path"])
+                            ],
+                            "history": [],
+                        })
+
+            except Exception:
+                self.manifest.finish_run("failed")
+                raise
+
+            self.manifest.finish_run("completed")
+            if CONTENT_STORE_RETENTION_DAYS:
+                try:
+                    ContentStore().remove_unused_objects(CONTENT_STORE_RETENTION_DAYS)
+                except Exception as e:
+                    logging.warning(f"Content store cleanup failed: {str(e)}")
             logging.info("Training pipeline completed successfully")
-            return feature_store_file_path
+            return trained_model_path
         except Exception as e:
             logging.error(f"Error in training pipeline: {str(e)}")
             raise CustomException(e, sys)
@@ -54,5 +326,3 @@ class TraininingPipeline:
 
 # Ensure artifacts directory exists
 os.makedirs("artifacts", exist_ok=True)
-
-
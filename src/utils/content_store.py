@@ -0,0 +1,292 @@
+import sys
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+
+from src.constant import artifact_folder, CONTENT_STORE_RETENTION_DAYS
+from src.exception import CustomException
+from src.logger import logging
+
+
+class ContentStore:
+    """
+    Content-addressed store for artifacts shared across training runs.
+
+    objects/<h[:2]>/<h><ext>        one copy of every distinct artifact, keyed by its sha256
+    index/<stage>/<input_hash>.json the outputs a stage produced for a given input hash
+    refs/<h[:2]>/<h>.json           the run directory paths the object was linked to
+
+    Run directories reference objects through hard links (or copies where
+    links are not supported), so identical exports are stored once, and a
+    stage whose input hash is already indexed can restore its outputs
+    instead of recomputing them.
+
+    Because of the hard links, a linked output must only ever be replaced
+    (write a temp file, then os.replace), never rewritten in place. The index
+    keeps each object's size and mtime, and an object that no longer matches
+    them is treated as corrupt and dropped instead of being restored.
+    """
+
+    def __init__(self, root: str = os.path.join(artifact_folder, "cas")):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_dir = os.path.join(root, "index")
+        self.refs_dir = os.path.join(root, "refs")
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_path(path: str) -> str:
+        """
+        Hash a file, or a directory as the sorted (relative name, file hash) pairs
+        """
+        if not os.path.isdir(path):
+            return ContentStore.hash_file(path)
+
+        digest = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(dir_path, file_name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(ContentStore.hash_file(file_path).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_values(*values) -> str:
+        """
+        Hash json-serialisable values (stage parameters, upstream hashes)
+        """
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+    def object_path(self, digest: str, extension: str = "") -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + extension)
+
+    @staticmethod
+    def link(source_path: str, destination_path: str) -> None:
+        """
+        Make destination_path reference source_path, replacing whatever was there
+        """
+        os.makedirs(os.path.dirname(destination_path) or ".", exist_ok=True)
+        tmp_path = destination_path + ".link"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(source_path, tmp_path)
+        except OSError:
+            shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, destination_path)
+
+    def _refs_path(self, digest: str) -> str:
+        return os.path.join(self.refs_dir, digest[:2], digest + ".json")
+
+    def read_references(self, digest: str) -> list:
+        refs_path = self._refs_path(digest)
+        if not os.path.exists(refs_path):
+            return []
+        with open(refs_path, "r") as refs_file:
+            return json.load(refs_file)
+
+    def write_references(self, digest: str, paths: list) -> None:
+        refs_path = self._refs_path(digest)
+        if not paths:
+            if os.path.exists(refs_path):
+                os.remove(refs_path)
+            return
+        os.makedirs(os.path.dirname(refs_path), exist_ok=True)
+        with open(refs_path + ".tmp", "w") as refs_file:
+            json.dump(sorted(paths), refs_file, indent=2)
+        os.replace(refs_path + ".tmp", refs_path)
+
+    def add_reference(self, digest: str, destination_path: str) -> None:
+        """
+        Remember that destination_path was linked (or copied) from an object
+        """
+        paths = self.read_references(digest)
+        destination_path = os.path.abspath(destination_path)
+        if destination_path not in paths:
+            self.write_references(digest, paths + [destination_path])
+
+    def is_referenced_by(self, path: str, object_path: str, digest: str) -> bool:
+        """
+        Whether a recorded destination still holds the object: the same inode
+        for a hard link, the same content for a copy
+        """
+        if not os.path.isfile(path):
+            return False
+        if os.path.samefile(path, object_path):
+            return True
+        return os.path.getsize(path) == os.path.getsize(object_path) and self.hash_file(path) == digest
+
+    def put(self, file_path: str) -> str:
+        """
+        Store a file by content and replace it with a reference to the stored object
+        """
+        try:
+            digest = self.hash_file(file_path)
+            object_path = self.object_path(digest, os.path.splitext(file_path)[1])
+
+            # an existing object is only reused if it still holds the content it is named after
+            if os.path.exists(object_path) and (
+                os.path.samefile(object_path, file_path) or self.hash_file(object_path) == digest
+            ):
+                logging.info(f"{file_path} already stored as {digest[:12]}, deduplicating")
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = object_path + ".tmp"
+                shutil.copyfile(file_path, tmp_path)
+                os.replace(tmp_path, object_path)
+
+            self.link(object_path, file_path)
+            self.add_reference(digest, file_path)
+            return digest
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _index_path(self, stage: str, input_hash: str) -> str:
+        return os.path.join(self.index_dir, stage, input_hash + ".json")
+
+    def record(self, stage: str, input_hash: str, outputs: dict) -> dict:
+        """
+        Store a stage's output files and index them under the stage input hash
+        """
+        try:
+            entry = {}
+            for name, file_path in outputs.items():
+                digest = self.put(file_path)
+                extension = os.path.splitext(file_path)[1]
+                object_stat = os.stat(self.object_path(digest, extension))
+                entry[name] = {
+                    "hash": digest,
+                    "extension": extension,
+                    "size": object_stat.st_size,
+                    "mtime_ns": object_stat.st_mtime_ns,
+                }
+
+            index_path = self._index_path(stage, input_hash)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, "w") as index_file:
+                json.dump(entry, index_file, indent=2)
+            os.replace(tmp_path, index_path)
+
+            return entry
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def lookup(self, stage: str, input_hash: str):
+        """
+        Return the indexed outputs of a stage for this input hash, or None
+        """
+        index_path = self._index_path(stage, input_hash)
+        if not os.path.exists(index_path):
+            return None
+
+        with open(index_path, "r") as index_file:
+            entry = json.load(index_file)
+
+        for output in entry.values():
+            if not self.is_intact(output):
+                return None
+        return entry
+
+    def is_intact(self, output: dict) -> bool:
+        """
+        Check that an indexed object still exists and was not modified in place
+        """
+        object_path = self.object_path(output["hash"], output["extension"])
+        if not os.path.exists(object_path):
+            return False
+
+        object_stat = os.stat(object_path)
+        intact = (object_stat.st_size, object_stat.st_mtime_ns) == (output["size"], output["mtime_ns"])
+
+        if not intact:
+            logging.warning(f"Stored object {output['hash'][:12]} was modified in place, dropping it")
+            os.remove(object_path)
+        return intact
+
+    def restore(self, stage: str, input_hash: str, destinations: dict) -> bool:
+        """
+        Link a stage's cached outputs into place; returns False on a cache miss
+        """
+        entry = self.lookup(stage, input_hash)
+        if entry is None or set(destinations) - set(entry):
+            return False
+
+        for name, destination_path in destinations.items():
+            output = entry[name]
+            self.link(self.object_path(output["hash"], output["extension"]), destination_path)
+            self.add_reference(output["hash"], destination_path)
+
+        # mark the entry as used, so remove_unused_objects keeps it
+        os.utime(self._index_path(stage, input_hash))
+        logging.info(f"Restored cached outputs of {stage} for input {input_hash[:12]}")
+        return True
+
+    def remove_unused_objects(self, retention_days: float) -> int:
+        """
+        Garbage-collect the store: drop index entries not recorded or restored
+        within retention_days, then every object older than that which no
+        remaining entry references and no recorded run directory path still
+        holds, linked or copied. Returns the number of bytes freed.
+        """
+        try:
+            cutoff = time.time() - retention_days * 86400
+            referenced = set()
+            for dir_path, _, file_names in os.walk(self.index_dir):
+                for file_name in file_names:
+                    index_path = os.path.join(dir_path, file_name)
+                    if os.path.getmtime(index_path) < cutoff:
+                        os.remove(index_path)
+                        continue
+                    if file_name.endswith(".json"):
+                        with open(index_path, "r") as index_file:
+                            referenced.update(output["hash"] for output in json.load(index_file).values())
+
+            n_bytes = 0
+            n_objects = 0
+            for dir_path, _, file_names in os.walk(self.objects_dir):
+                for file_name in file_names:
+                    object_path = os.path.join(dir_path, file_name)
+                    object_stat = os.stat(object_path)
+                    digest = file_name.split(".")[0]
+                    if object_stat.st_mtime >= cutoff or digest in referenced:
+                        continue
+
+                    # forget the run directory paths that were deleted or now hold other content
+                    recorded = self.read_references(digest)
+                    paths = [path for path in recorded if self.is_referenced_by(path, object_path, digest)]
+                    if paths != recorded:
+                        self.write_references(digest, paths)
+                    if not paths:
+                        os.remove(object_path)
+                        n_bytes += object_stat.st_size
+                        n_objects += 1
+
+            logging.info(f"Removed {n_objects} unused objects ({n_bytes} bytes) from {self.root}")
+            return n_bytes
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Garbage-collect the content-addressed artifact store")
+    parser.add_argument("--root", default=os.path.join(artifact_folder, "cas"))
+    parser.add_argument("--retention-days", type=float, default=CONTENT_STORE_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    n_bytes = ContentStore(args.root).remove_unused_objects(args.retention_days)
+    print(f"Freed {n_bytes / 1024 ** 2:.1f} MB")
@@ -0,0 +1,317 @@
+import sys
+import os
+import glob
+import json
+import struct
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+FEATURE_STORE_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "npy": ".npy",
+}
+
+
+def _columns_sidecar_path(file_path: str) -> str:
+    return os.path.splitext(file_path)[0] + ".columns.json"
+
+
+def _npy_header(shape: tuple, header_size: int) -> bytes:
+    """
+    Build a version 1.0 .npy header for a little-endian float32 C-ordered matrix,
+    padded so that the header always occupies exactly header_size bytes
+    """
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': %r, }" % (tuple(shape),)
+    header = header.ljust(header_size - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def _write_columns_sidecar(file_path: str, columns: list) -> None:
+    sidecar_path = _columns_sidecar_path(file_path)
+    with open(sidecar_path + ".tmp", "w") as sidecar:
+        json.dump(columns, sidecar)
+    os.replace(sidecar_path + ".tmp", sidecar_path)
+
+
+class FeatureStoreWriter:
+    """
+    Writers fill file_path + ".tmp" and swap it into place on close; abort
+    discards it, so a failed export never replaces the previous file. Used as
+    a context manager, a writer closes on success and aborts on error.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def abort(self) -> None:
+        try:
+            self.release()
+        finally:
+            if os.path.exists(self.file_path + ".tmp"):
+                os.remove(self.file_path + ".tmp")
+
+
+class CsvFeatureStoreWriter(FeatureStoreWriter):
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.file_obj = open(file_path + ".tmp", "w", newline="")
+        self.n_rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.file_obj, header=(self.n_rows == 0), index=False)
+        self.n_rows += len(frame)
+
+    def release(self) -> None:
+        self.file_obj.close()
+
+    def close(self) -> None:
+        self.file_obj.close()
+        os.replace(self.file_path + ".tmp", self.file_path)
+
+
+class ParquetFeatureStoreWriter(FeatureStoreWriter):
+    def __init__(self, file_path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("The parquet feature store format requires pyarrow (pip install pyarrow)") from e
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.file_path = file_path
+        self.writer = None
+        self.n_rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.file_path + ".tmp", table.schema)
+        self.writer.write_table(table)
+        self.n_rows += len(frame)
+
+    def release(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+    def close(self) -> None:
+        if self.writer is None:
+            # nothing was written: still leave a valid, empty file behind
+            self.pq.write_table(self.pa.table({}), self.file_path + ".tmp")
+        else:
+            self.writer.close()
+        os.replace(self.file_path + ".tmp", self.file_path)
+
+
+class NpyFeatureStoreWriter(FeatureStoreWriter):
+    """
+    Appends float32 blocks to a raw .npy matrix and keeps the column names in a
+    json sidecar. The header is written with room for any row count and
+    rewritten with the final shape on close.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.file_obj = open(file_path + ".tmp", "wb")
+        self.columns = None
+        self.header_size = None
+        self.n_rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = [str(column) for column in frame.columns]
+            widest_header = _npy_header((10 ** 18, len(self.columns)), 0)
+            self.header_size = -(-len(widest_header) // 64) * 64
+            self.file_obj.write(_npy_header((0, len(self.columns)), self.header_size))
+        elif [str(column) for column in frame.columns] != self.columns:
+            raise ValueError("All blocks written to an npy feature store must share the same columns")
+
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+            frame = frame.apply(pd.to_numeric, errors="coerce")
+        block = frame.to_numpy(dtype="<f4")
+        self.file_obj.write(np.ascontiguousarray(block).tobytes())
+        self.n_rows += len(block)
+
+    def release(self) -> None:
+        self.file_obj.close()
+
+    def close(self) -> None:
+        columns = self.columns or []
+        if self.header_size is None:
+            self.header_size = 128
+        self.file_obj.seek(0)
+        self.file_obj.write(_npy_header((self.n_rows, len(columns)), self.header_size))
+        self.file_obj.close()
+
+        _write_columns_sidecar(self.file_path, columns)
+        os.replace(self.file_path + ".tmp", self.file_path)
+
+
+class FeatureStore:
+    """
+    Reads and writes the sensor feature store in one of the supported formats.
+
+    csv     : plain text, the original format
+    parquet : columnar, preserves dtypes (requires pyarrow)
+    npy     : raw float32 matrix plus a .columns.json sidecar, memory-mappable
+
+    A feature store path is either a single file or a directory of
+    part-NNNNN.<ext> partitions (incremental ingestion).
+    """
+
+    writers = {
+        "csv": CsvFeatureStoreWriter,
+        "parquet": ParquetFeatureStoreWriter,
+        "npy": NpyFeatureStoreWriter,
+    }
+
+    def __init__(self, file_format: str = "csv"):
+        if file_format not in FEATURE_STORE_EXTENSIONS:
+            raise ValueError(f"Unsupported feature store format: {file_format}")
+        self.file_format = file_format
+        self.extension = FEATURE_STORE_EXTENSIONS[file_format]
+
+    def open_writer(self, file_path: str):
+        return self.writers[self.file_format](file_path)
+
+    @staticmethod
+    def format_of(file_path: str) -> str:
+        extension = os.path.splitext(file_path)[1]
+        for file_format, format_extension in FEATURE_STORE_EXTENSIONS.items():
+            if extension == format_extension:
+                return file_format
+        raise ValueError(f"Unknown feature store file type: {file_path}")
+
+    @staticmethod
+    def list_files(feature_store_path: str) -> list:
+        """
+        Return the data files of a feature store, in partition order
+        """
+        if not os.path.isdir(feature_store_path):
+            return [feature_store_path]
+
+        partition_paths = []
+        for extension in FEATURE_STORE_EXTENSIONS.values():
+            partition_paths.extend(glob.glob(os.path.join(feature_store_path, f"part-*{extension}")))
+        return sorted(partition_paths)
+
+    @staticmethod
+    def read_columns(file_path: str) -> list:
+        file_format = FeatureStore.format_of(file_path)
+        if file_format == "npy":
+            with open(_columns_sidecar_path(file_path), "r") as sidecar:
+                return json.load(sidecar)
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_schema(file_path).names
+        return pd.read_csv(file_path, nrows=0).columns.to_list()
+
+    @staticmethod
+    def iter_file_chunks(file_path: str, chunksize: int, columns: list = None):
+        file_format = FeatureStore.format_of(file_path)
+
+        if file_format == "csv":
+            for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=columns):
+                yield chunk if columns is None else chunk[columns]
+
+        elif file_format == "parquet":
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(file_path)
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+
+        else:
+            all_columns = FeatureStore.read_columns(file_path)
+            matrix = np.load(file_path, mmap_mode="r")
+            if columns is None:
+                columns, column_index = all_columns, slice(None)
+            else:
+                column_index = [all_columns.index(column) for column in columns]
+            for start in range(0, matrix.shape[0], chunksize):
+                block = np.array(matrix[start:start + chunksize, column_index])
+                yield pd.DataFrame(block, columns=columns, copy=False)
+
+    @staticmethod
+    def read_file(file_path: str, columns: list = None, dtype=None) -> pd.DataFrame:
+        file_format = FeatureStore.format_of(file_path)
+
+        if file_format == "csv":
+            data = pd.read_csv(file_path, usecols=columns, dtype=dtype)
+            return data if columns is None else data[columns]
+
+        if file_format == "parquet":
+            data = pd.read_parquet(file_path, columns=columns)
+            return data if dtype is None else data.astype(dtype, copy=False)
+
+        all_columns = FeatureStore.read_columns(file_path)
+        matrix = np.load(file_path, mmap_mode="r")
+        if columns is None:
+            return pd.DataFrame(np.array(matrix, dtype=dtype), columns=all_columns, copy=False)
+        column_index = [all_columns.index(column) for column in columns]
+        return pd.DataFrame(np.array(matrix[:, column_index], dtype=dtype), columns=columns, copy=False)
+
+    @staticmethod
+    def read(feature_store_path: str, columns: list = None, dtype=None) -> pd.DataFrame:
+        """
+        Read a feature store file or partition directory, optionally projecting
+        columns and reading them directly as dtype
+        """
+        try:
+            frames = [FeatureStore.read_file(path, columns=columns, dtype=dtype)
+                      for path in FeatureStore.list_files(feature_store_path)]
+            if len(frames) == 1:
+                return frames[0]
+            return pd.concat(frames, ignore_index=True)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def iter_chunks(feature_store_path: str, chunksize: int = 10000, columns: list = None):
+        """
+        Stream a feature store file or partition directory as DataFrame chunks
+        """
+        for path in FeatureStore.list_files(feature_store_path):
+            yield from FeatureStore.iter_file_chunks(path, chunksize=chunksize, columns=columns)
+
+    def convert(self, source_path: str, destination_path: str, chunksize: int = 10000) -> str:
+        """
+        Convert an existing feature store (e.g. a csv store) into this format chunk by chunk
+        """
+        try:
+            logging.info(f"Converting feature store {source_path} to {self.file_format}: {destination_path}")
+
+            with self.open_writer(destination_path) as writer:
+                for chunk in self.iter_chunks(source_path, chunksize=chunksize):
+                    writer.write(chunk)
+
+            logging.info(f"Converted {writer.n_rows} rows to {destination_path}")
+            return destination_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a feature store to another format")
+    parser.add_argument("source", help="existing feature store file or partition directory")
+    parser.add_argument("destination", help="output file, its extension selects the format")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    args = parser.parse_args()
+
+    FeatureStore(FeatureStore.format_of(args.destination)).convert(
+        args.source, args.destination, chunksize=args.chunksize
+    )
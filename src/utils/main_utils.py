@@ -1,6 +1,7 @@
 import sys
 from typing import Dict, Tuple
 import os
+import numpy as np
 import pandas as pd
 import pickle
 import yaml
@@ -75,14 +76,31 @@ class MainUtils:
         logging.info("Entered the save_object method of MainUtils class")
 
         try:
-            with open(file_path, "wb") as file_obj:
+            # write next to the target and swap it in, so readers never see a half-written file
+            tmp_file_path = file_path + ".tmp"
+            with open(tmp_file_path, "wb") as file_obj:
                 pickle.dump(obj, file_obj)
+            os.replace(tmp_file_path, file_path)
 
             logging.info("Exited the save_object method of MainUtils class")
 
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    @staticmethod
+    def save_numpy_array(file_path: str, array) -> None:
+        """
+        Save an array as .npy through a temp file, like save_object
+        """
+        try:
+            tmp_file_path = file_path + ".tmp"
+            with open(tmp_file_path, "wb") as file_obj:
+                np.save(file_obj, array)
+            os.replace(tmp_file_path, file_path)
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def load_object(self, file_path):
         """
         Load a pickle file from the given path
@@ -0,0 +1,150 @@
+import sys
+import os
+import json
+import resource
+from datetime import datetime
+
+from src.constant import artifact_folder
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.content_store import ContentStore
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the process peak RSS (Linux only), so the next reading covers one stage
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss_mb() -> float:
+    """
+    Peak RSS of this process since the last reset, or since it started
+    """
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def get_children_peak_rss_mb() -> float:
+    """
+    Largest peak RSS of any finished child process (e.g. parallel model evaluation)
+    """
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PipelineManifest:
+    """
+    Manifest of the staged training pipeline, kept in artifacts/pipeline_manifest.json.
+
+    For every stage it records the input hash the stage last completed with
+    and its output files (path, content hash, size, mtime). A stage is up to
+    date when its input hash is unchanged and its outputs are still in place;
+    outputs are compared by size and mtime first and only re-hashed when
+    those differ. Each run also appends what every stage did, its wall time
+    and peak memory.
+    """
+
+    max_runs = 20
+
+    def __init__(self, manifest_file_path: str = os.path.join(artifact_folder, "pipeline_manifest.json")):
+        self.manifest_file_path = manifest_file_path
+        self.manifest = {"stages": {}, "runs": []}
+        if os.path.exists(manifest_file_path):
+            with open(manifest_file_path, "r") as manifest_file:
+                self.manifest = json.load(manifest_file)
+        self.run = None
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.manifest_file_path) or ".", exist_ok=True)
+            tmp_file_path = self.manifest_file_path + ".tmp"
+            with open(tmp_file_path, "w") as manifest_file:
+                json.dump(self.manifest, manifest_file, indent=2)
+            os.replace(tmp_file_path, self.manifest_file_path)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def start_run(self) -> None:
+        self.run = {"started_at": datetime.now().isoformat(), "status": "running", "stages": {}}
+        self.manifest["runs"] = (self.manifest["runs"] + [self.run])[-self.max_runs:]
+        self.save()
+
+    def finish_run(self, status: str) -> None:
+        self.run.update(status=status, finished_at=datetime.now().isoformat())
+        self.save()
+
+    @staticmethod
+    def describe_output(path: str, digest: str = None) -> dict:
+        stat = os.stat(path)
+        return {
+            "path": path,
+            "hash": digest or ContentStore.hash_path(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    @staticmethod
+    def output_is_current(output: dict) -> bool:
+        path = output["path"]
+        if not os.path.exists(path):
+            return False
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            if stat.st_size == output["size"] and stat.st_mtime_ns == output["mtime_ns"]:
+                return True
+        return ContentStore.hash_path(path) == output["hash"]
+
+    def get_outputs(self, stage: str, input_hash: str):
+        """
+        Return the stage's recorded outputs if it is up to date for input_hash, else None
+        """
+        entry = self.manifest["stages"].get(stage)
+        if input_hash is None or entry is None or entry["status"] != "completed" or entry["input_hash"] != input_hash:
+            return None
+        if not all(self.output_is_current(output) for output in entry["outputs"].values()):
+            logging.info(f"Outputs of stage {stage} changed since it last ran")
+            return None
+        return entry["outputs"]
+
+    def record(self, stage: str, status: str, input_hash=None, outputs=None, wall_seconds=0.0,
+               peak_rss_mb=None, children_peak_rss_mb=None, error=None) -> None:
+        """
+        Record what a stage did in this run; completed stages also update the stage state
+        """
+        usage = {
+            "status": status,
+            "wall_seconds": round(wall_seconds, 3),
+            "peak_rss_mb": None if peak_rss_mb is None else round(peak_rss_mb, 1),
+            "children_peak_rss_mb": None if children_peak_rss_mb is None else round(children_peak_rss_mb, 1),
+        }
+        if error is not None:
+            usage["error"] = error
+        self.run["stages"][stage] = usage
+
+        if status == "completed":
+            self.manifest["stages"][stage] = {
+                "status": status,
+                "input_hash": input_hash,
+                "outputs": {name: self.describe_output(path) for name, path in outputs.items()},
+                "finished_at": datetime.now().isoformat(),
+            }
+        elif status == "failed":
+            entry = self.manifest["stages"].setdefault(stage, {"outputs": {}})
+            entry.update(status=status, input_hash=input_hash, error=error, finished_at=datetime.now().isoformat())
+
+        self.save()
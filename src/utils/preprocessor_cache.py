@@ -0,0 +1,94 @@
+import sys
+import os
+import hashlib
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.constant import artifact_folder
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.main_utils import MainUtils
+
+
+class PreprocessorCache:
+    """
+    On-disk cache of fitted preprocessors, keyed by a fingerprint of the
+    training split (row count, columns, dtypes, content hash) and the
+    preprocessor parameters. Entries are evicted least recently used first
+    once more than max_entries are stored.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join(artifact_folder, "preprocessor_cache"), max_entries: int = 8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.utils = MainUtils()
+
+    @staticmethod
+    def fingerprint(X: pd.DataFrame, preprocessor) -> str:
+        digest = hashlib.sha256()
+        digest.update(str(X.shape[0]).encode())
+        digest.update(repr(list(X.columns)).encode())
+
+        # hash column by column so only one column is ever copied at a time
+        for column in X.columns:
+            values = np.ascontiguousarray(X[column].to_numpy())
+            digest.update(values.dtype.str.encode())
+            digest.update(values.tobytes())
+
+        params = preprocessor.get_params(deep=True)
+        digest.update(repr(sorted(
+            (name, repr(value)) for name, value in params.items() if not hasattr(value, "get_params")
+        )).encode())
+        digest.update(repr([name for name, _ in getattr(preprocessor, "steps", [])]).encode())
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str):
+        """
+        Return the cached fitted preprocessor for key, or None
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with open(entry_path, "rb") as file_obj:
+                preprocessor = pickle.load(file_obj)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable preprocessor cache entry {entry_path}: {str(e)}")
+            os.remove(entry_path)
+            return None
+
+        # mark as recently used
+        os.utime(entry_path)
+        logging.info(f"Preprocessor cache hit: {key[:12]}")
+        return preprocessor
+
+    def put(self, key: str, preprocessor) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.utils.save_object(file_path=self._entry_path(key), obj=preprocessor)
+            self.evict()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries beyond max_entries
+        """
+        entries = [
+            os.path.join(self.cache_dir, file_name)
+            for file_name in os.listdir(self.cache_dir)
+            if file_name.endswith(".pkl")
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+
+        for entry_path in entries[self.max_entries:]:
+            logging.info(f"Evicting preprocessor cache entry {entry_path}")
+            os.remove(entry_path)
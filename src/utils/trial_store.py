@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import time
+import hashlib
+
+import numpy as np
+
+from src.constant import artifact_folder
+from src.exception import CustomException
+from src.logger import logging
+
+
+class TrialStore:
+    """
+    On-disk store of hyperparameter trials shared across training runs.
+
+    Every cross-validated parameter combination is stored as one json file
+    keyed by the training data fingerprint, the estimator (name and fixed
+    parameters), the searched parameters and the CV scheme, holding its fold
+    scores and fit time. Entries older than max_age_days are invalid and
+    removed; once the store grows past max_bytes the oldest entries go first.
+    """
+
+    def __init__(self, root: str = os.path.join(artifact_folder, "trial_cache"),
+                 max_bytes: int = 64 * 1024 * 1024, max_age_days: float = 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    @staticmethod
+    def fingerprint(X, y) -> str:
+        """
+        Hash the training data block by block, so memory-mapped arrays are never loaded whole
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((X.shape, X.dtype.str, y.shape, y.dtype.str)).encode())
+
+        n_rows = max(1, (16 * 1024 * 1024) // max(X[:1].nbytes, 1))
+        for start in range(0, len(X), n_rows):
+            digest.update(np.ascontiguousarray(X[start:start + n_rows]).tobytes())
+        digest.update(np.ascontiguousarray(y).tobytes())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def trial_key(dataset: str, model: str, params: dict, cv: str) -> str:
+        return hashlib.sha256(
+            json.dumps([dataset, model, params, cv], sort_keys=True, default=repr).encode()
+        ).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def _is_expired(self, entry_path: str) -> bool:
+        return time.time() - os.path.getmtime(entry_path) > self.max_age_days * 24 * 3600
+
+    def get(self, key: str):
+        """
+        Return the stored trial for key, or None if it is missing or expired
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+
+        if self._is_expired(entry_path):
+            os.remove(entry_path)
+            return None
+
+        try:
+            with open(entry_path, "r") as entry_file:
+                return json.load(entry_file)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable trial {entry_path}: {str(e)}")
+            os.remove(entry_path)
+            return None
+
+    def put(self, key: str, trial: dict) -> None:
+        try:
+            entry_path = self._entry_path(key)
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+            tmp_path = entry_path + ".tmp"
+            with open(tmp_path, "w") as entry_file:
+                json.dump(trial, entry_file, default=repr)
+            os.replace(tmp_path, entry_path)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def evict(self) -> None:
+        """
+        Remove expired trials, then the oldest ones until the store fits in max_bytes
+        """
+        if not os.path.isdir(self.root):
+            return
+
+        entries = []
+        for dir_path, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                if file_name.endswith(".json"):
+                    entry_path = os.path.join(dir_path, file_name)
+                    if self._is_expired(entry_path):
+                        os.remove(entry_path)
+                    else:
+                        entries.append((os.path.getmtime(entry_path), os.path.getsize(entry_path), entry_path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        n_evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(entry_path)
+            total_bytes -= size
+            n_evicted += 1
+
+        if n_evicted:
+            logging.info(f"Evicted {n_evicted} trials from {self.root}")
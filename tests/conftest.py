@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_data import iter_wafer_chunks, write_feature_store
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Run the test inside its own directory, artifact paths in the configs are relative
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def wafer_frame():
+    """
+    A small synthetic wafer batch with the target column, as stored by ingestion
+    """
+    chunk = next(iter_wafer_chunks(400, n_sensors=40, bad_ratio=0.2, seed=1))
+    return chunk.drop(columns="Unnamed: 0").astype(np.float32)
+
+
+@pytest.fixture
+def feature_store_file(workdir):
+    return write_feature_store("feature_store/sensor_data.csv", 400, n_sensors=40, bad_ratio=0.2, seed=1)
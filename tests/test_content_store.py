@@ -0,0 +1,112 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.content_store import ContentStore
+from src.utils.feature_store import FeatureStore
+
+
+@pytest.fixture
+def store(workdir):
+    return ContentStore(os.path.join("artifacts", "cas"))
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file_obj:
+        file_obj.write(content)
+
+
+def assert_objects_match_their_names(store):
+    for dir_path, _, file_names in os.walk(store.objects_dir):
+        for file_name in file_names:
+            assert ContentStore.hash_file(os.path.join(dir_path, file_name)) == file_name.split(".")[0]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "npy", "parquet"])
+def test_rewriting_a_linked_feature_store_keeps_the_stored_object(store, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    feature_store = FeatureStore(file_format)
+    path = "feature_store/sensor_data" + feature_store.extension
+    os.makedirs("feature_store")
+
+    for seed in (0, 1):
+        with feature_store.open_writer(path) as writer:
+            writer.write(pd.DataFrame(np.random.default_rng(seed).random((20, 3)), columns=["a", "b", "c"]))
+        store.put(path)
+
+    assert_objects_match_their_names(store)
+    assert len(os.listdir(os.path.join(store.objects_dir))) >= 1
+
+
+def test_outputs_modified_in_place_are_not_restored(store):
+    write_file("run/output.txt", "first run")
+    store.record("stage", "input", {"output": "run/output.txt"})
+
+    # a writer that ignores the rule and truncates the shared inode
+    with open("run/output.txt", "w") as output_file:
+        output_file.write("second run")
+
+    assert store.lookup("stage", "input") is None
+    assert not store.restore("stage", "input", {"output": "elsewhere/output.txt"})
+    assert_objects_match_their_names(store)
+
+
+def test_restore_links_identical_content(store):
+    write_file("run/output.txt", "content")
+    entry = store.record("stage", "input", {"output": "run/output.txt"})
+
+    assert store.restore("stage", "input", {"output": "next_run/output.txt"})
+    assert ContentStore.hash_file("next_run/output.txt") == entry["output"]["hash"]
+
+
+def test_remove_unused_objects(store):
+    write_file("run/indexed.txt", "indexed output")
+    recent_entry = store.record("stage", "recent", {"output": "run/indexed.txt"})
+    write_file("run/stale.txt", "stale output")
+    stale_entry = store.record("stage", "stale", {"output": "run/stale.txt"})
+    write_file("run/linked.txt", "linked export")
+    linked_digest = store.put("run/linked.txt")
+
+    # the stale entry was never used again and its run directory is gone
+    old = time.time() - 30 * 86400
+    recent_object = store.object_path(recent_entry["output"]["hash"], ".txt")
+    for dir_path, _, file_names in os.walk(store.root):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            if path not in (recent_object, store._index_path("stage", "recent")):
+                os.utime(path, (old, old))
+    os.remove("run/stale.txt")
+    os.remove("run/indexed.txt")
+
+    assert store.remove_unused_objects(retention_days=7) == len("stale output")
+    assert store.lookup("stage", "stale") is None
+    assert not os.path.exists(store.object_path(stale_entry["output"]["hash"], ".txt"))
+    assert store.restore("stage", "recent", {"output": "run/indexed.txt"})
+    assert os.path.exists(store.object_path(linked_digest, ".txt"))
+
+
+def test_remove_unused_objects_keeps_objects_copied_into_runs(store, monkeypatch):
+    def fail_link(source, destination):
+        raise OSError("hard links are not supported here")
+
+    monkeypatch.setattr(os, "link", fail_link)
+    write_file("run/copied.txt", "copied export")
+    digest = store.put("run/copied.txt")
+    object_path = store.object_path(digest, ".txt")
+    assert os.stat(object_path).st_nlink == 1
+
+    old = time.time() - 30 * 86400
+    os.utime(object_path, (old, old))
+    assert store.remove_unused_objects(retention_days=7) == 0
+    assert os.path.exists(object_path)
+
+    # once the run's copy holds other content nothing references the object
+    write_file("run/copied.txt", "rewritten")
+    assert store.remove_unused_objects(retention_days=7) == len("copied export")
+    assert not os.path.exists(object_path)
+    assert store.read_references(digest) == []
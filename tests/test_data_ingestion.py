@@ -0,0 +1,164 @@
+import os
+import random
+from types import SimpleNamespace
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+from pymongo.errors import AutoReconnect
+
+from src.components.data_ingestion import DataIngestion
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.entity.config_entity import DataIngestionConfig
+from src.utils.feature_store import FeatureStore
+
+
+def insert_frame(collection, frame):
+    documents = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    collection.insert_many(documents)
+
+
+@pytest.fixture
+def collection(workdir, wafer_frame):
+    collection = mongomock.MongoClient()["wafer_test"]["waferfault"]
+    insert_frame(collection, wafer_frame)
+    return collection
+
+
+def make_ingestion(collection, **config):
+    data_ingestion = DataIngestion(DataIngestionConfig(batch_size=64, **config))
+    data_ingestion.get_mongo_collection = lambda **kwargs: collection
+    return data_ingestion
+
+
+def read_store(path):
+    return FeatureStore.read(path).astype(np.float32)
+
+
+@pytest.mark.parametrize("feature_store_format", ["csv", "npy"])
+def test_stream_export_round_trips(collection, wafer_frame, feature_store_format):
+    path = make_ingestion(collection, export_mode="stream", feature_store_format=feature_store_format).initiate_data_ingestion()
+
+    pd.testing.assert_frame_equal(read_store(path), wafer_frame.reset_index(drop=True))
+
+
+def test_parallel_export_matches_stream_export(collection, wafer_frame):
+    path = make_ingestion(collection, export_mode="parallel", export_workers=3).initiate_data_ingestion()
+
+    pd.testing.assert_frame_equal(read_store(path), wafer_frame.reset_index(drop=True))
+
+
+def test_split_points_balance_the_ranges(collection):
+    data_ingestion = make_ingestion(collection)
+    split_points = data_ingestion.get_split_points(collection, 4)
+
+    assert len(split_points) == 3
+    assert split_points == sorted(split_points)
+    bounds = [None] + split_points + [None]
+    counts = []
+    for lower, upper in zip(bounds[:-1], bounds[1:]):
+        id_range = {}
+        if lower is not None:
+            id_range["$gte"] = lower
+        if upper is not None:
+            id_range["$lt"] = upper
+        counts.append(collection.count_documents({"_id": id_range} if id_range else {}))
+    assert counts == [100, 100, 100, 100]
+
+
+def test_split_points_come_from_a_server_side_sample(collection):
+    random.seed(0)
+    # only an aggregation is available: the collection is never scanned from the client
+    aggregate_only = SimpleNamespace(aggregate=collection.aggregate)
+    split_points = make_ingestion(collection, split_samples=25).get_split_points(aggregate_only, 4)
+
+    ids = [document["_id"] for document in collection.aggregate([{"$sort": {"_id": 1}}])]
+    positions = [0] + [ids.index(split_point) for split_point in split_points] + [len(ids)]
+    counts = np.diff(positions)
+    assert len(counts) == 4 and counts.min() >= 50 and counts.max() <= 150
+
+
+def test_split_points_of_a_tiny_collection(workdir):
+    collection = mongomock.MongoClient()["wafer_test"]["tiny"]
+    collection.insert_many([{"Sensor-1": 1.0}, {"Sensor-1": 2.0}])
+
+    assert len(make_ingestion(collection).get_split_points(collection, 8)) == 1
+    assert make_ingestion(collection).get_split_points(mongomock.MongoClient()["wafer_test"]["empty"], 4) == []
+
+
+def test_incremental_ingestion_appends_only_new_documents(collection, wafer_frame):
+    first_path = make_ingestion(collection, ingestion_mode="incremental").initiate_data_ingestion()
+    assert FeatureStore.list_files(first_path)[-1].endswith("part-00000.csv")
+
+    new_rows = wafer_frame.head(25)
+    insert_frame(collection, new_rows)
+    path = make_ingestion(collection, ingestion_mode="incremental").initiate_data_ingestion()
+    partitions = FeatureStore.list_files(path)
+    assert len(partitions) == 2
+    pd.testing.assert_frame_equal(read_store(partitions[1]), new_rows.reset_index(drop=True))
+
+    # nothing new: no partition is added
+    make_ingestion(collection, ingestion_mode="incremental").initiate_data_ingestion()
+    assert len(FeatureStore.list_files(path)) == 2
+    expected = pd.concat([wafer_frame, new_rows], ignore_index=True)
+    pd.testing.assert_frame_equal(read_store(path), expected)
+
+
+def test_unreachable_mongo_is_pinged_once_per_ingestion(workdir, monkeypatch):
+    pings = []
+
+    def ping(self):
+        pings.append(self.database_name)
+        raise AutoReconnect("server down")
+
+    monkeypatch.setattr(MongoDBClient, "ping", ping)
+    data_ingestion = DataIngestion(DataIngestionConfig(export_mode="stream"))
+
+    assert data_ingestion.get_source_fingerprint() is None
+    path = data_ingestion.initiate_data_ingestion()
+
+    assert len(pings) == 1
+    assert len(FeatureStore.read(path)) > 0
+
+
+def test_startup_ping_is_not_retried(monkeypatch):
+    attempts = []
+
+    def command(name):
+        attempts.append(name)
+        raise AutoReconnect("server down")
+
+    client = SimpleNamespace(admin=SimpleNamespace(command=command))
+    monkeypatch.setattr(MongoDBClient, "get_client", lambda self: client)
+
+    with pytest.raises(AutoReconnect):
+        MongoDBClient().ping()
+    assert attempts == ["ping"]
+
+
+@pytest.mark.parametrize("feature_store_format", ["csv", "parquet", "npy"])
+def test_failed_export_keeps_the_previous_feature_store(collection, wafer_frame, feature_store_format):
+    if feature_store_format == "parquet":
+        pytest.importorskip("pyarrow")
+    data_ingestion = make_ingestion(collection, feature_store_format=feature_store_format)
+    path = "sensor_data" + data_ingestion.feature_store.extension
+    data_ingestion.export_collection_to_feature_store(collection, path)
+
+    # a field that first appears after the columns were fixed is an error, not silently dropped
+    collection.insert_one({"Sensor-1": 1.0, "Sensor-9999": 2.0})
+    with pytest.raises(ValueError, match="Sensor-9999"):
+        data_ingestion.export_collection_to_feature_store(collection, path)
+
+    assert not os.path.exists(path + ".tmp")
+    pd.testing.assert_frame_equal(read_store(path), wafer_frame.reset_index(drop=True))
+
+
+def test_later_documents_may_leave_fields_out(collection, wafer_frame):
+    collection.insert_one({"Sensor-1": 1.0})
+    data_ingestion = make_ingestion(collection)
+    data_ingestion.export_collection_to_feature_store(collection, "sensor_data.csv")
+
+    exported = read_store("sensor_data.csv")
+    assert len(exported) == len(wafer_frame) + 1
+    assert exported.iloc[-1]["Sensor-1"] == 1.0 and exported.iloc[-1].drop("Sensor-1").isna().all()
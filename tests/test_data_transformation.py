@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_data import write_feature_store
+from src.components.data_transformation import DataTransformation
+from src.utils.content_store import ContentStore
+
+
+def assert_objects_match_their_names(store):
+    n_objects = 0
+    for dir_path, _, file_names in os.walk(store.objects_dir):
+        for file_name in file_names:
+            assert ContentStore.hash_file(os.path.join(dir_path, file_name)) == file_name.split(".")[0]
+            n_objects += 1
+    assert n_objects > 0
+
+
+def transform(feature_store_file, fit_mode="in_memory"):
+    data_transformation = DataTransformation(feature_store_file)
+    data_transformation.data_transformation_config.fit_mode = fit_mode
+    data_transformation.data_transformation_config.chunksize = 150
+    return data_transformation, data_transformation.initiate_data_transformation()
+
+
+@pytest.mark.parametrize("fit_mode", ["in_memory", "chunked"])
+def test_a_second_run_leaves_stored_outputs_intact(workdir, fit_mode):
+    first = write_feature_store("feature_store/first.csv", 400, n_sensors=40, bad_ratio=0.2, seed=1)
+    second = write_feature_store("feature_store/second.csv", 400, n_sensors=40, bad_ratio=0.2, seed=2)
+
+    data_transformation, artifact = transform(first, fit_mode)
+    first_train_features = np.load(artifact.train_features_file_path)
+    transform(second, fit_mode)
+    assert_objects_match_their_names(data_transformation.content_store)
+
+    # the first feature store is memoised: its outputs come back unchanged
+    _, artifact = transform(first, fit_mode)
+    np.testing.assert_array_equal(np.load(artifact.train_features_file_path), first_train_features)
+
+
+def test_unchanged_feature_store_restores_outputs(feature_store_file):
+    _, artifact = transform(feature_store_file)
+    train_features = np.load(artifact.train_features_file_path)
+    os.remove(artifact.train_features_file_path)
+
+    _, artifact = transform(feature_store_file)
+    np.testing.assert_array_equal(np.load(artifact.train_features_file_path), train_features)
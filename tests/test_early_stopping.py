@@ -0,0 +1,78 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.model_selection import GridSearchCV, train_test_split
+from xgboost import XGBClassifier
+
+from src.components.early_stopping import EarlyStoppingXGBClassifier, get_boosting_rounds
+
+
+@pytest.fixture(scope="module")
+def noisy():
+    # mostly noise, so the validation loss stops improving after a few rounds
+    rng = np.random.default_rng(0)
+    X = rng.random((600, 6)).astype(np.float32)
+    y = ((X[:, 0] + rng.normal(scale=0.6, size=len(X))) > 0.5).astype(int)
+    return X, y
+
+
+def make_model(**params):
+    params = {"n_estimators": 300, "learning_rate": 0.3, "early_stopping_rounds": 5, "random_state": 0, **params}
+    return EarlyStoppingXGBClassifier(validation_fraction=0.2, **params)
+
+
+def test_clone_and_get_params_round_trip():
+    model = make_model(max_depth=3)
+    params = model.get_params()
+
+    assert params["validation_fraction"] == 0.2 and params["early_stopping_rounds"] == 5
+    assert clone(model).get_params() == params
+    assert EarlyStoppingXGBClassifier(**params).get_params() == params
+    assert clone(model).set_params(validation_fraction=0.3).get_params()["validation_fraction"] == 0.3
+    assert "validation_fraction" not in model.get_xgb_params()
+
+
+def test_booster_is_cut_back_to_the_best_round(noisy):
+    X, y = noisy
+    model = make_model().fit(X, y)
+    # the same split and rounds, without cutting the booster back
+    uncut = make_model()
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X, y, test_size=0.2, stratify=y, random_state=0)
+    XGBClassifier.fit(uncut, X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+
+    assert model.n_rounds_ == uncut.best_iteration + 1 < uncut.get_booster().num_boosted_rounds()
+    assert model.get_booster().num_boosted_rounds() == model.n_rounds_
+    assert get_boosting_rounds(model) == model.n_rounds_
+    np.testing.assert_array_equal(
+        model.predict_proba(X), uncut.predict_proba(X, iteration_range=(0, model.n_rounds_))
+    )
+    # the cut booster is what gets saved
+    assert pickle.loads(pickle.dumps(model)).get_booster().num_boosted_rounds() == model.n_rounds_
+
+
+def test_without_early_stopping_every_round_is_kept(noisy):
+    X, y = noisy
+    model = make_model(n_estimators=20, early_stopping_rounds=None).fit(X, y)
+    assert model.n_rounds_ == 20
+
+    model = EarlyStoppingXGBClassifier(validation_fraction=0, n_estimators=15, early_stopping_rounds=5).fit(X, y)
+    assert model.n_rounds_ == 15
+
+
+def test_early_stopping_inside_grid_search(noisy):
+    X, y = noisy
+    search = GridSearchCV(make_model(), {"max_depth": [2, 3]}, cv=3).fit(X, y)
+
+    assert search.best_estimator_.n_rounds_ < 300
+    assert isinstance(search.best_estimator_, EarlyStoppingXGBClassifier)
+
+
+def test_boosting_rounds_of_other_models(noisy):
+    X, y = noisy
+    boosted = GradientBoostingClassifier(n_estimators=200, n_iter_no_change=3, random_state=0).fit(X, y)
+
+    assert get_boosting_rounds(boosted) == boosted.n_estimators_ < 200
+    assert get_boosting_rounds(object()) is None
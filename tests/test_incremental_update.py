@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import RobustScaler
+from sklearn.svm import SVC
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic_data import write_feature_store
+from src.components.data_transformation import DataTransformationConfig
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.pipeline.train_pipeline import TraininingPipeline
+from src.utils.content_store import ContentStore
+from src.utils.feature_store import FeatureStore
+from src.utils.main_utils import MainUtils
+
+
+def split_frame(frame):
+    return frame.drop(columns="Good/Bad"), np.where(frame["Good/Bad"] == -1, 0, 1)
+
+
+@pytest.fixture
+def production_model(workdir, wafer_frame):
+    """
+    Save a small random forest and its preprocessor as the production pair
+    and return a feature store directory holding one unseen partition
+    """
+    X, y = split_frame(wafer_frame)
+    preprocessor = Pipeline([("imputer", SimpleImputer(strategy="constant", fill_value=0)), ("scaler", RobustScaler())])
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(preprocessor.fit_transform(X), y)
+
+    os.makedirs(ModelTrainerConfig.artifact_folder, exist_ok=True)
+    utils = MainUtils()
+    utils.save_object(file_path=DataTransformationConfig.transformed_object_file_path, obj=preprocessor)
+    utils.save_object(file_path=ModelTrainerConfig.trained_model_path, obj=model)
+
+    write_feature_store("feature_store/part-00000.csv", 300, n_sensors=40, bad_ratio=0.2, seed=1)
+    return "feature_store"
+
+
+@pytest.mark.parametrize("model", [
+    XGBClassifier(n_estimators=5, max_depth=2),
+    RandomForestClassifier(n_estimators=5, random_state=0),
+    GradientBoostingClassifier(n_estimators=5, random_state=0),
+])
+def test_continue_training_adds_trees_to_a_copy(wafer_frame, model):
+    X, y = split_frame(wafer_frame.fillna(0))
+    model.fit(X, y)
+    before = model.predict_proba(X)
+
+    updated = ModelTrainer().continue_training(model, X, y)
+
+    assert updated is not model
+    np.testing.assert_array_equal(model.predict_proba(X), before)
+    if isinstance(model, XGBClassifier):
+        assert updated.get_booster().num_boosted_rounds() == 5 + ModelTrainerConfig.update_boosting_rounds
+    else:
+        assert len(updated.estimators_) == 5 + ModelTrainerConfig.update_trees
+        assert updated.warm_start is False
+
+
+def test_continue_training_skips_models_without_updates(wafer_frame):
+    X, y = split_frame(wafer_frame.fillna(0))
+    assert ModelTrainer().continue_training(SVC().fit(X, y), X, y) is None
+
+
+def test_accepted_update_replaces_the_model(production_model, monkeypatch):
+    monkeypatch.setattr(ModelTrainerConfig, "update_tolerance", 1.0)
+
+    summary = ModelTrainer().initiate_incremental_update(FeatureStore.list_files(production_model))
+
+    assert summary["status"] == "replaced"
+    model = MainUtils().load_object(ModelTrainerConfig.trained_model_path)
+    assert len(model.estimators_) == 10 + ModelTrainerConfig.update_trees
+
+
+def test_rejected_update_keeps_the_model(production_model, monkeypatch):
+    # no accuracy can be a whole point above the current one
+    monkeypatch.setattr(ModelTrainerConfig, "update_tolerance", -1.0)
+    model_hash = ContentStore.hash_file(ModelTrainerConfig.trained_model_path)
+
+    summary = ModelTrainer().initiate_incremental_update(FeatureStore.list_files(production_model))
+
+    assert summary["status"] == "rejected"
+    assert ContentStore.hash_file(ModelTrainerConfig.trained_model_path) == model_hash
+
+
+def test_batch_missing_a_class_requires_a_full_retrain(production_model):
+    batch = FeatureStore.read(FeatureStore.list_files(production_model)[0])
+    batch[batch["Good/Bad"] == -1].to_csv("good_only.csv", index=False)
+    model_hash = ContentStore.hash_file(ModelTrainerConfig.trained_model_path)
+
+    summary = ModelTrainer().initiate_incremental_update(["good_only.csv"])
+
+    assert summary["status"] == "full_retrain_required"
+    assert ContentStore.hash_file(ModelTrainerConfig.trained_model_path) == model_hash
+
+
+def test_model_type_without_updates_requires_a_full_retrain(production_model, wafer_frame):
+    X, y = split_frame(wafer_frame)
+    preprocessor = MainUtils().load_object(DataTransformationConfig.transformed_object_file_path)
+    MainUtils().save_object(file_path=ModelTrainerConfig.trained_model_path, obj=SVC().fit(preprocessor.transform(X), y))
+
+    summary = ModelTrainer().initiate_incremental_update(FeatureStore.list_files(production_model))
+
+    assert summary["status"] == "full_retrain_required"
+
+
+@pytest.mark.parametrize("tolerance, consumed", [(1.0, True), (-1.0, False)])
+def test_pipeline_consumes_partitions_of_accepted_updates_only(production_model, monkeypatch, tolerance, consumed):
+    monkeypatch.setattr(ModelTrainerConfig, "update_tolerance", tolerance)
+    pipeline = TraininingPipeline()
+    pipeline.manifest.start_run()
+
+    trained_model_path = pipeline.run_incremental_update({"path": production_model, "hash": None})
+
+    state = ModelTrainer().read_update_state()
+    if consumed:
+        assert trained_model_path == ModelTrainerConfig.trained_model_path
+        assert state["updates_since_full_retrain"] == 1
+        assert state["consumed_partitions"] == ["part-00000.csv"]
+    else:
+        # a rejected update falls back to a full retrain, the partition stays unconsumed
+        assert trained_model_path is None
+        assert state["updates_since_full_retrain"] == 0
+        assert state["consumed_partitions"] == []
@@ -0,0 +1,122 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from src.pipeline.model_holder import ModelHolder
+from src.utils.main_utils import MainUtils
+
+
+def fit_pair(n_features, seed=0):
+    """
+    A preprocessor and a model for n_features sensors, fitted on random rows
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(50, n_features)), columns=[f"Sensor-{i + 1}" for i in range(n_features)])
+    y = np.arange(50) % 2
+    preprocessor = StandardScaler().fit(X)
+    return LogisticRegression().fit(preprocessor.transform(X), y), preprocessor
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    paths = {
+        "model_file_path": str(tmp_path / "model.pkl"),
+        "preprocessor_file_path": str(tmp_path / "preprocessor.pkl"),
+        "fused_preprocessor_file_path": str(tmp_path / "fused_preprocessor.pkl"),
+        "tree_ensemble_file_path": str(tmp_path / "tree_ensemble.pkl"),
+    }
+    save_pair(paths, *fit_pair(5))
+    return paths
+
+
+def save_pair(paths, model, preprocessor):
+    # training writes the preprocessor first, so model.pkl is never older
+    utils = MainUtils()
+    utils.save_object(file_path=paths["preprocessor_file_path"], obj=preprocessor)
+    utils.save_object(file_path=paths["model_file_path"], obj=model)
+    preprocessor_mtime_ns = os.stat(paths["preprocessor_file_path"]).st_mtime_ns
+    if os.stat(paths["model_file_path"]).st_mtime_ns < preprocessor_mtime_ns:
+        os.utime(paths["model_file_path"], ns=(preprocessor_mtime_ns, preprocessor_mtime_ns))
+
+
+def make_holder(paths):
+    return ModelHolder(**paths, reload_interval_seconds=0, flat_inference_max_rows=0)
+
+
+def test_preprocessor_newer_than_its_model_is_not_served(artifacts):
+    holder = make_holder(artifacts)
+    served = holder.get()
+
+    # a retrain has written its preprocessor, the model is still being trained
+    _, preprocessor = fit_pair(8, seed=1)
+    MainUtils().save_object(file_path=artifacts["preprocessor_file_path"], obj=preprocessor)
+    model_mtime_ns = os.stat(artifacts["preprocessor_file_path"]).st_mtime_ns - 10**9
+    os.utime(artifacts["model_file_path"], ns=(model_mtime_ns, model_mtime_ns))
+
+    assert holder.get_version() is None
+    assert holder.reload_if_changed() is False
+    assert holder.get() is served
+
+
+def test_mismatched_pair_is_not_served(artifacts):
+    holder = make_holder(artifacts)
+    served = holder.get()
+
+    model, _ = fit_pair(5, seed=1)
+    _, preprocessor = fit_pair(8, seed=1)
+    save_pair(artifacts, model, preprocessor)
+
+    assert holder.get_version() is not None
+    assert holder.reload_if_changed() is False
+    assert holder.get() is served
+
+
+def test_complete_pair_is_swapped_in(artifacts):
+    holder = make_holder(artifacts)
+    old_model, old_preprocessor, old_version = holder.get()
+
+    save_pair(artifacts, *fit_pair(8, seed=1))
+
+    assert holder.reload_if_changed() is True
+    model, preprocessor, version = holder.get()
+    assert version != old_version
+    assert model.n_features_in_ == preprocessor.n_features_in_ == 8
+    # a request that took the old pair keeps a consistent pair
+    assert old_model.n_features_in_ == old_preprocessor.n_features_in_ == 5
+    assert holder.reload_if_changed() is False
+
+
+def test_hot_swap_is_atomic(artifacts):
+    holder = make_holder(artifacts)
+    stop = threading.Event()
+    errors = []
+    versions = set()
+
+    def serve():
+        while not stop.is_set():
+            model, preprocessor, version = holder.get()
+            try:
+                ModelHolder.check_pair(model, preprocessor)
+            except Exception as e:
+                errors.append(e)
+            versions.add(version)
+
+    readers = [threading.Thread(target=serve) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for swap in range(6):
+            save_pair(artifacts, *fit_pair(5 + swap % 2 * 3, seed=swap))
+            holder.reload_if_changed()
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert len(versions) > 1
@@ -0,0 +1,170 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.components.model_trainer import ModelTrainer
+from src.pipeline.train_pipeline import TraininingPipeline
+from src.utils.content_store import ContentStore
+
+
+def test_numeric_dtype_parity_report(feature_store_file):
+    report = ModelTrainer().check_numeric_dtype_parity(feature_store_file, "RandomForestClassifier", tolerance=0.05)
+
+    assert 0.5 < report["float64_accuracy"] <= 1.0
+    assert report["prediction_agreement"] > 0.9
+    assert report["passed"] is True
+
+
+@pytest.fixture
+def float32_pipeline(feature_store_file):
+    pipeline = TraininingPipeline()
+    pipeline.data_transformation_config.numeric_dtype = "float32"
+    pipeline.manifest.start_run()
+    feature_store = {"path": feature_store_file, "hash": ContentStore.hash_path(feature_store_file)}
+    return pipeline, feature_store
+
+
+def test_training_pipeline_stops_on_dtype_drift(float32_pipeline):
+    pipeline, feature_store = float32_pipeline
+    # no accuracy difference can be within a negative tolerance
+    pipeline.model_trainer_config.dtype_parity_tolerance = -1
+
+    with pytest.raises(ValueError, match="NUMERIC_DTYPE"):
+        pipeline.run_dtype_parity_check(feature_store)
+
+    pipeline.model_trainer_config.dtype_parity_check = "warn"
+    assert pipeline.run_dtype_parity_check(feature_store)["passed"] is False
+
+
+def test_parity_check_only_runs_for_float32(float32_pipeline):
+    pipeline, feature_store = float32_pipeline
+    assert pipeline.run_dtype_parity_check(feature_store)["passed"] is True
+
+    pipeline.data_transformation_config.numeric_dtype = "float64"
+    assert pipeline.run_dtype_parity_check(feature_store) is None
+
+
+@pytest.fixture
+def recording_trainer(workdir, monkeypatch):
+    """
+    A ModelTrainer whose cross-validation is replaced by a score derived from
+    the parameters, recording the (candidates, rows) of every evaluation
+    """
+    trainer = ModelTrainer()
+    evaluations = []
+
+    def evaluate_candidates(estimator, model_name, candidates, X, y, search_config, dataset, resources=""):
+        evaluations.append((len(candidates), len(X)))
+        return [{"fold_scores": [params.get("max_depth") or 0] * 5, "cached": False} for params in candidates]
+
+    monkeypatch.setattr(trainer, "evaluate_candidates", evaluate_candidates)
+    return trainer, evaluations
+
+
+def search(trainer, n_rows, resource="n_samples", **search_config):
+    param_grid = {"max_depth": [2, 4, 6], "min_samples_leaf": [1, 2, 4], "n_estimators": [10, 20, 30]}
+    search_config = dict(ModelTrainer.default_search_config, strategy="halving", resource=resource, **search_config)
+    candidates = trainer.get_candidates(param_grid, search_config)
+    X, y = np.zeros((n_rows, 1)), np.arange(n_rows) % 2
+    return trainer.successive_halving(
+        RandomForestClassifier(), "RandomForestClassifier", candidates, X, y, search_config, "dataset"
+    )
+
+
+def test_halving_on_a_small_dataset_evaluates_the_grid_once(recording_trainer):
+    trainer, evaluations = recording_trainer
+    best_params, _ = search(trainer, 100)
+
+    assert evaluations == [(27, 100)]
+    assert best_params["max_depth"] == 6
+
+
+def test_halving_on_a_large_dataset_subsamples_early_rounds(recording_trainer):
+    trainer, evaluations = recording_trainer
+    best_params, _ = search(trainer, 100000)
+
+    assert [n_candidates for n_candidates, _ in evaluations] == [27, 9, 3, 1]
+    assert evaluations[0][1] < evaluations[-1][1] == 100000
+    assert best_params["max_depth"] == 6
+
+
+def test_halving_over_n_estimators(recording_trainer):
+    trainer, evaluations = recording_trainer
+    best_params, _ = search(trainer, 100, resource="n_estimators")
+
+    # n_estimators is the resource: 9 distinct combinations of the other parameters
+    assert [n_candidates for n_candidates, _ in evaluations] == [9, 3, 1]
+    assert best_params["n_estimators"] == 30
+
+
+@pytest.mark.parametrize("max_fits", [5, 60, 100, 200])
+def test_max_fits_caps_every_halving_round(recording_trainer, max_fits):
+    trainer, evaluations = recording_trainer
+    search(trainer, 100000, max_fits=max_fits)
+
+    assert sum(n_candidates for n_candidates, _ in evaluations) * 5 <= max(max_fits, 5)
+
+
+@pytest.mark.parametrize("strategy", ["grid", "random"])
+def test_max_fits_caps_grid_and_random(strategy):
+    param_grid = {"max_depth": [2, 4, 6], "min_samples_leaf": [1, 2, 4]}
+    search_config = dict(ModelTrainer.default_search_config, strategy=strategy, max_fits=22)
+
+    assert len(ModelTrainer.get_candidates(param_grid, search_config)) * search_config["cv"] <= 22
+
+
+@pytest.mark.parametrize("strategy", ["grid", "random", "halving", "halving_random"])
+def test_time_budget_is_rejected_outside_budget_search(workdir, strategy):
+    model_config = {"model_selection": {"search": {"strategy": strategy, "time_budget_seconds": 60}}}
+
+    with pytest.raises(ValueError, match="time_budget_seconds"):
+        ModelTrainer().get_search_config(model_config)
+    model_config["model_selection"]["search"]["strategy"] = "budget"
+    assert ModelTrainer().get_search_config(model_config)["time_budget_seconds"] == 60
+
+
+class SlowClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Records the pid of the worker fitting it and then takes far longer than
+    any evaluation deadline
+    """
+
+    def __init__(self, pid_file_path="slow.pid", seconds=60):
+        self.pid_file_path = pid_file_path
+        self.seconds = seconds
+
+    def fit(self, X, y):
+        with open(self.pid_file_path, "w") as pid_file:
+            pid_file.write(str(os.getpid()))
+        time.sleep(self.seconds)
+        return self
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+def test_candidates_past_the_deadline_are_terminated(workdir):
+    trainer = ModelTrainer()
+    trainer.model_trainer_config.evaluation_workers = 2
+    trainer.model_trainer_config.evaluation_deadline_seconds = 3
+    rng = np.random.default_rng(0)
+    X, y = rng.random((200, 5)), rng.integers(0, 2, 200)
+    models = {"DecisionTreeClassifier": DecisionTreeClassifier(random_state=0), "SlowClassifier": SlowClassifier()}
+
+    start = time.monotonic()
+    results = trainer.evaluate_models_in_parallel(X[:150], y[:150], X[150:], y[150:], models)
+
+    assert time.monotonic() - start < 30
+    assert [result["model"] for result in results] == ["DecisionTreeClassifier", "SlowClassifier"]
+    assert results[0]["status"] == "ok" and 0 <= results[0]["score"] <= 1
+    assert results[1]["status"] == "timed_out" and "score" not in results[1]
+    # the straggler's worker was stopped, and the shared split was removed
+    with open("slow.pid") as pid_file:
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid_file.read()), 0)
+    assert not [name for name in os.listdir(trainer.model_trainer_config.evaluation_dir) if name.endswith(".npy")]
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from src.pipeline.train_pipeline import TraininingPipeline
+from src.utils.pipeline_manifest import PipelineManifest
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as output_file:
+        output_file.write(content)
+    return path
+
+
+@pytest.fixture
+def pipeline(workdir):
+    pipeline = TraininingPipeline()
+    pipeline.manifest.start_run()
+    return pipeline
+
+
+class CountingStage:
+    """
+    A stage that writes one output file and counts how often it ran
+    """
+
+    def __init__(self, path, fail=False):
+        self.path = path
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("stage failed")
+        return {"output": write_file(self.path, f"run {self.calls}")}
+
+
+def test_up_to_date_stage_is_skipped(pipeline):
+    stage = CountingStage("artifacts/stage.txt")
+
+    outputs = pipeline.run_stage("stage", "hash-1", stage)
+    assert pipeline.run_stage("stage", "hash-1", stage) == outputs
+    assert stage.calls == 1
+    assert pipeline.manifest.run["stages"]["stage"]["status"] == "skipped"
+
+    # a new input hash, or an output changed on disk, runs the stage again
+    pipeline.run_stage("stage", "hash-2", stage)
+    assert stage.calls == 2
+    write_file(stage.path, "edited")
+    pipeline.run_stage("stage", "hash-2", stage)
+    assert stage.calls == 3
+
+
+def test_rerun_resumes_from_the_failed_stage(pipeline):
+    first = CountingStage("artifacts/first.txt")
+    second = CountingStage("artifacts/second.txt", fail=True)
+
+    pipeline.run_stage("first", "hash-1", first)
+    with pytest.raises(RuntimeError):
+        pipeline.run_stage("second", "hash-2", second)
+    pipeline.manifest.finish_run("failed")
+
+    manifest = PipelineManifest()
+    assert manifest.manifest["stages"]["second"]["status"] == "failed"
+    assert manifest.get_outputs("second", "hash-2") is None
+
+    rerun = TraininingPipeline()
+    rerun.manifest.start_run()
+    second.fail = False
+    rerun.run_stage("first", "hash-1", first)
+    rerun.run_stage("second", "hash-2", second)
+
+    assert first.calls == 1
+    assert second.calls == 2
+    assert rerun.manifest.run["stages"]["first"]["status"] == "skipped"
+    assert rerun.manifest.run["stages"]["second"]["status"] == "completed"
+
+
+def test_model_trainer_declares_the_served_files(pipeline):
+    trainer_config = pipeline.model_trainer_config
+    model_path = write_file(trainer_config.trained_model_path, "model")
+    write_file(trainer_config.evaluation_report_file_path, "[]")
+    write_file(pipeline.data_transformation_config.fused_object_file_path, "fused")
+
+    # the flat ensemble is optional and was not exported
+    outputs = pipeline.get_model_trainer_outputs(model_path, "feature_store/sensor_data.csv")
+    assert outputs == {
+        "trained_model_path": model_path,
+        "fused_preprocessor": pipeline.data_transformation_config.fused_object_file_path,
+        "evaluation_report": trainer_config.evaluation_report_file_path,
+    }
+
+    pipeline.run_stage("model_trainer", "hash-1", lambda: outputs)
+    assert pipeline.manifest.get_outputs("model_trainer", "hash-1") is not None
+    os.remove(pipeline.data_transformation_config.fused_object_file_path)
+    assert pipeline.manifest.get_outputs("model_trainer", "hash-1") is None
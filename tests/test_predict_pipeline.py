@@ -0,0 +1,119 @@
+import io
+
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.components.preprocessing import SensorPruner
+from src.exception import CustomException
+from src.pipeline.model_holder import LoadedModel
+from src.pipeline.predict_pipeline import PredictionPipeline
+
+
+class StaticHolder:
+    def __init__(self, pair):
+        self.pair = pair
+
+    def get(self):
+        return self.pair
+
+
+@pytest.fixture
+def pipeline(workdir, wafer_frame):
+    features, target = wafer_frame.drop(columns="Good/Bad"), wafer_frame["Good/Bad"]
+    preprocessor = Pipeline([("imputer", SimpleImputer()), ("scaler", StandardScaler())]).fit(features)
+    model = LogisticRegression(max_iter=200).fit(preprocessor.transform(features), target)
+    return PredictionPipeline(None, model_holder=StaticHolder(LoadedModel(model, preprocessor, "v1")))
+
+
+def test_stream_scores_every_row_and_closes_the_input(pipeline, wafer_frame):
+    features = wafer_frame.drop(columns="Good/Bad")
+    input_stream = io.BytesIO(features.to_csv(index=False).encode())
+
+    output = "".join(pipeline.open_prediction_stream(input_stream, chunksize=64))
+    predicted = pd.read_csv(io.StringIO(output))
+
+    assert input_stream.closed
+    assert len(predicted) == len(features)
+    assert (predicted["prediction"].to_numpy() == pipeline.predict(features)).all()
+
+
+def test_empty_upload_closes_the_input(pipeline):
+    input_stream = io.BytesIO(b"")
+
+    with pytest.raises(CustomException):
+        pipeline.open_prediction_stream(input_stream)
+    assert input_stream.closed
+
+
+def test_scoring_errors_close_the_input(pipeline):
+    # the preprocessor was fitted on 40 sensors and only gets two
+    input_stream = io.BytesIO(b"Sensor-1,Sensor-2\n1,2\n")
+
+    with pytest.raises(CustomException):
+        list(pipeline.open_prediction_stream(input_stream))
+    assert input_stream.closed
+
+
+def test_stream_without_a_model_closes_the_input(workdir):
+    pipeline = PredictionPipeline(None, model_holder=StaticHolder(LoadedModel(None, None, None)))
+    input_stream = io.BytesIO(b"Sensor-1\n1\n")
+
+    with pytest.raises(CustomException):
+        pipeline.open_prediction_stream(input_stream)
+    assert input_stream.closed
+
+
+@pytest.fixture
+def pruned_upload(workdir, wafer_frame):
+    """
+    A pipeline whose preprocessor prunes two sensors, and an upload with a
+    wafer name column and those sensors
+    """
+    features, target = wafer_frame.drop(columns="Good/Bad"), wafer_frame["Good/Bad"]
+    features["Sensor-dead"] = 1.0
+    features["Sensor-copy"] = features["Sensor-3"]
+    preprocessor = Pipeline([
+        ("pruner", SensorPruner()), ("imputer", SimpleImputer()), ("scaler", StandardScaler()),
+    ]).fit(features)
+    model = LogisticRegression(max_iter=200).fit(preprocessor.transform(features), target)
+    pipeline = PredictionPipeline(None, model_holder=StaticHolder(LoadedModel(model, preprocessor, "v1")))
+
+    upload = features.copy()
+    upload.insert(0, "", [f"Wafer-{index}" for index in range(len(upload))])
+    return pipeline, upload
+
+
+def test_scoring_columns_leave_out_pruned_sensors(pruned_upload):
+    pipeline, upload = pruned_upload
+    header = ["Unnamed: 0"] + list(upload.columns[1:])
+
+    scoring_columns = pipeline.get_scoring_columns(header)
+
+    assert scoring_columns[0] == "Unnamed: 0"
+    assert "Sensor-dead" not in scoring_columns and "Sensor-copy" not in scoring_columns
+    assert scoring_columns[1:] == pipeline.load_preprocessor().steps[0][1].kept_columns_
+    # without a pruning step every column is scored
+    assert pipeline.get_scoring_columns(header, StandardScaler()) == header
+
+
+def test_predictions_keep_every_input_column(pruned_upload, monkeypatch):
+    pipeline, upload = pruned_upload
+    scored = []
+    predict = pipeline.predict
+    monkeypatch.setattr(pipeline, "predict", lambda features, pair=None: scored.append(list(features.columns)) or predict(features, pair))
+
+    input_stream = io.BytesIO(upload.to_csv(index=False).encode())
+    streamed = pd.read_csv(io.StringIO("".join(pipeline.open_prediction_stream(input_stream, chunksize=128))))
+    upload.to_csv("upload.csv", index=False)
+    pipeline.get_predicted_dataframe("upload.csv")
+    saved = pd.read_csv(pipeline.prediction_file_path)
+
+    for predicted in (streamed, saved):
+        assert list(predicted.columns) == ["Unnamed: 0"] + list(upload.columns[1:]) + ["prediction"]
+        assert (predicted["Sensor-dead"] == 1.0).all()
+        assert (predicted["prediction"] == streamed["prediction"]).all()
+    assert all("Sensor-dead" not in columns for columns in scored)
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.constant import artifact_folder
+from src.pipeline.prediction_jobs import PredictionJobManager
+from src.utils.main_utils import MainUtils
+
+
+class Upload:
+    def __init__(self, content: bytes, filename: str = "wafers.csv"):
+        self.content = content
+        self.filename = filename
+
+    def save(self, file_path):
+        with open(file_path, "wb") as file:
+            file.write(self.content)
+
+
+def wait_for(manager, job_id, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.get_status(job_id)
+        if status["status"] in ("completed", "failed") and status["active_jobs"] == 0:
+            return status
+        time.sleep(0.1)
+    raise TimeoutError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def wafer_csv(workdir, wafer_frame):
+    """
+    A served model pair in artifacts/ (the worker processes load it from the
+    working directory) and an upload with the sensors it was trained on
+    """
+    features, target = wafer_frame.drop(columns="Good/Bad"), wafer_frame["Good/Bad"]
+    preprocessor = Pipeline([("imputer", SimpleImputer()), ("scaler", StandardScaler())]).fit(features)
+    model = LogisticRegression(max_iter=200).fit(preprocessor.transform(features), target)
+    os.makedirs(artifact_folder)
+    # the model is written last, as training does
+    MainUtils.save_object(os.path.join(artifact_folder, "preprocessor.pkl"), preprocessor)
+    MainUtils.save_object(os.path.join(artifact_folder, "model.pkl"), model)
+    return features.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def manager(workdir):
+    manager = PredictionJobManager(jobs_dir="jobs", max_workers=1, max_queue_size=2, retention_hours=0)
+    yield manager
+    manager.shutdown()
+
+
+def test_job_writes_predictions(manager, wafer_csv, wafer_frame):
+    job_id = manager.submit(Upload(wafer_csv))
+
+    assert wait_for(manager, job_id)["status"] == "completed"
+    predicted = pd.read_csv(manager.get_result_path(job_id))
+    assert len(predicted) == 400 and set(predicted["prediction"]) <= set(wafer_frame["Good/Bad"])
+
+
+def test_bad_input_fails_the_job(manager, wafer_csv):
+    job_id = manager.submit(Upload(b""))
+
+    status = wait_for(manager, job_id)
+    assert status["status"] == "failed" and "empty" in status["error"]
+    assert manager.get_result_path(job_id) is None
+
+
+def test_dead_worker_fails_its_job_and_the_pool_restarts(manager, wafer_csv):
+    # the worker exits before it gets to the job, breaking the pool
+    executor = manager.get_executor()
+    executor.submit(os._exit, 1)
+    job_id = manager.submit(Upload(wafer_csv))
+
+    status = wait_for(manager, job_id)
+    assert status["status"] == "failed"
+    assert manager._executor is not executor
+
+    job_id = manager.submit(Upload(wafer_csv))
+    assert wait_for(manager, job_id)["status"] == "completed"
+
+
+def test_submit_replaces_a_pool_that_already_broke(manager, wafer_csv):
+    executor = manager.get_executor()
+    with pytest.raises(Exception):
+        executor.submit(os._exit, 1).result()
+
+    job_id = manager.submit(Upload(wafer_csv))
+    assert wait_for(manager, job_id)["status"] == "completed"
+    assert manager._executor is not executor
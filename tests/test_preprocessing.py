@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.components.data_transformation import DataTransformation
+from src.components.preprocessing import FusedPreprocessor, QuantileSketch, SensorPruner, get_input_columns
+
+
+@pytest.fixture
+def sensors(wafer_frame):
+    X = wafer_frame.drop(columns="Good/Bad")
+    X["Sensor-dead"] = 1.0
+    X["Sensor-copy"] = X["Sensor-3"]
+    return X.iloc[:300], X.iloc[300:]
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_fused_preprocessor_matches_the_training_pipeline(workdir, sensors, dtype):
+    X_train, X_new = (X.astype(dtype) for X in sensors)
+    preprocessor = DataTransformation("unused").get_data_transformer_object().fit(X_train)
+    fused = FusedPreprocessor.from_pipeline(preprocessor, dtype=dtype)
+
+    assert "Sensor-dead" not in fused.columns and "Sensor-copy" not in fused.columns
+    expected = preprocessor.transform(X_new).astype(dtype, copy=False)
+    np.testing.assert_array_equal(fused.transform(X_new), expected)
+    np.testing.assert_array_equal(fused.transform(X_new.to_numpy()), expected)
+    # rows with every sensor missing only exist outside the training data
+    X_missing = X_new.head(3).copy()
+    X_missing[:] = np.nan
+    np.testing.assert_array_equal(fused.transform(X_missing), preprocessor.transform(X_missing).astype(dtype))
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_fused_preprocessor_matches_mean_imputer_and_standard_scaler(sensors, dtype):
+    X_train, X_new = (X.astype(dtype) for X in sensors)
+    preprocessor = Pipeline([
+        ("pruner", SensorPruner()),
+        ("imputer", SimpleImputer(strategy="mean")),
+        ("scaler", StandardScaler()),
+    ]).fit(X_train)
+    fused = FusedPreprocessor.from_pipeline(preprocessor, dtype=dtype)
+
+    np.testing.assert_array_equal(fused.transform(X_new), preprocessor.transform(X_new))
+    assert get_input_columns(fused) == list(fused.columns)
+
+
+def test_unsupported_steps_are_not_fused(sensors):
+    preprocessor = Pipeline([("imputer", SimpleImputer()), ("scaler", MinMaxScaler())]).fit(sensors[0])
+
+    with pytest.raises(ValueError, match="cannot fuse"):
+        FusedPreprocessor.from_pipeline(preprocessor)
+
+
+@pytest.fixture
+def prunable(wafer_frame):
+    X = wafer_frame.drop(columns="Good/Bad").astype(np.float64)
+    rng = np.random.default_rng(0)
+    X["Sensor-dead"] = 1.0
+    X["Sensor-dead-gaps"] = np.where(rng.random(len(X)) < 0.3, np.nan, 2.0)
+    X["Sensor-sparse"] = np.where(rng.random(len(X)) < 0.8, np.nan, rng.random(len(X)))
+    X["Sensor-half"] = np.where(rng.random(len(X)) < 0.5, np.nan, rng.random(len(X)))
+    X["Sensor-empty"] = np.nan
+    X["Sensor-copy"] = X["Sensor-3"]
+    return X
+
+
+def test_pruner_drops_constant_sparse_and_duplicate_sensors(prunable):
+    pruner = SensorPruner().fit(prunable)
+    dropped = set(prunable.columns) - set(pruner.kept_columns_)
+
+    assert dropped >= {"Sensor-dead", "Sensor-dead-gaps", "Sensor-sparse", "Sensor-empty", "Sensor-copy"}
+    assert "Sensor-half" in pruner.kept_columns_ and "Sensor-3" in pruner.kept_columns_
+    assert pruner.n_duplicates_ >= 1
+    assert pruner.n_low_information_ + pruner.n_duplicates_ == len(dropped)
+    assert list(pruner.transform(prunable).columns) == pruner.kept_columns_
+    # input already reduced to the kept columns passes through
+    reduced = prunable[pruner.kept_columns_].to_numpy()
+    np.testing.assert_array_equal(pruner.transform(reduced), reduced)
+    np.testing.assert_array_equal(pruner.transform(prunable.to_numpy()), reduced)
+
+
+def test_pruner_thresholds(prunable):
+    assert "Sensor-sparse" in SensorPruner(max_missing_ratio=0.9).fit(prunable).kept_columns_
+    assert "Sensor-copy" in SensorPruner(drop_duplicates=False).fit(prunable).kept_columns_
+    # the variance of the observed values of each sensor
+    variances = prunable.var(ddof=0).dropna()
+    kept = SensorPruner(variance_threshold=variances.median()).fit(prunable).kept_columns_
+    assert variances.idxmax() in kept and variances.idxmin() not in kept
+    assert set(kept) <= set(variances[variances > variances.median()].index)
+    assert SensorPruner(variance_threshold=variances.max()).fit(prunable).kept_columns_ == []
+
+
+def test_pruner_partial_fit_matches_fit(prunable):
+    pruner = SensorPruner().fit(prunable)
+    streamed = SensorPruner()
+    for start in range(0, len(prunable), 70):
+        streamed.partial_fit(prunable.iloc[start:start + 70])
+
+    assert streamed.kept_columns_ == pruner.kept_columns_
+    assert (streamed.n_low_information_, streamed.n_duplicates_) == (pruner.n_low_information_, pruner.n_duplicates_)
+    observed = prunable.notna().sum().to_numpy() > 0
+    np.testing.assert_allclose(streamed.means_[observed], prunable.mean().to_numpy()[observed])
+    np.testing.assert_allclose(
+        streamed.m2_[observed], (prunable.var(ddof=0) * prunable.notna().sum()).to_numpy()[observed], rtol=1e-9
+    )
+    # refitting starts over instead of adding to the streamed statistics
+    assert streamed.fit(prunable).n_rows_seen_ == len(prunable)
+
+
+def sketch_data(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.normal(size=n_rows), rng.exponential(size=n_rows), rng.integers(0, 50, n_rows)])
+
+
+def assert_within_rank_error(sketch, data, percentiles):
+    # a sketch quantile lies within log2(n / k) / k of the requested rank
+    rank_error = np.log2(len(data) / sketch.k) / sketch.k
+    estimates = sketch.quantiles(percentiles)
+    exact = np.percentile(data, percentiles, axis=0)
+    for i, percentile in enumerate(percentiles):
+        below = (data < estimates[i]).mean(axis=0)
+        at_or_below = (data <= estimates[i]).mean(axis=0)
+        assert (below <= percentile / 100 + rank_error).all() and (at_or_below >= percentile / 100 - rank_error).all()
+        # on these distributions that keeps the estimate close to np.percentile
+        spread = np.percentile(data, 75, axis=0) - np.percentile(data, 25, axis=0)
+        assert (np.abs(estimates[i] - exact[i]) <= 0.1 * spread + 1).all()
+
+
+def test_quantile_sketch_is_exact_below_k_rows():
+    data = sketch_data(300)
+    sketch = QuantileSketch(3, k=512)
+    sketch.update(data)
+
+    np.testing.assert_array_equal(sketch.quantiles([0, 25, 50, 75, 100]), np.percentile(data, [0, 25, 50, 75, 100], axis=0))
+
+
+def test_quantile_sketch_rank_error_on_many_rows():
+    data = sketch_data(60000)
+    sketch = QuantileSketch(3, k=512)
+    for start in range(0, len(data), 7000):
+        sketch.update(data[start:start + 7000])
+
+    assert sketch.n_rows == len(data)
+    assert sum(len(level) for level in sketch.levels) < len(data) / 10
+    assert_within_rank_error(sketch, data, [1, 10, 25, 50, 75, 90, 99])
+
+
+def test_merged_quantile_sketches_match_one_sketch_of_all_rows():
+    data = sketch_data(60000, seed=1)
+    sketches = []
+    for seed, part in enumerate(np.array_split(data, 4)):
+        sketch = QuantileSketch(3, k=512, seed=seed)
+        sketch.update(part)
+        sketches.append(sketch)
+
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+
+    assert merged.n_rows == len(data)
+    assert_within_rank_error(merged, data, [1, 10, 25, 50, 75, 90, 99])
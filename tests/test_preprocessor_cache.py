@@ -0,0 +1,72 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import RobustScaler
+
+from src.utils.preprocessor_cache import PreprocessorCache
+
+
+def make_preprocessor(strategy="median"):
+    return Pipeline([("imputer", SimpleImputer(strategy=strategy)), ("scaler", RobustScaler())])
+
+
+@pytest.fixture
+def cache(workdir):
+    return PreprocessorCache(cache_dir="cache", max_entries=2)
+
+
+@pytest.fixture
+def features(wafer_frame):
+    return wafer_frame.drop(columns="Good/Bad")
+
+
+def test_cached_preprocessor_is_returned_for_the_same_split(cache, features):
+    preprocessor = make_preprocessor().fit(features)
+    key = cache.fingerprint(features, make_preprocessor())
+    assert cache.get(key) is None
+
+    cache.put(key, preprocessor)
+    cached = cache.get(cache.fingerprint(features.copy(), make_preprocessor()))
+
+    np.testing.assert_array_equal(cached.transform(features), preprocessor.transform(features))
+
+
+def test_changed_parameters_or_data_miss(cache, features):
+    key = cache.fingerprint(features, make_preprocessor())
+    cache.put(key, make_preprocessor().fit(features))
+
+    assert cache.fingerprint(features, make_preprocessor(strategy="mean")) != key
+    changed = features.copy()
+    changed.iloc[0, 0] += 1
+    assert cache.fingerprint(changed, make_preprocessor()) != key
+    assert cache.fingerprint(features.iloc[:-1], make_preprocessor()) != key
+    assert cache.fingerprint(features.astype(np.float64), make_preprocessor()) != key
+    assert cache.get(cache.fingerprint(changed, make_preprocessor())) is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, features):
+    preprocessor = make_preprocessor().fit(features)
+    cache.put("a", preprocessor)
+    cache.put("b", preprocessor)
+    old = time.time() - 60
+    for key, age in (("a", 20), ("b", 10)):
+        os.utime(os.path.join("cache", f"{key}.pkl"), (old - age, old - age))
+
+    assert cache.get("a") is not None
+    cache.put("c", preprocessor)
+
+    assert sorted(os.listdir("cache")) == ["a.pkl", "c.pkl"]
+    assert cache.get("b") is None
+
+
+def test_unreadable_entries_are_discarded(cache):
+    os.makedirs("cache")
+    with open(os.path.join("cache", "broken.pkl"), "wb") as entry:
+        entry.write(b"not a pickle")
+
+    assert cache.get("broken") is None
+    assert not os.path.exists(os.path.join("cache", "broken.pkl"))
@@ -0,0 +1,153 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.pipeline.model_holder import LoadedModel
+from src.pipeline.row_scoring import MicroBatcher, RowScorer
+
+
+class RecordingScore:
+    """
+    A score_fn returning the first value of every row, recording the (key, batch size) of each call
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, key, rows):
+        with self.lock:
+            self.calls.append((key, len(rows)))
+        return rows[:, 0]
+
+
+@pytest.fixture
+def recording_score():
+    return RecordingScore()
+
+
+def test_batch_flushes_when_full(recording_score):
+    # the window is far longer than the test, only the batch size can flush it
+    batcher = MicroBatcher(recording_score, max_batch_size=4, window_seconds=60)
+    try:
+        futures = [batcher.submit(np.array([[float(index)]])) for index in range(4)]
+        assert [future.result(timeout=5) for future in futures] == [0.0, 1.0, 2.0, 3.0]
+    finally:
+        batcher.stop()
+
+    assert recording_score.calls == [(None, 4)]
+
+
+def test_batch_flushes_when_the_window_closes(recording_score):
+    batcher = MicroBatcher(recording_score, max_batch_size=100, window_seconds=0.05)
+    try:
+        start = time.monotonic()
+        futures = [batcher.submit(np.array([[float(index)]])) for index in range(3)]
+        assert [future.result(timeout=5) for future in futures] == [0.0, 1.0, 2.0]
+        assert time.monotonic() - start < 2
+    finally:
+        batcher.stop()
+
+    assert recording_score.calls == [(None, 3)]
+
+
+def test_rows_of_different_keys_are_scored_apart(recording_score):
+    first_key, second_key = object(), object()
+    batcher = MicroBatcher(recording_score, max_batch_size=3, window_seconds=60)
+    try:
+        futures = [
+            batcher.submit(np.array([[1.0]]), key=first_key),
+            batcher.submit(np.array([[2.0]]), key=second_key),
+            batcher.submit(np.array([[3.0]]), key=first_key),
+        ]
+        assert [future.result(timeout=5) for future in futures] == [1.0, 2.0, 3.0]
+    finally:
+        batcher.stop()
+
+    assert sorted(size for _, size in recording_score.calls) == [1, 2]
+
+
+def test_batch_failure_reaches_every_submitter():
+    def fail(key, rows):
+        raise RuntimeError("scoring failed")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, window_seconds=60)
+    try:
+        futures = [batcher.submit(np.array([[1.0]])) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="scoring failed"):
+                future.result(timeout=5)
+    finally:
+        batcher.stop()
+
+
+@pytest.fixture
+def scorer():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(60, 3)), columns=["Sensor-1", "Sensor-2", "Sensor-3"])
+    y = (X["Sensor-1"] > 0).astype(int)
+    preprocessor = Pipeline([("imputer", SimpleImputer(strategy="constant", fill_value=0)), ("scaler", StandardScaler())])
+    model = LogisticRegression().fit(preprocessor.fit_transform(X), y)
+
+    pair = LoadedModel(model, preprocessor, "v1")
+    scorer = RowScorer(SimpleNamespace(get=lambda: pair), max_batch_size=8, window_seconds=0.001, timeout_seconds=5)
+    yield scorer
+    scorer.batcher.stop()
+
+
+def expected_prediction(scorer, values):
+    pair = scorer.model_holder.get()
+    row = pd.DataFrame([values], columns=scorer.get_columns())
+    return int(pair.model.predict(pair.preprocessor.transform(row))[0])
+
+
+def test_row_payloads_are_parsed_into_the_layout(scorer):
+    columns, positions = scorer.get_layout(scorer.model_holder.get())
+    assert columns == ["Sensor-1", "Sensor-2", "Sensor-3"]
+
+    # missing sensors and nulls become NaN, unknown keys are ignored
+    row = scorer.parse_row({"Sensor-3": 1.5, "Sensor-1": None, "Sensor-99": 7}, columns, positions)
+    np.testing.assert_array_equal(row, np.array([[np.nan, np.nan, 1.5]], dtype=scorer.dtype))
+
+    row = scorer.parse_row([0.5, None, -1], columns, positions)
+    np.testing.assert_array_equal(row, np.array([[0.5, np.nan, -1]], dtype=scorer.dtype))
+
+    raw = np.array([0.5, 2, -1], dtype=scorer.dtype.newbyteorder("<")).tobytes()
+    np.testing.assert_array_equal(scorer.parse_row(raw, columns, positions), np.array([[0.5, 2, -1]], dtype=scorer.dtype))
+
+
+@pytest.mark.parametrize("payload", [
+    [1.0, 2.0],
+    np.zeros(4, dtype="<f8").tobytes()[:-1],
+    "Sensor-1=1",
+    1.0,
+])
+def test_malformed_rows_are_rejected(scorer, payload):
+    with pytest.raises(ValueError):
+        scorer.score(payload)
+
+
+def test_score_matches_the_model(scorer):
+    values = [1.2, -0.3, 0.8]
+    expected = expected_prediction(scorer, values)
+
+    assert scorer.score(values) == expected
+    assert scorer.score(dict(zip(scorer.get_columns(), values))) == expected
+    assert scorer.score(np.array(values, dtype=scorer.dtype.newbyteorder("<")).tobytes()) == expected
+
+
+def test_scoring_without_a_model_fails():
+    scorer = RowScorer(SimpleNamespace(get=lambda: LoadedModel(None, None, None)), timeout_seconds=5)
+    try:
+        with pytest.raises(FileNotFoundError):
+            scorer.score([1.0])
+    finally:
+        scorer.batcher.stop()
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import iter_wafer_chunks, write_wafer_csv
+from src.utils.feature_store import FeatureStore
+
+
+def test_generation_is_reproducible():
+    first = pd.concat(iter_wafer_chunks(250, chunksize=64, n_sensors=12, seed=3), ignore_index=True)
+    second = pd.concat(iter_wafer_chunks(250, chunksize=64, n_sensors=12, seed=3), ignore_index=True)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 250
+
+
+def test_generated_data_has_both_classes_and_missing_values(wafer_frame):
+    assert set(wafer_frame["Good/Bad"].unique()) == {-1.0, 1.0}
+    assert wafer_frame.drop(columns="Good/Bad").isna().to_numpy().any()
+
+
+def test_wafer_csv_reads_back_like_an_upload(workdir):
+    write_wafer_csv("wafers.csv", 100, n_sensors=8)
+    frame = pd.read_csv("wafers.csv")
+
+    assert list(frame.columns[:2]) == ["Unnamed: 0", "Sensor-1"]
+    assert len(frame) == 100
+
+
+def test_feature_store_round_trip(feature_store_file):
+    frame = FeatureStore.read(feature_store_file)
+
+    assert frame.shape == (400, 41)
+    assert np.isfinite(frame["Good/Bad"]).all()
@@ -0,0 +1,107 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic_data import iter_wafer_chunks
+from src.components.tree_ensemble import BatchedTreeModel, FlatTreeEnsemble
+
+
+def make_models():
+    return {
+        "random_forest": RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0),
+        "gradient_boosting": GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+        "xgboost": XGBClassifier(n_estimators=30, max_depth=4, random_state=0),
+    }
+
+
+@pytest.fixture(scope="module")
+def wafers():
+    """
+    Training rows, plus rows the models never saw: a batch from another seed
+    and the same batch with sensors pushed far outside the training range
+    """
+    def load(seed):
+        chunk = next(iter_wafer_chunks(400, n_sensors=30, bad_ratio=0.2, seed=seed))
+        features = chunk.drop(columns=["Unnamed: 0", "Good/Bad"])
+        # the sklearn ensembles of the pinned version reject missing values, impute them (some sensors are all NaN)
+        features = features.fillna(features.median()).fillna(0.0)
+        return features.to_numpy(np.float32), chunk["Good/Bad"].to_numpy()
+
+    X_train, y_train = load(1)
+    X_new, _ = load(2)
+    rng = np.random.default_rng(3)
+    X_outside = (X_new * rng.choice([-10.0, 10.0], size=X_new.shape)).astype(np.float32)
+    return X_train, y_train, np.vstack([X_new, X_outside])
+
+
+@pytest.fixture(scope="module", params=["random_forest", "gradient_boosting", "xgboost"])
+def fitted(request, wafers):
+    X_train, y_train, _ = wafers
+    model = make_models()[request.param]
+    # XGBoost wants 0-based labels, training encodes them the same way
+    model.fit(X_train, (y_train == 1).astype(int) if request.param == "xgboost" else y_train)
+    return request.param, model
+
+
+def test_flat_ensemble_matches_the_model_on_unseen_rows(fitted, wafers):
+    kind, model = fitted
+    _, _, X = wafers
+    ensemble = pickle.loads(pickle.dumps(FlatTreeEnsemble.from_model(model, source_hash="abc")))
+
+    assert ensemble.kind == kind and ensemble.source_hash == "abc"
+    np.testing.assert_array_equal(ensemble.classes_, model.classes_)
+    np.testing.assert_array_equal(ensemble.predict(X), model.predict(X))
+    # XGBoost applies its sigmoid in float32, which can differ in the last bit
+    np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), rtol=1e-6, atol=1e-7)
+
+
+def test_flat_ensemble_routes_missing_values_like_the_model(fitted, wafers):
+    kind, model = fitted
+    _, _, X = wafers
+    X = X.copy()
+    rng = np.random.default_rng(4)
+    X[rng.random(X.shape) < 0.2] = np.nan
+    X[:5] = np.nan
+    try:
+        expected = model.predict_proba(X)
+    except ValueError:
+        pytest.skip(f"this version's {type(model).__name__} does not accept missing values")
+
+    ensemble = FlatTreeEnsemble.from_model(model)
+    np.testing.assert_allclose(ensemble.predict_proba(X), expected, rtol=1e-6, atol=1e-7)
+    np.testing.assert_array_equal(ensemble.predict(X), model.predict(X))
+
+
+def test_flat_ensemble_works_across_tiles(wafers, monkeypatch):
+    X_train, y_train, X = wafers
+    model = make_models()["random_forest"].fit(X_train, y_train)
+    ensemble = FlatTreeEnsemble.from_model(model)
+    # 30 trees per tile of 64 rows x trees: many tiles and a partial last one
+    monkeypatch.setattr(FlatTreeEnsemble, "tile_size", 64 * 30 + 7)
+
+    np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), rtol=1e-6, atol=1e-7)
+
+
+def test_unsupported_models_are_rejected(wafers):
+    X_train, y_train, _ = wafers
+    with pytest.raises(ValueError):
+        FlatTreeEnsemble.from_model(DecisionTreeClassifier().fit(X_train, y_train))
+
+
+def test_batched_model_switches_on_batch_size(wafers, monkeypatch):
+    X_train, y_train, X = wafers
+    model = make_models()["random_forest"].fit(X_train, y_train)
+    batched = BatchedTreeModel(model, FlatTreeEnsemble.from_model(model), max_rows=16)
+    calls, native_predict = [], model.predict
+    monkeypatch.setattr(batched.ensemble, "predict", lambda rows: calls.append("flat") or native_predict(rows))
+    monkeypatch.setattr(batched.model, "predict", lambda rows: calls.append("native") or native_predict(rows))
+
+    batched.predict(X[:16])
+    batched.predict(X[:17])
+
+    assert calls == ["flat", "native"]
+    np.testing.assert_array_equal(batched.classes_, model.classes_)
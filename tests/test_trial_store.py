@@ -0,0 +1,90 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from src.components.model_trainer import ModelTrainer
+from src.utils.trial_store import TrialStore
+
+
+@pytest.fixture
+def store(workdir):
+    return TrialStore(root="trials", max_bytes=10 * 1024, max_age_days=1)
+
+
+def age(store, key, seconds):
+    entry_path = store._entry_path(key)
+    then = time.time() - seconds
+    os.utime(entry_path, (then, then))
+
+
+def test_stored_trials_are_not_refitted(workdir, monkeypatch):
+    trainer = ModelTrainer()
+    trainer.trial_store = TrialStore(root="trials")
+    rng = np.random.default_rng(0)
+    X, y = rng.random((120, 4)), rng.integers(0, 2, 120)
+    search_config = dict(ModelTrainer.default_search_config, cv=3)
+    dataset = trainer.trial_store.fingerprint(X, y)
+    estimator = DecisionTreeClassifier(random_state=0)
+
+    first = trainer.evaluate_candidates(estimator, "tree", [{"max_depth": 2}, {"max_depth": 3}], X, y, search_config, dataset)
+    second = trainer.evaluate_candidates(
+        estimator, "tree", [{"max_depth": 3}, {"max_depth": 4}, {"max_depth": 2}], X, y, search_config, dataset
+    )
+
+    assert [trial["cached"] for trial in first] == [False, False]
+    assert [trial["cached"] for trial in second] == [True, False, True]
+    assert second[0]["fold_scores"] == first[1]["fold_scores"] and second[2]["fold_scores"] == first[0]["fold_scores"]
+
+    # other data, another CV scheme or other fixed parameters are different trials
+    other = trainer.trial_store.fingerprint(X[:-1], y[:-1])
+    assert not trainer.evaluate_candidates(estimator, "tree", [{"max_depth": 2}], X[:-1], y[:-1], search_config, other)[0]["cached"]
+    assert not trainer.evaluate_candidates(
+        estimator, "tree", [{"max_depth": 2}], X, y, dict(search_config, cv=4), dataset
+    )[0]["cached"]
+    assert not trainer.evaluate_candidates(
+        DecisionTreeClassifier(random_state=1), "tree", [{"max_depth": 2}], X, y, search_config, dataset
+    )[0]["cached"]
+    # with the cache off everything is refitted
+    assert not trainer.evaluate_candidates(
+        estimator, "tree", [{"max_depth": 2}], X, y, dict(search_config, trial_cache=False), dataset
+    )[0]["cached"]
+
+
+def test_expired_trials_are_dropped(store):
+    store.put("aa11", {"fold_scores": [0.5]})
+    store.put("bb22", {"fold_scores": [0.6]})
+    age(store, "aa11", 2 * 24 * 3600)
+
+    assert store.get("aa11") is None
+    assert not os.path.exists(store._entry_path("aa11"))
+    assert store.get("bb22") == {"fold_scores": [0.6]}
+
+    age(store, "bb22", 2 * 24 * 3600)
+    store.evict()
+    assert not os.path.exists(store._entry_path("bb22"))
+
+
+def test_oldest_trials_are_evicted_beyond_max_bytes(store):
+    padding = "x" * 3000
+    keys = [f"{index:02d}ff" for index in range(5)]
+    for index, key in enumerate(keys):
+        store.put(key, {"fold_scores": [index], "padding": padding})
+        age(store, key, 1000 - index)
+
+    store.evict()
+
+    kept = [key for key in keys if store.get(key) is not None]
+    assert kept == keys[2:]
+    total_bytes = sum(os.path.getsize(store._entry_path(key)) for key in kept)
+    assert total_bytes <= store.max_bytes
+
+
+def test_fingerprint_depends_on_values_and_dtype():
+    X, y = np.arange(12, dtype=np.float64).reshape(6, 2), np.array([0, 1] * 3)
+
+    assert TrialStore.fingerprint(X, y) == TrialStore.fingerprint(X.copy(), y.copy())
+    assert TrialStore.fingerprint(X, y) != TrialStore.fingerprint(X.astype(np.float32), y)
+    assert TrialStore.fingerprint(X, y) != TrialStore.fingerprint(X, y[::-1].copy())
@@ -0,0 +1,105 @@
+import os
+import json
+
+import mongomock
+import pytest
+
+from benchmarks.synthetic_data import write_wafer_csv
+from src.exception import CustomException
+from upload_data import BulkLoader
+
+
+class RecordingCollection:
+    """
+    Wraps a mongomock collection, recording the ids of every insert_many call
+    in order and failing the call numbered fail_at
+    """
+
+    def __init__(self, collection, fail_at=None):
+        self.collection = collection
+        self.fail_at = fail_at
+        self.calls = 0
+        self.inserted = []
+
+    def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise RuntimeError("connection lost")
+        result = self.collection.insert_many(documents, ordered=ordered)
+        self.inserted.append([document["_id"] for document in documents])
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+@pytest.fixture
+def wafer_files(workdir):
+    return write_wafer_csv("wafer_a.csv", 120, n_sensors=5, seed=1), write_wafer_csv("wafer_b.csv", 60, n_sensors=5, seed=2)
+
+
+def make_loader(collection, **kwargs):
+    return BulkLoader(collection, batch_size=20, workers=1, chunksize=50, state_file_path="state.json", **kwargs)
+
+
+def assert_ids_increase_in_insert_order(inserted):
+    ids = [_id for batch in inserted for _id in batch]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_files_loaded_in_the_same_second_keep_load_order(wafer_files):
+    collection = RecordingCollection(mongomock.MongoClient().db.wafers)
+    # b is hashed and loaded after a, whatever their file hashes
+    assert make_loader(collection).load([wafer_files[1], wafer_files[0]]) == 180
+
+    assert_ids_increase_in_insert_order(collection.inserted)
+    assert collection.count_documents({}) == 180
+
+
+def test_resumed_chunk_lands_after_rows_loaded_in_the_meantime(wafer_files):
+    wafer_a, wafer_b = wafer_files
+    collection = RecordingCollection(mongomock.MongoClient().db.wafers, fail_at=5)
+
+    # chunks are three batches, the second batch of chunk 1 fails and the third goes in
+    with pytest.raises(CustomException):
+        make_loader(collection).load([wafer_a])
+    assert collection.count_documents({}) == 80
+    with open("state.json") as state_file:
+        assert json.load(state_file)["files"][os.path.abspath(wafer_a)]["done_chunks"] == [0]
+
+    collection.fail_at = None
+    make_loader(collection).load([wafer_b, wafer_a])
+
+    assert collection.count_documents({}) == 180
+    surviving = set(document["_id"] for document in collection.find({}, {"_id": 1}))
+    assert_ids_increase_in_insert_order([
+        [_id for _id in batch if _id in surviving] for batch in collection.inserted
+    ])
+
+
+def test_completed_files_are_skipped(wafer_files):
+    collection = RecordingCollection(mongomock.MongoClient().db.wafers)
+    make_loader(collection).load([wafer_files[0]])
+
+    assert make_loader(collection).load([wafer_files[0]]) == 0
+    assert collection.count_documents({}) == 120
+
+
+
+def test_resume_with_another_chunksize_is_refused(wafer_files):
+    collection = RecordingCollection(mongomock.MongoClient().db.wafers, fail_at=5)
+    with pytest.raises(CustomException):
+        make_loader(collection).load([wafer_files[0]])
+
+    collection.fail_at = None
+    loader = BulkLoader(collection, batch_size=20, workers=1, chunksize=40, state_file_path="state.json")
+    with pytest.raises(CustomException, match="chunksize 50"):
+        loader.load([wafer_files[0]])
+    assert collection.count_documents({}) == 80
+
+    # the recorded chunksize resumes it, and a new file may use any chunksize
+    make_loader(collection).load([wafer_files[0]])
+    loader = BulkLoader(collection, batch_size=20, workers=1, chunksize=40, state_file_path="state.json")
+    assert loader.load([wafer_files[1]]) == 60
+    assert collection.count_documents({}) == 180
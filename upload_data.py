@@ -1,33 +1,254 @@
-from pymongo.mongo_client import MongoClient
-import pandas as pd
-import json
 import os
+import sys
+import glob
+import json
+import hashlib
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get MongoDB connection string from environment variable
-uri = os.getenv("MONGO_DB_URL")
-if not uri:
-    raise ValueError("MONGO_DB_URL environment variable is not set. Please set it in your .env file.")
-
-# Create a new client and connect to the server
-client = MongoClient(uri)
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.exception import CustomException
+from src.logger import logging
 
 # Database configuration - also use environment variables if possible
 DATABASE_NAME = os.getenv("MONGO_DATABASE_NAME", "Dhananjay_DB")
 COLLECTION_NAME = os.getenv("MONGO_COLLECTION_NAME", "waferfault")
 
-# read the data as a dataframe
-df = pd.read_csv(r"C:\Users\15dha\OneDrive\Desktop\Sensor project\notebooks\wafer_23012020_041211.csv")
-df = df.drop("Unnamed: 0", axis=1)
+DUPLICATE_KEY_ERROR = 11000
+
+
+class BulkLoader:
+    """
+    Loads wafer csv files into MongoDB.
+
+    Files are streamed in chunks, documents are built straight from NumPy rows
+    and sent as unordered insert_many batches from a pool of worker threads.
+
+    Every row gets an ObjectId made of its chunk's load timestamp, the file
+    hash and the row number. Each chunk takes a new load timestamp, later
+    than every timestamp the loader handed out before (kept in the state
+    file), so the ids of successive chunks and files of a loader increase in
+    the order they are loaded, as watermark-based incremental ingestion (`_id >
+    watermark`) needs.
+
+    Finished chunks are recorded in the state file, and a rerun after a
+    partial failure skips them; it must use the same chunksize, which is
+    recorded per file. The chunk that was in flight is sent again
+    under a new timestamp, after its rows from the interrupted attempt are
+    deleted, so it cannot land below ids that were loaded in the meantime.
+
+    Batches of one chunk are inserted concurrently and become visible in any
+    order, so incremental ingestion must not run while a load (or a resumed
+    load) is in progress.
+    """
+
+    def __init__(self, collection, batch_size=1000, workers=4, chunksize=50000, state_file_path=".upload_state.json"):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunksize = chunksize
+        self.state_file_path = state_file_path
+        self.state = self.read_state()
+
+    def read_state(self) -> dict:
+        if not os.path.exists(self.state_file_path):
+            return {"last_load_time": 0, "files": {}}
+        with open(self.state_file_path, "r") as state_file:
+            return json.load(state_file)
+
+    def write_state(self) -> None:
+        tmp_file_path = self.state_file_path + ".tmp"
+        with open(tmp_file_path, "w") as state_file:
+            json.dump(self.state, state_file, indent=2)
+        os.replace(tmp_file_path, self.state_file_path)
+
+    @staticmethod
+    def list_input_files(paths) -> list:
+        """
+        Expand directories into their wafer_*.csv batch files
+        """
+        input_files = []
+        for path in paths:
+            if os.path.isdir(path):
+                input_files.extend(sorted(glob.glob(os.path.join(path, "wafer_*.csv"))))
+            else:
+                input_files.append(path)
+        return input_files
+
+    def get_file_state(self, file_path: str) -> dict:
+        """
+        Return the resume state of a file, starting a new load if the file changed
+        """
+        file_stat = os.stat(file_path)
+        file_key = os.path.abspath(file_path)
+        signature = f"{file_stat.st_size}:{int(file_stat.st_mtime)}"
+
+        file_state = self.state["files"].get(file_key)
+        if file_state is None or file_state["signature"] != signature:
+            file_state = {
+                "signature": signature,
+                "file_hash": hashlib.sha1(f"{file_key}:{signature}".encode()).hexdigest()[:6],
+                "chunksize": self.chunksize,
+                "done_chunks": [],
+                "pending_chunk": None,
+                "complete": False,
+            }
+            self.state["files"][file_key] = file_state
+        return file_state
+
+    def next_load_time(self) -> int:
+        """
+        A load timestamp later than every one handed out before, so chunks
+        loaded within the same second still get increasing ids
+        """
+        load_time = max(int(time.time()), self.state["last_load_time"] + 1)
+        self.state["last_load_time"] = load_time
+        return load_time
+
+    @staticmethod
+    def make_ids(load_time: int, file_hash: str, first_row: int, n_rows: int) -> list:
+        # 4 byte load timestamp + 3 byte file hash + 5 byte row number
+        prefix = load_time.to_bytes(4, "big") + bytes.fromhex(file_hash)
+        return [ObjectId(prefix + row.to_bytes(5, "big")) for row in range(first_row, first_row + n_rows)]
+
+    def discard_pending_chunk(self, file_state: dict) -> None:
+        """
+        Delete the rows an interrupted attempt inserted for the chunk that was in flight
+        """
+        pending_chunk = file_state["pending_chunk"]
+        if pending_chunk is None:
+            return
+        load_time, first_row = pending_chunk["load_time"], pending_chunk["first_row"]
+        first_id = self.make_ids(load_time, file_state["file_hash"], first_row, 1)[0]
+        last_id = self.make_ids(load_time, file_state["file_hash"], first_row + pending_chunk["n_rows"] - 1, 1)[0]
+        n_deleted = self.collection.delete_many({"_id": {"$gte": first_id, "$lte": last_id}}).deleted_count
+        logging.info(f"Discarded {n_deleted} rows of interrupted chunk {pending_chunk['index']}")
+
+    @staticmethod
+    def build_documents(chunk: pd.DataFrame, ids: list) -> list:
+        """
+        Build insert documents directly from the chunk's NumPy rows, storing NaN as null
+        """
+        columns = ["_id"] + chunk.columns.to_list()
+        values = chunk.to_numpy(dtype=np.float64)
+        rows = values.astype(object)
+        rows[np.isnan(values)] = None
+        return [dict(zip(columns, [_id] + row)) for _id, row in zip(ids, rows.tolist())]
+
+    def insert_batch(self, documents: list) -> int:
+        try:
+            return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise
+            # rows of this batch that a retried attempt had already inserted
+            return e.details.get("nInserted", 0)
+
+    def load_file(self, file_path: str, executor: ThreadPoolExecutor) -> int:
+        file_state = self.get_file_state(file_path)
+        if file_state["complete"]:
+            logging.info(f"Skipping {file_path}, already loaded")
+            return 0
+
+        # chunk indices only name the same rows when read with the same chunksize
+        if file_state["chunksize"] != self.chunksize:
+            if file_state["done_chunks"] or file_state["pending_chunk"] is not None:
+                raise ValueError(
+                    f"{file_path} was partly loaded with chunksize {file_state['chunksize']}, "
+                    f"resume it with that chunksize instead of {self.chunksize}"
+                )
+            file_state["chunksize"] = self.chunksize
+
+        done_chunks = set(file_state["done_chunks"])
+        n_inserted = 0
+
+        for chunk_index, chunk in enumerate(pd.read_csv(file_path, chunksize=self.chunksize)):
+            if chunk_index in done_chunks:
+                continue
+
+            if "Unnamed: 0" in chunk.columns:
+                chunk = chunk.drop("Unnamed: 0", axis=1)
+
+            self.discard_pending_chunk(file_state)
+            first_row = chunk_index * self.chunksize
+            load_time = self.next_load_time()
+            # record the ids before sending, so a rerun can find the rows of an interrupted attempt
+            file_state["pending_chunk"] = {
+                "index": chunk_index, "load_time": load_time, "first_row": first_row, "n_rows": len(chunk),
+            }
+            self.write_state()
+
+            documents = self.build_documents(chunk, self.make_ids(load_time, file_state["file_hash"], first_row, len(chunk)))
+            futures = [
+                executor.submit(self.insert_batch, documents[start:start + self.batch_size])
+                for start in range(0, len(documents), self.batch_size)
+            ]
+            wait(futures)
+            n_inserted += sum(future.result() for future in futures)
+
+            file_state["done_chunks"].append(chunk_index)
+            file_state["pending_chunk"] = None
+            self.write_state()
+
+        file_state["complete"] = True
+        self.write_state()
+
+        logging.info(f"Loaded {file_path}: {n_inserted} new documents")
+        return n_inserted
+
+    def load(self, paths) -> int:
+        try:
+            input_files = self.list_input_files(paths)
+            logging.info(f"Bulk loading {len(input_files)} files with {self.workers} workers")
+
+            n_inserted = 0
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for index, file_path in enumerate(input_files):
+                    n_inserted += self.load_file(file_path, executor)
+                    logging.info(f"Finished file {index + 1} of {len(input_files)}: {file_path}")
+
+            return n_inserted
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load wafer csv files into MongoDB")
+    parser.add_argument("paths", nargs="+", help="csv files or directories of wafer_*.csv batch files")
+    parser.add_argument("--database", default=DATABASE_NAME)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many call")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent insert threads")
+    parser.add_argument("--chunksize", type=int, default=50000, help="csv rows read at a time, a resumed load must keep it")
+    parser.add_argument("--state-file", default=".upload_state.json", help="resume state for interrupted loads")
+    args = parser.parse_args()
 
-# Convert the data into json
-json_record = list(json.loads(df.T.to_json()).values())
+    # Get MongoDB connection string from environment variable
+    if not os.getenv("MONGO_DB_URL"):
+        raise ValueError("MONGO_DB_URL environment variable is not set. Please set it in your .env file.")
 
-# now dump the data into the database
-client[DATABASE_NAME][COLLECTION_NAME].insert_many(json_record)
+    # Reuse the process-wide pooled client
+    collection = MongoDBClient(database_name=args.database).get_collection(args.collection)
 
-print(f"Successfully uploaded data to {DATABASE_NAME}.{COLLECTION_NAME}")
+    loader = BulkLoader(
+        collection,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        state_file_path=args.state_file,
+    )
+    n_inserted = loader.load(args.paths)
 
+    print(f"Successfully uploaded {n_inserted} documents to {args.database}.{args.collection}")